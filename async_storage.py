@@ -0,0 +1,99 @@
+"""Asyncio adapter for the synchronous task stores.
+
+The stores do blocking file or database I/O. Calling them directly from an
+async request handler stalls the event loop for every other client, so
+this adapter runs reads on a small bounded thread pool and sends writes
+through the store's single WriteQueue writer thread.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from storage import WriteQueue
+
+
+class AsyncTaskStore:
+    """Awaitable wrapper around a TaskStore (or any backend with the same methods).
+
+    Reads run concurrently on at most max_workers threads. Writes are
+    serialized by one writer thread per store, which also group-commits
+    bursts of mutations (see storage.WriteQueue), so a long save never
+    blocks the event loop or queued reads.
+    """
+
+    def __init__(self, store, max_workers=4, write_window=0.005, listener=None):
+        """Wrap a store.
+
+        Args:
+            store: Synchronous store to wrap
+            max_workers: Maximum number of threads used for reads
+            write_window: Seconds the writer waits to batch mutations
+            listener: Notified of each write batch (see storage.WriteQueue)
+        """
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-reader")
+        self._writer = WriteQueue(store, window=write_window, listener=listener)
+
+    async def read(self, op):
+        """Run a read-only callable taking the store on the reader pool.
+
+        Args:
+            op: Callable taking the store
+
+        Returns:
+            The callable's return value
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(op, self.store))
+
+    async def write(self, op):
+        """Run a mutation on the writer thread and wait for its own result.
+
+        Args:
+            op: Callable taking the store; it should validate before
+                changing anything (see WriteQueue.submit)
+
+        Returns:
+            The callable's return value (exceptions are re-raised here)
+        """
+        return await asyncio.wrap_future(self._writer.submit(op))
+
+    async def warm(self):
+        """Pre-load the store's cache without blocking the event loop."""
+        await self.read(lambda store: store.warm())
+
+    async def get_version(self):
+        """Awaitable TaskStore.get_version."""
+        return await self.read(lambda store: store.get_version())
+
+    async def load_tasks(self):
+        """Awaitable TaskStore.load_tasks."""
+        return await self.read(lambda store: store.load_tasks())
+
+    async def get_task(self, task_id):
+        """Awaitable TaskStore.get_task."""
+        return await self.read(lambda store: store.get_task(task_id))
+
+    async def get_tasks_for_week(self, week_start):
+        """Awaitable TaskStore.get_tasks_for_week."""
+        return await self.read(lambda store: store.get_tasks_for_week(week_start))
+
+    async def query_tasks(self, week_from=None, week_to=None, category=None, completed=None,
+                          after=None, limit=None):
+        """Awaitable TaskStore.query_tasks."""
+        return await self.read(lambda store: store.query_tasks(week_from, week_to, category,
+                                                               completed, after, limit))
+
+    async def get_task_count_by_category(self, week_start, category):
+        """Awaitable TaskStore.get_task_count_by_category."""
+        return await self.read(lambda store: store.get_task_count_by_category(week_start, category))
+
+    async def get_active_counts(self):
+        """Awaitable TaskStore.get_active_counts."""
+        return await self.read(lambda store: store.get_active_counts())
+
+    def close(self):
+        """Flush pending writes and stop the worker threads."""
+        self._writer.close()
+        self._executor.shutdown(wait=True)
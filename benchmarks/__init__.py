@@ -0,0 +1,8 @@
+"""Performance benchmarks for the task model and storage layer.
+
+Run a benchmark module directly, e.g.:
+    python -m benchmarks.task_model
+    python -m benchmarks.suite --sizes 1000 10000
+    python -m benchmarks.load --concurrency 1 8 32
+    python -m benchmarks.history tasks.json --tasks 100000
+"""
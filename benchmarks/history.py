@@ -0,0 +1,111 @@
+"""Synthetic task histories for benchmarks.
+
+Builds tasks.json files that look like years of real use: a few dozen
+tasks per past week, most of them completed, and a current week that
+respects the category limits so the app behaves normally on top of it.
+
+Usage:
+    python -m benchmarks.history tasks.json --tasks 100000 [--weeks 520] [--seed 0]
+"""
+
+import argparse
+import json
+import random
+from datetime import date, datetime, time, timedelta
+
+from task import CATEGORY_LIMITS, VALID_CATEGORIES
+from week_utils import get_week_start
+
+WORDS = (
+    "review write call plan update fix email draft prepare book check send "
+    "report budget meeting slides invoice client design release notes team "
+    "backlog sprint dentist groceries taxes insurance garden car school trip"
+).split()
+
+# Past weeks lean towards the middle two quadrants, as real lists do
+CATEGORY_WEIGHTS = (0.2, 0.3, 0.3, 0.2)
+
+# Share of past-week tasks that were completed
+COMPLETED_SHARE = 0.85
+
+
+def _record(rng, task_id, week, category, completed):
+    """Build one raw task record in the given week."""
+    created = datetime.combine(week + timedelta(days=rng.randrange(7)),
+                               time(rng.randrange(8, 20), rng.randrange(60), rng.randrange(60)))
+    return {
+        'id': task_id,
+        'text': ' '.join(rng.choices(WORDS, k=rng.randint(2, 8))).capitalize(),
+        'category': category,
+        'completed': completed,
+        'week_start': week.isoformat(),
+        'created_at': created.isoformat(),
+    }
+
+
+def make_history(count, weeks=None, current_week=None, seed=0):
+    """Build a task history as raw records, oldest first.
+
+    Args:
+        count: Total number of tasks
+        weeks: Number of past weeks to spread the history over (default:
+            about 20 tasks a week, at most ten years)
+        current_week: ISO Monday of the current week (default: today's)
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        list: Task dictionaries with IDs 1..count
+    """
+    rng = random.Random(seed)
+    current = date.fromisoformat(current_week or get_week_start())
+
+    # Current week: one free slot per category so adds still succeed,
+    # plus a couple of completed tasks
+    current_plan = []
+    for category in VALID_CATEGORIES:
+        current_plan += [(category, False)] * (CATEGORY_LIMITS[category] - 1)
+    current_plan += [(VALID_CATEGORIES[0], True), (VALID_CATEGORIES[1], True)]
+    current_plan = current_plan[:count]
+
+    past_count = count - len(current_plan)
+    if weeks is None:
+        weeks = min(520, max(1, past_count // 20))
+
+    records = []
+    for i in range(past_count):
+        # Spread evenly, oldest week first
+        week = current - timedelta(weeks=weeks - i * weeks // past_count)
+        category = rng.choices(VALID_CATEGORIES, CATEGORY_WEIGHTS)[0]
+        records.append(_record(rng, i + 1, week, category, rng.random() < COMPLETED_SHARE))
+    for category, completed in current_plan:
+        records.append(_record(rng, len(records) + 1, current, category, completed))
+    return records
+
+
+def write_history(path, records):
+    """Write records as a tasks.json file in the TaskStore format.
+
+    Args:
+        path: Destination file
+        records: Task dictionaries as returned by make_history
+    """
+    with open(path, 'w') as f:
+        json.dump({'version': 1, 'next_id': len(records) + 1, 'tasks': records}, f)
+
+
+def main():
+    """Generate a tasks.json history file."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic task history")
+    parser.add_argument('output', help='File to write, e.g. tasks.json')
+    parser.add_argument('--tasks', type=int, default=10_000, help='Number of tasks (default: 10000)')
+    parser.add_argument('--weeks', type=int, default=None, help='Number of past weeks')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    records = make_history(args.tasks, weeks=args.weeks, seed=args.seed)
+    write_history(args.output, records)
+    print(f"Wrote {len(records):,} tasks to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+"""Concurrent load test for the web API, run in-process.
+
+Drives webapp.app through an ASGI client with many concurrent workers,
+each looping over a weighted mix of GET /api/tasks, create, toggle, update
+and delete for the duration of a level. For every concurrency level it
+reports throughput and p50/p95/p99 latency per endpoint.
+
+It also checks that nothing went wrong under contention:
+
+    lost updates      a worker's own tasks (it is the only one changing
+                      them) don't end up as its last successful response
+                      left them, deleted tasks come back, or the toggles
+                      many workers make on a few shared tasks don't add up
+    limit violations  a week view, during the run or at its end, shows more
+                      active tasks in a category than CATEGORY_LIMITS allows
+
+The exit status is 1 if any check failed.
+
+Usage:
+    python -m benchmarks.load [--concurrency 1 8 32] [--duration 5]
+                              [--backend json+cache] [--tasks 10000]
+                              [--mix get=50,create=15,toggle=15,update=10,delete=10]
+                              [--output load.json]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from benchmarks.history import make_history, write_history
+from benchmarks.suite import CONFIGS, git_commit, make_store
+from task import Task, CATEGORY_LIMITS, VALID_CATEGORIES, CAT_PARKING_LOT
+from week_utils import get_week_start
+
+DEFAULT_MIX = 'get=50,create=15,toggle=15,update=10,delete=10'
+
+# Tasks in a past week that every worker toggles, to provoke lost updates
+SHARED_TASKS = 4
+
+# Share of toggles aimed at the shared tasks rather than the worker's own
+SHARED_TOGGLE_SHARE = 0.5
+
+# Share of updates that also move the task to another category
+MOVE_SHARE = 0.3
+
+
+def parse_mix(text):
+    """Parse an operation mix like 'get=50,create=10' into weights."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('get', 'create', 'toggle', 'update', 'delete'):
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Level:
+    """Measurements and check results for one concurrency level."""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.problems = []
+        self.elapsed = 0.0
+        # Shared task id -> number of successful toggles
+        self.shared_toggles = Counter()
+
+    def record(self, endpoint, seconds, status):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def problem(self, message):
+        self.problems.append(message)
+
+    def check_limits(self, tasks, where):
+        """Record a violation if a week view has a category over its limit."""
+        active = Counter(t['category'] for t in tasks if not t['completed'])
+        for category, count in active.items():
+            if count > CATEGORY_LIMITS[category]:
+                self.problem(f"Limit violation ({where}): {count}/{CATEGORY_LIMITS[category]} active "
+                             f"{category} tasks")
+
+    def summary(self):
+        """Return the level's results as a JSON-serializable dict."""
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'statuses': {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': values[-1],
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            'concurrency': self.concurrency,
+            'seconds': self.elapsed,
+            'requests': total,
+            'throughput': total / self.elapsed if self.elapsed else 0.0,
+            'endpoints': endpoints,
+            'problems': self.problems,
+        }
+
+
+class Worker:
+    """One simulated client that keeps track of the tasks it owns.
+
+    Only the owner changes its tasks, so after each successful response it
+    knows exactly what the task must look like from then on.
+    """
+
+    def __init__(self, number, client, level, mix, shared_ids, rng):
+        self.number = number
+        self.client = client
+        self.level = level
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.shared_ids = shared_ids
+        self.rng = rng
+        # task id -> expected {'text', 'category', 'completed'}
+        self.owned = {}
+        self.deleted = set()
+        self.sequence = 0
+
+    async def request(self, endpoint, method, url, **kwargs):
+        """Send a request and record its latency under an endpoint name."""
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.level.record(endpoint, time.perf_counter() - start, response.status_code)
+        return response
+
+    async def run(self, deadline):
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            await getattr(self, operation)()
+
+    def pick(self, active=None):
+        """Pick one of the worker's tasks, optionally only active or completed ones."""
+        ids = [task_id for task_id, task in self.owned.items()
+               if active is None or task['completed'] != active]
+        return self.rng.choice(ids) if ids else None
+
+    async def get(self):
+        response = await self.request('GET /api/tasks', 'GET', '/api/tasks')
+        if response.status_code == 200:
+            self.level.check_limits(response.json(), 'during run')
+
+    async def create(self):
+        self.sequence += 1
+        text = f"Load {self.number}.{self.sequence}"
+        category = self.rng.choice(VALID_CATEGORIES)
+        response = await self.request('POST /api/tasks', 'POST', '/api/tasks',
+                                      json={'text': text, 'category': category})
+        if response.status_code == 200:
+            task = response.json()
+            self.owned[task['id']] = {'text': text, 'category': category, 'completed': False}
+
+    async def toggle(self):
+        if self.shared_ids and self.rng.random() < SHARED_TOGGLE_SHARE:
+            task_id = self.rng.choice(self.shared_ids)
+            response = await self.request('POST /api/tasks/{id}/toggle', 'POST',
+                                          f'/api/tasks/{task_id}/toggle')
+            if response.status_code == 200:
+                self.level.shared_toggles[task_id] += 1
+            return
+
+        # Only complete own tasks: re-activating one isn't limit-checked by
+        # the app, so it would show up as a limit violation
+        task_id = self.pick(active=True)
+        if task_id is None:
+            return await self.create()
+        response = await self.request('POST /api/tasks/{id}/toggle', 'POST', f'/api/tasks/{task_id}/toggle')
+        if response.status_code == 200:
+            self.owned[task_id]['completed'] = True
+        elif response.status_code == 404:
+            self.level.problem(f"Lost task: toggling {task_id} (worker {self.number}) gave 404")
+
+    async def update(self):
+        task_id = self.pick()
+        if task_id is None:
+            return await self.create()
+        self.sequence += 1
+        changes = {'text': f"Edited {self.number}.{self.sequence}"}
+        if self.rng.random() < MOVE_SHARE:
+            changes['category'] = self.rng.choice(VALID_CATEGORIES)
+        response = await self.request('PUT /api/tasks/{id}', 'PUT', f'/api/tasks/{task_id}', json=changes)
+        if response.status_code == 200:
+            self.owned[task_id].update(changes)
+        elif response.status_code == 404:
+            self.level.problem(f"Lost task: updating {task_id} (worker {self.number}) gave 404")
+
+    async def delete(self):
+        # Prefer completed tasks, as a user clearing up would
+        task_id = self.pick(active=False) or self.pick()
+        if task_id is None:
+            return await self.create()
+        response = await self.request('DELETE /api/tasks/{id}', 'DELETE', f'/api/tasks/{task_id}')
+        if response.status_code == 200:
+            del self.owned[task_id]
+            self.deleted.add(task_id)
+        elif response.status_code == 404:
+            self.level.problem(f"Lost task: deleting {task_id} (worker {self.number}) gave 404")
+
+    def verify(self, week_tasks):
+        """Compare the final week view with what this worker expects."""
+        for task_id, expected in self.owned.items():
+            task = week_tasks.get(task_id)
+            if task is None:
+                self.level.problem(f"Lost update: task {task_id} (worker {self.number}) is missing")
+                continue
+            actual = {key: task[key] for key in expected}
+            if actual != expected:
+                self.level.problem(f"Lost update: task {task_id} (worker {self.number}) is {actual}, "
+                                   f"expected {expected}")
+        for task_id in self.deleted & week_tasks.keys():
+            self.level.problem(f"Lost delete: task {task_id} (worker {self.number}) is back")
+
+
+async def run_level(webapp, client, concurrency, duration, mix, shared_ids, seed):
+    """Run one concurrency level on an emptied current week and check the outcome."""
+    level = Level(concurrency)
+    await client.delete('/api/tasks/delete-all')
+    shared_before = {task_id: (await webapp.async_store.get_task(task_id)).completed
+                     for task_id in shared_ids}
+
+    workers = [Worker(n, client, level, mix, shared_ids, random.Random(seed * 1000 + n))
+               for n in range(concurrency)]
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(worker.run(deadline) for worker in workers))
+    level.elapsed = time.perf_counter() - start
+
+    # Every response has been sent, so all acknowledged writes are saved
+    week = (await client.get('/api/tasks')).json()
+    level.check_limits(week, 'end of run')
+    week_tasks = {task['id']: task for task in week}
+    for worker in workers:
+        worker.verify(week_tasks)
+    owned = set().union(*(worker.owned for worker in workers))
+    for task_id in week_tasks.keys() - owned:
+        level.problem(f"Unexpected task {task_id} in the week")
+
+    for task_id, completed in shared_before.items():
+        expected = completed ^ (level.shared_toggles[task_id] % 2 == 1)
+        actual = (await webapp.async_store.get_task(task_id)).completed
+        if actual != expected:
+            level.problem(f"Lost update: shared task {task_id} toggled {level.shared_toggles[task_id]} "
+                          f"times but completed={actual}")
+    return level
+
+
+def print_level(summary):
+    """Print one level's throughput, latency table and problems."""
+    print(f"\nConcurrency {summary['concurrency']}: {summary['requests']:,} requests in "
+          f"{summary['seconds']:.1f}s = {summary['throughput']:,.0f} req/s")
+    print(f"  {'endpoint':<30} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for endpoint, stats in summary['endpoints'].items():
+        statuses = ' '.join(f"{code}:{n}" for code, n in stats['statuses'].items())
+        print(f"  {endpoint:<30} {stats['requests']:>8} {stats['p50'] * 1000:9.2f} {stats['p95'] * 1000:9.2f}"
+              f" {stats['p99'] * 1000:9.2f} {stats['max'] * 1000:9.2f}  {statuses}")
+    if summary['problems']:
+        print(f"  {len(summary['problems'])} problem(s):")
+        for message in summary['problems'][:20]:
+            print(f"    {message}")
+    else:
+        print("  [OK] No lost updates or limit violations")
+
+
+async def run(args, mix, path):
+    """Start the app against the prepared store and run every level."""
+    try:
+        import httpx
+    except ImportError:
+        print("Error: The load test needs httpx and the web dependencies (pip install -r requirements.txt)")
+        return None
+
+    # webapp builds its store at import time from the environment
+    os.environ['TODO_STORAGE'] = CONFIGS[args.backend][0]
+    os.environ['TODO_STORAGE_PATH'] = path
+    webapp = importlib.reload(sys.modules['webapp']) if 'webapp' in sys.modules \
+        else importlib.import_module('webapp')
+
+    past_week = (date.fromisoformat(get_week_start()) - timedelta(weeks=1)).isoformat()
+    shared = [Task(f"Shared {n}", CAT_PARKING_LOT, week_start=past_week) for n in range(SHARED_TASKS)]
+    webapp.store.add_tasks(shared)
+    shared_ids = [task.id for task in shared]
+
+    await webapp.warm_store()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=webapp.app), base_url='http://load')
+    summaries = []
+    try:
+        for n, concurrency in enumerate(args.concurrency):
+            level = await run_level(webapp, client, concurrency, args.duration, mix, shared_ids, args.seed + n)
+            summary = level.summary()
+            print_level(summary)
+            summaries.append(summary)
+    finally:
+        await client.aclose()
+        await webapp.flush_writes()
+        if hasattr(webapp.store, 'close'):
+            webapp.store.close()
+    return summaries
+
+
+def main():
+    """Parse arguments, run the load test and report."""
+    parser = argparse.ArgumentParser(description="Concurrent load test for the web API")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                        help='Concurrent clients per level (default: 1 8 32)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per level (default: 5)')
+    parser.add_argument('--backend', default='json+cache', choices=sorted(CONFIGS),
+                        help='Store configuration (default: json+cache)')
+    parser.add_argument('--tasks', type=int, default=10_000, help='Tasks in the history (default: 10000)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Operation weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_path = os.path.join(tmp, 'history.json')
+        write_history(history_path, make_history(args.tasks, seed=args.seed))
+        store, path = make_store(args.backend, tmp, history_path)
+        if hasattr(store, 'close'):
+            store.close()
+        print(f"Load test: {args.backend}, {args.tasks:,} tasks, {args.duration:g}s per level")
+        summaries = asyncio.run(run(args, args.mix, path))
+
+    if summaries is None:
+        sys.exit(1)
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'tasks': args.tasks,
+            'mix': args.mix,
+            'levels': summaries,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    if any(summary['problems'] for summary in summaries):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+"""Benchmark suite for the storage backends, the task model and the web API.
+
+For each history size a synthetic tasks.json is generated (see
+benchmarks.history) and every store method, Task.from_dict/to_dict and
+each webapp.py endpoint (through an in-process ASGI client) is measured:
+
+    seconds        median wall time over --repeats runs
+    peak_bytes     peak traced allocation of one extra run (tracemalloc)
+    bytes_written  bytes passed to write() by the process during one run
+                   (from /proc/self/io; None where that isn't available)
+
+Results are printed and saved as JSON. Pass --baseline with the file from
+an earlier commit to see the change for every measurement.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000 10000 100000] [--backends json sqlite]
+                               [--repeats 5] [--output results.json]
+                               [--baseline old.json] [--no-web]
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from benchmarks.history import make_history, write_history
+from storage import create_store
+from task import Task, CAT_PARKING_LOT, CAT_URGENT
+from week_utils import get_week_start
+
+# Store configurations: name -> (backend, cache)
+CONFIGS = {
+    'json': ('json', False),
+    'json+cache': ('json', True),
+    'journal': ('journal', True),
+    'sqlite': ('sqlite', False),
+    'sharded': ('sharded', True),
+}
+
+
+def written_bytes():
+    """Return the bytes this process has passed to write() so far, or None."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(func, setup=None, repeats=5):
+    """Time func and record its peak memory and bytes written.
+
+    Args:
+        func: Callable taking setup's result (or None)
+        setup: Untimed callable run before every call
+        repeats: Number of timed runs
+
+    Returns:
+        dict: seconds (median), runs, peak_bytes, bytes_written
+    """
+    times = []
+    written = None
+    for _ in range(repeats):
+        arg = setup() if setup else None
+        gc.collect()
+        before = written_bytes()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+        after = written_bytes()
+        if before is not None:
+            written = after - before
+
+    # One more run under tracemalloc, which slows code down too much to time
+    arg = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'seconds': statistics.median(times),
+        'runs': repeats,
+        'peak_bytes': peak,
+        'bytes_written': written,
+    }
+
+
+class Recorder:
+    """Collects measurements for one run of the suite."""
+
+    def __init__(self, repeats):
+        self.repeats = repeats
+        self.results = []
+
+    def run(self, size, group, name, func, setup=None, repeats=None):
+        """Measure func and print the result line."""
+        result = measure(func, setup, repeats or self.repeats)
+        result.update(size=size, group=group, name=name)
+        self.results.append(result)
+        written = result['bytes_written']
+        print(f"  {group:<12} {name:<42} {result['seconds'] * 1000:10.3f} ms"
+              f"  {result['peak_bytes'] / 1e6:9.2f} MB peak"
+              f"  {'-' if written is None else f'{written / 1e3:10.1f} kB'} written")
+
+
+def make_store(config, path_dir, history_path):
+    """Create a store for a configuration, loaded with the history file."""
+    backend, cache = CONFIGS[config]
+    if backend == 'sqlite':
+        path = os.path.join(path_dir, 'tasks.db')
+        store = create_store(backend, path)
+        store.import_json(history_path)
+    elif backend == 'sharded':
+        path = os.path.join(path_dir, 'tasks')
+        store = create_store(backend, path)
+        store.import_json(history_path)
+    else:
+        path = os.path.join(path_dir, 'tasks.json')
+        shutil.copy(history_path, path)
+        store = create_store(backend, path, cache=cache)
+    return store, path
+
+
+def bench_model(rec, size, records):
+    """Time Task.from_dict and Task.to_dict over the whole history."""
+    rec.run(size, 'model', f'Task.from_dict x{size}',
+            lambda _: [Task.from_dict(record) for record in records])
+    tasks = [Task.from_storage(record) for record in records]
+    rec.run(size, 'model', f'Task.to_dict x{size}',
+            lambda _: [task.to_dict() for task in tasks])
+
+
+def bench_store(rec, size, config, history_path, current_week):
+    """Time every store method on a copy of the history."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store, _ = make_store(config, tmp, history_path)
+        group = config
+        current_ids = [t.id for t in store.get_tasks_for_week(current_week)]
+        middle_id = size // 2
+        old_weeks = iter([(date.fromisoformat(current_week) - timedelta(weeks=n)).isoformat()
+                          for n in range(1, 1000)])
+        added = []
+
+        def add_one(_):
+            task = Task("Benchmark task", CAT_PARKING_LOT, week_start=old_week)
+            store.add_task(task)
+            added.append(task.id)
+
+        old_week = next(old_weeks)
+        rec.run(size, group, 'warm', lambda _: store.warm())
+        rec.run(size, group, 'load_tasks', lambda _: store.load_tasks())
+        rec.run(size, group, 'get_task (middle of history)', lambda _: store.get_task(middle_id))
+        rec.run(size, group, 'get_task (missing)', lambda _: store.get_task(size + 10_000))
+        rec.run(size, group, 'get_tasks_for_week', lambda _: store.get_tasks_for_week(current_week))
+        rec.run(size, group, 'iter_tasks (week, active)',
+                lambda _: list(store.iter_tasks(week_start=current_week, completed=False)))
+        rec.run(size, group, 'count_tasks (week)', lambda _: store.count_tasks(week_start=current_week))
+        rec.run(size, group, 'has_tasks (week)', lambda _: store.has_tasks(week_start=current_week))
+        rec.run(size, group, 'get_task_count_by_category',
+                lambda _: store.get_task_count_by_category(current_week, CAT_URGENT))
+        rec.run(size, group, 'get_version', lambda _: store.get_version())
+
+        rec.run(size, group, 'add_task', add_one)
+        rec.run(size, group, 'add_tasks (100)',
+                lambda _: store.add_tasks([Task(f"Bulk {i}", CAT_PARKING_LOT, week_start=old_week)
+                                           for i in range(100)]))
+        rec.run(size, group, 'update_task (text)',
+                lambda _: store.update_task(current_ids[0], text="Renamed"))
+        rec.run(size, group, 'toggle_task', lambda _: store.toggle_task(current_ids[-1]))
+        rec.run(size, group, 'delete_task', lambda task_id: store.delete_task(task_id),
+                setup=lambda: added.pop() if added else None)
+        rec.run(size, group, 'complete_week (old week)', lambda week: store.complete_week(week),
+                setup=lambda: next(old_weeks))
+        rec.run(size, group, 'delete_week (old week)', lambda week: store.delete_week(week),
+                setup=lambda: next(old_weeks))
+        rec.run(size, group, 'save_tasks (all)', lambda tasks: store.save_tasks(tasks),
+                setup=store.load_tasks)
+
+        if hasattr(store, 'close'):
+            store.close()
+
+
+def bench_web(rec, size, config, history_path):
+    """Time each webapp.py endpoint through an in-process ASGI client."""
+    try:
+        import httpx
+    except ImportError:
+        print("  (skipping endpoints: httpx and the web dependencies are not installed)")
+        return
+
+    backend, _ = CONFIGS[config]
+    group = f'web/{config}'
+    with tempfile.TemporaryDirectory() as tmp:
+        store, path = make_store(config, tmp, history_path)
+        if hasattr(store, 'close'):
+            store.close()
+
+        # webapp builds its store at import time from the environment
+        os.environ['TODO_STORAGE'] = backend
+        os.environ['TODO_STORAGE_PATH'] = path
+        webapp = importlib.reload(sys.modules['webapp']) if 'webapp' in sys.modules \
+            else importlib.import_module('webapp')
+
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=webapp.app),
+                                   base_url='http://bench')
+
+        def call(request):
+            # A failed request would be timed as if it had worked
+            response = loop.run_until_complete(request)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.method} {response.request.url.path}: "
+                                   f"{response.status_code} {response.text}")
+            return response
+
+        loop.run_until_complete(webapp.warm_store())
+        try:
+            state = {}
+
+            def fresh_task():
+                # Replace the task made for the previous run, keeping the week within limits
+                if 'id' in state:
+                    call(client.delete(f"/api/tasks/{state.pop('id')}"))
+                response = call(client.post('/api/tasks', json={'text': 'Bench', 'category': CAT_URGENT}))
+                state['id'] = response.json()['id']
+                return state['id']
+
+            def drop_task():
+                if 'id' in state:
+                    call(client.delete(f"/api/tasks/{state.pop('id')}"))
+
+            def create(_):
+                response = call(client.post('/api/tasks', json={'text': 'Bench', 'category': CAT_URGENT}))
+                state['id'] = response.json()['id']
+
+            etag = call(client.get('/api/tasks')).headers['etag']
+            rec.run(size, group, 'GET /api/tasks (cold)', lambda _: call(client.get('/api/tasks')),
+                    setup=webapp.week_views.clear)
+            rec.run(size, group, 'GET /api/tasks (cached)', lambda _: call(client.get('/api/tasks')))
+            rec.run(size, group, 'GET /api/tasks (304)',
+                    lambda _: call(client.get('/api/tasks', headers={'If-None-Match': etag})))
+            rec.run(size, group, 'POST /api/tasks', create, setup=drop_task)
+            rec.run(size, group, 'POST /api/tasks/{id}/toggle',
+                    lambda task_id: call(client.post(f'/api/tasks/{task_id}/toggle')), setup=fresh_task)
+            rec.run(size, group, 'PUT /api/tasks/{id}',
+                    lambda task_id: call(client.put(f'/api/tasks/{task_id}', json={'text': 'Renamed'})),
+                    setup=fresh_task)
+
+            def delete(task_id):
+                call(client.delete(f'/api/tasks/{task_id}'))
+                del state['id']
+
+            rec.run(size, group, 'DELETE /api/tasks/{id}', delete, setup=fresh_task)
+
+            def batch(_):
+                response = call(client.post('/api/tasks/batch', json={'operations': [
+                    {'op': 'add', 'text': 'Batch', 'category': CAT_PARKING_LOT},
+                    {'op': 'update', 'id': batch_target, 'text': 'Batched'},
+                ]}))
+                state['id'] = response.json()['results'][0]['id']
+
+            batch_target = fresh_task()
+            state.pop('id')
+            rec.run(size, group, 'POST /api/tasks/batch (add + update)', batch, setup=drop_task)
+            drop_task()
+
+            # These empty the current week, so they go last and run once
+            rec.run(size, group, 'POST /api/tasks/complete-all',
+                    lambda _: call(client.post('/api/tasks/complete-all')), repeats=1)
+            rec.run(size, group, 'DELETE /api/tasks/delete-all',
+                    lambda _: call(client.delete('/api/tasks/delete-all')), repeats=1)
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.run_until_complete(webapp.flush_writes())
+            loop.close()
+            if hasattr(webapp.store, 'close'):
+                webapp.store.close()
+
+
+def git_commit():
+    """Return the current git commit hash, or None outside a checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the change of every measurement against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['size'], r['group'], r['name']): r for r in baseline['results']}
+
+    print(f"\nChange against {baseline_path} ({baseline.get('commit') or 'unknown commit'}):")
+    for result in results:
+        old = previous.get((result['size'], result['group'], result['name']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = '  <-- slower' if ratio > 1.2 else ''
+        print(f"  {result['size']:>9,} {result['group']:<12} {result['name']:<42}"
+              f" {old['seconds'] * 1000:10.3f} -> {result['seconds'] * 1000:10.3f} ms"
+              f"  x{ratio:5.2f}{flag}")
+
+
+def main():
+    """Parse arguments, run the suite and save the results."""
+    parser = argparse.ArgumentParser(description="Benchmark storage, model and web endpoints")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='History sizes (default: 1000 10000 100000)')
+    parser.add_argument('--backends', nargs='+', default=['json', 'json+cache'], choices=sorted(CONFIGS),
+                        help='Store configurations (default: json json+cache)')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per measurement (default: 5)')
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help='Results file (default: benchmark-results.json)')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--no-web', action='store_true', help='Skip the endpoint benchmarks')
+    args = parser.parse_args()
+
+    current_week = get_week_start()
+    rec = Recorder(args.repeats)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            print(f"\n{size:,} tasks")
+            records = make_history(size, current_week=current_week)
+            history_path = os.path.join(tmp, f'history-{size}.json')
+            write_history(history_path, records)
+
+            bench_model(rec, size, records)
+            del records
+            for config in args.backends:
+                bench_store(rec, size, config, history_path, current_week)
+                if not args.no_web:
+                    bench_web(rec, size, config, history_path)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': args.repeats,
+        'results': rec.results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(rec.results)} results to {args.output}")
+
+    if args.baseline:
+        compare(rec.results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
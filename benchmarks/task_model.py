@@ -0,0 +1,110 @@
+"""Memory and time benchmark for building and serializing Task objects.
+
+Measures, for histories of 100k and 1M tasks:
+    - Task.from_dict (validating path)
+    - Task.from_storage (trusted path used by the storage backends)
+    - Task.to_dict
+    - Memory held after loading a tasks.json payload, as raw dicts versus
+      Task objects (tracemalloc)
+
+Usage:
+    python -m benchmarks.task_model [--sizes 100000 1000000]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from task import Task, VALID_CATEGORIES
+
+
+def make_records(count, weeks=260):
+    """Build raw task records spread over a number of weeks.
+
+    Args:
+        count: Number of records
+        weeks: Number of distinct weeks to spread them over
+
+    Returns:
+        list: Task dictionaries
+    """
+    first_monday = date(2020, 1, 6)
+    records = []
+    for i in range(count):
+        week = first_monday + timedelta(weeks=i % weeks)
+        records.append({
+            'id': i + 1,
+            'text': f"Task number {i}",
+            'category': VALID_CATEGORIES[i % len(VALID_CATEGORIES)],
+            'completed': i % 3 == 0,
+            'week_start': week.isoformat(),
+            'created_at': f"{week.isoformat()}T09:00:00.000000",
+        })
+    return records
+
+
+def time_call(label, func, records):
+    """Time func over all records and print the result."""
+    gc.collect()
+    start = time.perf_counter()
+    for record in records:
+        func(record)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f} s   {elapsed / len(records) * 1e6:6.2f} us/task")
+
+
+def memory_after_load(label, payload, build):
+    """Parse a tasks.json payload, build tasks and report the memory they hold.
+
+    The parsed JSON is dropped afterwards, as TaskStore does, so only what
+    build() keeps alive is counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(payload)
+    tasks = build(data['tasks'])
+    del data
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = len(tasks)
+    print(f"  {label:<28} {current / 1e6:8.1f} MB held   {current / count:6.0f} B/task"
+          f"   peak {peak / 1e6:8.1f} MB")
+    del tasks
+
+
+def run(sizes):
+    """Run the benchmark for each history size."""
+    for count in sizes:
+        print(f"\n{count:,} tasks")
+        records = make_records(count)
+
+        time_call("Task.from_dict", Task.from_dict, records)
+        time_call("Task.from_storage", Task.from_storage, records)
+        tasks = [Task.from_storage(record) for record in records]
+        time_call("Task.to_dict", Task.to_dict, tasks)
+        del tasks
+
+        payload = json.dumps({'tasks': records})
+        del records
+        memory_after_load("raw dicts", payload, lambda items: items)
+        memory_after_load("Task.from_storage", payload,
+                          lambda items: [Task.from_storage(item) for item in items])
+        del payload
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark Task construction and memory use")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='History sizes to benchmark (default: 100000 1000000)')
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""Feed of committed task changes for live web clients.
+
+Request handlers record per-task changes while their mutation runs on the
+store's writer thread. When the write batch has been saved, the recorded
+changes become one event tagged with the store's new data version (see
+TaskStore.get_version). Events are kept in a bounded log and pushed to
+every subscribed stream, so a client can resume from the last version it
+saw.
+
+Event formats:
+    {"version": 12, "changes": [{"op": "upsert", "task": {...}},
+                                {"op": "delete", "id": 3, "week_start": "2025-01-27"}]}
+    {"version": 15, "resync": true}
+
+A resync event means the tasks changed in a way the feed can't describe,
+e.g. an edit from the CLI or TUI, and clients should reload the week.
+
+changes_since() condenses the log into the net change per task since a
+version, which is what GET /api/changes serves to clients catching up
+without a stream.
+
+The feed also tracks, per week, the version of the last event touching it
+(see week_version), so views of one week can be cached until that week
+changes.
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+
+class ChangeFeed:
+    """Bounded log of change events with asyncio subscribers.
+
+    Acts as the storage.WriteQueue listener: begin(), commit() and abort()
+    are called on the writer thread around every batch. Subscribers live on
+    the event loop passed to start().
+    """
+
+    def __init__(self, maxlen=1000):
+        """Create an empty feed.
+
+        Args:
+            maxlen: Number of events kept for clients that resume
+        """
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=maxlen)
+        self._pending = []
+        self._writing = False
+        self._loop = None
+        self._subscribers = set()
+        # Every event after this version is still in the log
+        self._floor = 0
+        # Store version the feed is up to date with
+        self.version = 0
+        # week_start -> version of the last change event touching the week
+        self._week_versions = {}
+        # Version of the last change not tied to a week (startup, resync)
+        self._reset_version = 0
+
+    def start(self, loop, version):
+        """Bind the feed to an event loop and the store's current version.
+
+        Args:
+            loop: Event loop the subscribers run on
+            version: Current data version of the store
+        """
+        with self._lock:
+            self._loop = loop
+            self._floor = self.version = self._reset_version = version
+
+    def _append(self, event):
+        """Log an event and hand it to the subscribers (lock held)."""
+        if len(self._events) == self._events.maxlen:
+            self._floor = self._events[0]['version']
+        self._events.append(event)
+        self.version = event['version']
+        if event.get('resync'):
+            self._reset_version = self.version
+        else:
+            for change in event['changes']:
+                week = change['task']['week_start'] if change['op'] == 'upsert' else change['week_start']
+                self._week_versions[week] = self.version
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event):
+        """Queue an event for every subscriber (event loop)."""
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def begin(self, store):
+        """Start collecting changes for a write batch.
+
+        If the store moved on since the last event, something outside this
+        feed changed it; clients are told to resync first.
+        """
+        version = store.get_version()
+        with self._lock:
+            self._writing = True
+            self._pending = []
+            if version > self.version:
+                self._append({'version': version, 'resync': True})
+
+    def task_changed(self, task):
+        """Record that a task was added or modified (writer thread).
+
+        Args:
+            task: The task as it is after the change
+        """
+        with self._lock:
+            self._pending.append({'op': 'upsert', 'task': task.to_dict()})
+
+    def task_deleted(self, task):
+        """Record that a task was deleted (writer thread).
+
+        Args:
+            task: The deleted task
+        """
+        with self._lock:
+            self._pending.append({'op': 'delete', 'id': task.id, 'week_start': task.week_start})
+
+    def commit(self, store):
+        """Publish the changes of a batch that was saved."""
+        version = store.get_version()
+        with self._lock:
+            changes, self._pending = self._pending, []
+            self._writing = False
+            if changes:
+                self._append({'version': version, 'changes': changes})
+            elif version > self.version:
+                # Changed without recording what, so describe it as a resync
+                self._append({'version': version, 'resync': True})
+
+    def abort(self, store):
+        """Drop the changes of a batch that failed to save."""
+        with self._lock:
+            self._pending = []
+            self._writing = False
+
+    def check_version(self, version):
+        """Announce a resync if the store changed outside any write batch.
+
+        Args:
+            version: Data version just read from the store
+        """
+        with self._lock:
+            # While a batch is open its own commit will account for the version
+            if not self._writing and version > self.version:
+                self._append({'version': version, 'resync': True})
+
+    def week_version(self, week_start):
+        """Return the version as of which a week's tasks last changed.
+
+        Unchanged while only other weeks change; moves on for every resync,
+        since those may have touched any week.
+
+        Args:
+            week_start: ISO date string for Monday of the week
+
+        Returns:
+            int: Version of the week's last known change
+        """
+        with self._lock:
+            return max(self._week_versions.get(week_start, 0), self._reset_version)
+
+    def since(self, version):
+        """Return the events after a version.
+
+        Args:
+            version: Last version the client has seen
+
+        Returns:
+            list: Events newer than version, oldest first, or None if the
+            log no longer reaches back that far (the client must resync)
+        """
+        with self._lock:
+            if version < self._floor or version > self.version:
+                return None
+            return [event for event in self._events if event['version'] > version]
+
+    def changes_since(self, version):
+        """Return the net change to each task touched after a version.
+
+        Several events touching one task collapse into its last change, so
+        the result grows with the number of tasks changed rather than the
+        number of writes.
+
+        Args:
+            version: Last version the client has seen
+
+        Returns:
+            tuple: (current version, changes in the event "changes" format,
+            ordered by their last change), or None if the client must
+            resync: the log doesn't reach back that far, or a resync event
+            came after version
+        """
+        with self._lock:
+            current = self.version
+            if version < self._floor or version > current:
+                return None
+            events = [event for event in self._events if event['version'] > version]
+
+        latest = {}
+        for event in events:
+            if event.get('resync'):
+                return None
+            for change in event['changes']:
+                task_id = change['task']['id'] if change['op'] == 'upsert' else change['id']
+                # Re-insert so the dict stays ordered by each task's last change
+                latest.pop(task_id, None)
+                latest[task_id] = change
+        return current, list(latest.values())
+
+    def subscribe(self):
+        """Register a subscriber (event loop).
+
+        Returns:
+            asyncio.Queue: Receives every new event, then None when the feed closes
+        """
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        """Remove a subscriber registered with subscribe()."""
+        self._subscribers.discard(queue)
+
+    def close(self):
+        """End all subscriber streams (event loop)."""
+        for queue in self._subscribers:
+            queue.put_nowait(None)
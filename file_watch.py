@@ -0,0 +1,200 @@
+"""Notice changes to the task store made by other processes.
+
+A StoreWatcher runs a background thread that calls back when the storage
+file (or one of the files next to it that the backends write, such as
+tasks.json.journal or tasks.db-wal) changes:
+
+    watcher = StoreWatcher(store.filepath, on_change)
+    watcher.start()
+    ...
+    watcher.stop()
+
+On Linux it uses inotify on the file's directory, so nothing runs while
+the file is left alone. Elsewhere (or if inotify can't be set up) it
+stat()s the files every POLL_INTERVAL seconds.
+
+Changes are debounced: a burst of writes (write temp file, rename, append
+to the journal) results in one callback once the files have been quiet for
+DEBOUNCE seconds. The callback runs on the watcher thread. It only means
+the files were touched; compare the store's get_version() to find out
+whether the tasks actually changed.
+"""
+
+import os
+import select
+import struct
+import threading
+
+# Seconds without further changes before the callback runs
+DEBOUNCE = 0.1
+# Seconds between stat() checks when inotify isn't available
+POLL_INTERVAL = 1.0
+
+# Suffixes of the files the backends write next to the storage file
+SIBLING_SUFFIXES = ('', '.journal', '-wal', '.tmp')
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# struct inotify_event header: wd, mask, cookie, name length
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _open_inotify(directory):
+    """Start watching a directory with inotify.
+
+    Args:
+        directory: Directory to watch
+
+    Returns:
+        int: The inotify file descriptor, or None if inotify is unavailable
+    """
+    if not hasattr(os, 'O_NONBLOCK') or not os.path.isdir(directory):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    if add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class StoreWatcher:
+    """Calls back after the files of a task store change."""
+
+    def __init__(self, filepath, callback, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL,
+                 use_inotify=True):
+        """Prepare a watcher (call start() to begin watching).
+
+        Args:
+            filepath: The store's storage file (for the sharded backend, its
+                manifest, which is rewritten on every change)
+            callback: Called with no arguments on the watcher thread
+            debounce: Seconds of quiet before calling back
+            poll_interval: Seconds between checks when polling
+            use_inotify: Set to False to always poll
+        """
+        self.filepath = os.path.abspath(filepath)
+        self.directory = os.path.dirname(self.filepath)
+        self.prefix = os.path.basename(self.filepath)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        # 'inotify' or 'poll' once started
+        self.method = None
+        self._stop = threading.Event()
+        self._wake_read = self._wake_write = None
+        self._thread = None
+
+    def start(self):
+        """Start the watcher thread."""
+        fd = _open_inotify(self.directory) if self.use_inotify else None
+        self.method = 'poll' if fd is None else 'inotify'
+        if fd is None:
+            target, args = self._poll, ()
+        else:
+            # stop() writes to this pipe to wake the select() in _watch
+            self._wake_read, self._wake_write = os.pipe()
+            target, args = self._watch, (fd,)
+        self._thread = threading.Thread(target=target, args=args, name='store-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread and wait for it to finish."""
+        self._stop.set()
+        if self._wake_write is not None:
+            os.write(self._wake_write, b'x')
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._wake_read, self._wake_write):
+            if fd is not None:
+                os.close(fd)
+        self._wake_read = self._wake_write = None
+
+    def _notify(self):
+        """Run the callback, keeping the thread alive if it fails."""
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"Warning: store change callback failed - {e}")
+
+    def _relevant(self, data):
+        """Return True if a buffer of inotify events touches the store's files."""
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if os.fsdecode(name).startswith(self.prefix):
+                return True
+        return False
+
+    def _watch(self, fd):
+        """Thread body for inotify: wait for events, then for quiet."""
+        try:
+            pending = False
+            while not self._stop.is_set():
+                # Block until something happens, or until the debounce
+                # period has passed quietly after a change
+                timeout = self.debounce if pending else None
+                ready, _, _ = select.select([fd, self._wake_read], [], [], timeout)
+                if self._wake_read in ready:
+                    break
+                if fd in ready:
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    pending = self._relevant(data) or pending
+                elif pending:
+                    pending = False
+                    self._notify()
+        finally:
+            os.close(fd)
+
+    def _signature(self):
+        """Return the size and mtime of the store's files (None if missing)."""
+        signature = []
+        for suffix in SIBLING_SUFFIXES:
+            try:
+                st = os.stat(self.filepath + suffix)
+            except OSError:
+                signature.append(None)
+            else:
+                signature.append((st.st_size, st.st_mtime_ns, st.st_ino))
+        return signature
+
+    def _poll(self):
+        """Thread body without inotify: compare stat() results periodically."""
+        last = self._signature()
+        while not self._stop.wait(self.poll_interval):
+            current = self._signature()
+            if current == last:
+                continue
+            # Wait until the writer is done before calling back
+            while not self._stop.wait(self.debounce):
+                settled = self._signature()
+                if settled == current:
+                    break
+                current = settled
+            last = current
+            if not self._stop.is_set():
+                self._notify()
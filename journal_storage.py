@@ -0,0 +1,380 @@
+"""Append-only journal storage backend.
+
+Mutations are appended as one JSON record per line to a journal file next
+to the snapshot (tasks.json.journal) instead of rewriting the whole history.
+The journal is folded into the snapshot once it holds compact_every records,
+which keeps startup replay bounded.
+
+Record formats:
+    {"op": "add", "task": {...}}
+    {"op": "toggle", "id": 3, "completed": true}
+    {"op": "update", "id": 3, "fields": {"text": "...", "category": "..."}}
+    {"op": "delete", "id": 3}
+
+Records carry resulting values rather than deltas, so replaying a record
+twice (e.g. after a crash between snapshot write and journal truncation)
+gives the same state.
+
+Every record counts as one change: the data version (see
+TaskStore.get_version) is the snapshot's version plus the number of
+records in the journal.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import tracing
+from storage import TaskStore, _count_task
+from task import Task, VALID_CATEGORIES
+
+
+class JournalTaskStore(TaskStore):
+    """TaskStore that journals individual mutations and compacts periodically.
+
+    The snapshot file uses the same {"tasks": [...]} format as TaskStore, so
+    an existing tasks.json can be used directly. Parsed tasks are always kept
+    in memory; the cache is keyed on both the snapshot and the journal file.
+    """
+
+    # Metadata of a store without files (see TaskStore._read_tasks)
+    _EMPTY_META = {**TaskStore._EMPTY_META, 'journal_records': 0, 'journal_torn': False}
+
+    def __init__(self, filepath='tasks.json', compact_every=1000):
+        """Initialize journaled storage.
+
+        Args:
+            filepath: Path to the JSON snapshot file
+            compact_every: Number of journal records before compaction
+        """
+        super().__init__(filepath, cache=True)
+        self.journal_path = filepath + '.journal'
+        self.compact_every = compact_every
+        self._journal_records = 0
+        self._journal_torn = False
+        # Records waiting to be written while a batch() is open
+        self._pending = None
+        # (tasks, active counts) with the pending records applied, or None
+        self._working = None
+
+    def _stat_key(self):
+        """Return a key covering both the snapshot and the journal."""
+        try:
+            st = os.stat(self.journal_path)
+            journal_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            journal_key = None
+        snapshot_key = super()._stat_key()
+        if snapshot_key is None and journal_key is None:
+            return None
+        return (snapshot_key, journal_key)
+
+    def _read_file(self):
+        """Read the snapshot and replay the journal on top of it.
+
+        Returns:
+            tuple: (list of Task objects, metadata dict), where the metadata
+                also holds the journal's record count and whether it is torn
+        """
+        tasks, meta = super()._read_file()
+        by_id = {task.id: task for task in tasks}
+
+        meta.update(journal_records=0, journal_torn=False)
+        start = time.perf_counter()
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write from a crash; everything after it is unusable
+                        print(f"Warning: {self.journal_path} has an incomplete record, ignoring the rest")
+                        meta['journal_torn'] = True
+                        break
+                    self._apply(by_id, record)
+                    if record['op'] == 'add':
+                        meta['next_id'] = max(meta['next_id'], record['task']['id'] + 1)
+                    meta['journal_records'] += 1
+                    meta['version'] += 1
+                # Part of the same load as the snapshot
+                self.stats.record_load(time.perf_counter() - start, os.fstat(f.fileno()).st_size, count=0)
+        except FileNotFoundError:
+            pass
+
+        return list(by_id.values()), meta
+
+    def _adopt(self, meta):
+        """Take over the sequence, version and journal state of a read (lock held)."""
+        super()._adopt(meta)
+        self._journal_records = meta['journal_records']
+        self._journal_torn = meta['journal_torn']
+
+    @staticmethod
+    def _apply(by_id, record):
+        """Apply one journal record to a dict of tasks keyed by ID."""
+        op = record['op']
+        if op == 'add':
+            task = Task.from_storage(record['task'])
+            by_id[task.id] = task
+        elif op == 'toggle':
+            task = by_id.get(record['id'])
+            if task is not None:
+                task.completed = record['completed']
+        elif op == 'update':
+            task = by_id.get(record['id'])
+            if task is not None:
+                for field, value in record['fields'].items():
+                    setattr(task, field, value)
+        elif op == 'delete':
+            by_id.pop(record['id'], None)
+
+    def _append(self, *records):
+        """Apply records to the batch's working tasks and queue them for the journal.
+
+        Touched tasks are copied before a record changes them, and the
+        active counts are adjusted record by record. The cache is left
+        alone: the working tasks replace it only once the records are
+        durably written, when the enclosing batch() exits (outside a batch
+        that is immediately).
+        """
+        with self.batch():
+            if self._working is None:
+                tasks = self._cached_tasks()
+                self._working = (tasks, dict(super()._active_counts(tasks)))
+            tasks, counts = self._working
+            by_id = {task.id: task for task in tasks}
+            for record in records:
+                task_id = record['task']['id'] if record['op'] == 'add' else record['id']
+                if task_id in by_id:
+                    _count_task(counts, by_id[task_id], -1)
+                    # Cached Task objects are shared with readers
+                    by_id[task_id] = by_id[task_id].copy()
+                self._apply(by_id, record)
+                if task_id in by_id:
+                    _count_task(counts, by_id[task_id], 1)
+            self._working = (list(by_id.values()), counts)
+            self._pending.extend(records)
+
+    def _current_tasks(self):
+        """Return the cached tasks, including records not yet written.
+
+        The batch owner sees its working tasks; everyone else the cache,
+        which holds committed records only.
+        """
+        if self._working is not None and self._batch_owner == threading.get_ident():
+            return self._working[0]
+        return self._cached_tasks()
+
+    def _active_counts(self, tasks):
+        """Return the active counts, using the batch's own for its working tasks."""
+        if self._working is not None and tasks is self._working[0]:
+            return self._working[1]
+        return super()._active_counts(tasks)
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single journal write and fsync.
+
+        Records from all mutations in the block are appended with one write
+        when the outermost block exits, and only then become visible to
+        other threads. If the block raises, nothing is written.
+
+        Yields:
+            JournalTaskStore: This store
+        """
+        with self._lock:
+            if self._pending is not None:
+                yield self
+                return
+
+            self._pending = []
+            self._working = None
+            self._batch_owner = threading.get_ident()
+            try:
+                yield self
+                pending, working = self._pending, self._working
+            finally:
+                self._pending = None
+                self._working = None
+                self._batch_owner = None
+            if pending:
+                self._write_records(pending, *working)
+
+    def _write_records(self, records, tasks, counts):
+        """Durably append records to the journal, then put tasks in the cache.
+
+        Compacts instead if the journal ends in a torn record, and afterwards
+        once the journal has grown past compact_every records.
+
+        Args:
+            records: Journal records to append
+            tasks: The tasks with the records applied
+            counts: Their active counts
+        """
+        if self._journal_torn:
+            # Rewrite the snapshot so the torn tail is dropped
+            self.save_tasks(tasks)
+            return
+
+        data = ''.join(json.dumps(record) + '\n' for record in records)
+        expected_key = self._stat_key()
+        start = time.perf_counter()
+        with tracing.span("JournalTaskStore.write", path=self.journal_path, records=len(records)):
+            try:
+                with open(self.journal_path, 'a') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except IOError:
+                print(f"Error: Cannot write to {self.journal_path} - check permissions")
+                # Part of the data may have made it into the journal
+                self.invalidate_cache()
+                raise
+        self.stats.record_save(time.perf_counter() - start, len(data.encode('utf-8')))
+
+        # If someone else appended in between, tasks are missing their
+        # records, so re-read next time instead.
+        self._journal_records += len(records)
+        new_key = self._stat_key()
+        journal_size = expected_key[1][1] if expected_key and expected_key[1] else 0
+        if new_key[1] is not None and new_key[1][1] == journal_size + len(data.encode()):
+            self._cache_tasks = tasks
+            self._cache_counts = (tasks, counts)
+            self._cache_key = new_key
+            self._version += len(records)
+        else:
+            self.invalidate_cache()
+
+        if self._journal_records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into the snapshot and truncate the journal."""
+        self.save_tasks(self._current_tasks())
+
+    @tracing.traced("JournalTaskStore.save_tasks")
+    def save_tasks(self, tasks):
+        """Write a full snapshot and clear the journal.
+
+        Inside a batch() this happens immediately and supersedes any
+        records queued so far.
+
+        Args:
+            tasks: List of Task objects to save
+        """
+        tasks = list(tasks)
+        if self._pending:
+            self._pending.clear()
+        # Later records in the batch start from the snapshot
+        self._working = None
+        super().save_tasks(tasks)
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._journal_records = 0
+        self._journal_torn = False
+        self._update_cache(tasks)
+
+    def add_task(self, task):
+        """Add a new task by appending an add record.
+
+        Args:
+            task: Task object to add (ID is assigned from the sequence)
+        """
+        self.add_tasks([task])
+
+    def add_tasks(self, new_tasks):
+        """Add several tasks with one journal write.
+
+        Reserves a block of IDs from the sequence in one step. The
+        sequence is persisted through the IDs in the add records and the
+        next_id of the snapshot.
+
+        Args:
+            new_tasks: List of Task objects to add
+        """
+        with self.batch():
+            self._current_tasks()  # make sure the sequence is current
+            first_id = self._next_id
+            self._next_id += len(new_tasks)
+            for offset, task in enumerate(new_tasks):
+                task.id = first_id + offset
+            self._append(*({'op': 'add', 'task': task.to_dict()} for task in new_tasks))
+
+    def update_task(self, task_id, text=None, category=None, completed=None):
+        """Change fields of an existing task by appending an update record.
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+
+        Raises:
+            ValueError: If category is not valid
+        """
+        if category is not None and category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}")
+        with self.batch():
+            if self.get_task(task_id) is None:
+                return None
+
+            fields = {}
+            if text is not None:
+                fields['text'] = text
+            if category is not None:
+                fields['category'] = category
+            if completed is not None:
+                fields['completed'] = completed
+            if fields:
+                self._append({'op': 'update', 'id': task_id, 'fields': fields})
+            return self.get_task(task_id)
+
+    def toggle_task(self, task_id):
+        """Flip the completion status of a task by appending a toggle record.
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+        """
+        with self.batch():
+            task = self.get_task(task_id)
+            if task is None:
+                return None
+            self._append({'op': 'toggle', 'id': task_id, 'completed': not task.completed})
+            return self.get_task(task_id)
+
+    def delete_task(self, task_id):
+        """Remove a task by appending a delete record.
+
+        Returns:
+            Task: The deleted task, or None if no task has that ID
+        """
+        with self.batch():
+            task = self.get_task(task_id)
+            if task is None:
+                return None
+            self._append({'op': 'delete', 'id': task_id})
+            return task
+
+    def complete_week(self, week_start):
+        """Mark all active tasks in a week as completed with toggle records.
+
+        Returns:
+            int: Number of tasks that were completed
+        """
+        with self.batch():
+            ids = [t.id for t in self._current_tasks()
+                   if t.week_start == week_start and not t.completed]
+            self._append(*({'op': 'toggle', 'id': task_id, 'completed': True} for task_id in ids))
+            return len(ids)
+
+    def delete_week(self, week_start):
+        """Delete all tasks in a week with delete records.
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        with self.batch():
+            ids = [t.id for t in self._current_tasks() if t.week_start == week_start]
+            self._append(*({'op': 'delete', 'id': task_id} for task_id in ids))
+            return len(ids)
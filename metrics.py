@@ -0,0 +1,243 @@
+"""Request metrics and Server-Timing for the web app.
+
+MetricsMiddleware counts requests and records their latency per route
+(the route's path template, so /api/tasks/{task_id} is one series), and
+adds a Server-Timing header to every response. Handlers break their time
+into phases with current_timing():
+
+    timing = current_timing()
+    with timing.phase("storage-load"):
+        tasks = store.get_tasks_for_week(week_start)
+
+The phases show up in the browser's network panel next to the total, e.g.
+    Server-Timing: storage-load;dur=0.412, serialize;dur=0.118, total;dur=1.203
+
+render_* functions produce the Prometheus text exposition format served at
+/metrics; no client library is needed.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_timing = ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """Named phase durations of one request, in the order first seen.
+
+    Phases may be recorded from the worker threads a request hands work to,
+    as long as the request waits for them before its response starts.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, name, seconds):
+        """Add time to a phase (several calls for one phase accumulate)."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time the block as part of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def header(self, total=None):
+        """Return the Server-Timing header value (durations in milliseconds).
+
+        Args:
+            total: Whole request duration in seconds, appended as "total"
+        """
+        phases = list(self.phases.items())
+        if total is not None:
+            phases.append(("total", total))
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in phases)
+
+
+def current_timing():
+    """Return the ServerTiming of the request being handled.
+
+    Outside a request (or without the middleware) this is a throwaway
+    instance, so handlers can record phases unconditionally.
+    """
+    timing = _current_timing.get()
+    return timing if timing is not None else ServerTiming()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    """Request counts and latency histograms per route.
+
+    Only updated from the event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        # (method, route, status) -> number of requests
+        self.requests = {}
+        # (method, route) -> Histogram
+        self.latency = {}
+
+    def observe(self, method, route, status, seconds):
+        """Record one finished request."""
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram()
+        histogram.observe(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording RequestMetrics and adding Server-Timing.
+
+    Latency is measured until the response starts, so a streaming response
+    (such as /api/events) counts the time to its first byte.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        token = _current_timing.set(timing)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header(elapsed).encode("latin-1")))
+                message = {**message, "headers": headers}
+                # The router stores the matched route in the scope; unmatched
+                # paths share one series so scanners can't add new ones
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "other"
+                self.metrics.observe(scope["method"], path, message["status"], elapsed)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
+
+
+def _labels(**labels):
+    """Format a Prometheus label set, escaping the values."""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value):
+    """Format a sample value the way Prometheus expects."""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_requests(metrics):
+    """Return the exposition lines for a RequestMetrics."""
+    lines = [
+        "# HELP todo_http_requests_total HTTP requests by route and status.",
+        "# TYPE todo_http_requests_total counter",
+    ]
+    for (method, route, status), count in sorted(metrics.requests.items()):
+        lines.append(f"todo_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += [
+        "# HELP todo_http_request_duration_seconds Time until the response starts.",
+        "# TYPE todo_http_request_duration_seconds histogram",
+    ]
+    for (method, route), histogram in sorted(metrics.latency.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append("todo_http_request_duration_seconds_bucket"
+                         f"{_labels(method=method, route=route, le=_number(bound))} {cumulative}")
+        lines.append("todo_http_request_duration_seconds_bucket"
+                     f"{_labels(method=method, route=route, le='+Inf')} {histogram.count}")
+        lines.append(f"todo_http_request_duration_seconds_sum{_labels(method=method, route=route)} "
+                     f"{_number(histogram.sum)}")
+        lines.append(f"todo_http_request_duration_seconds_count{_labels(method=method, route=route)} "
+                     f"{histogram.count}")
+    return lines
+
+
+# storage.StoreStats field -> (metric name, help text)
+STORE_METRICS = {
+    "loads": ("todo_store_loads_total", "Reads of stored tasks."),
+    "load_seconds": ("todo_store_load_seconds_total", "Time spent reading stored tasks."),
+    "bytes_read": ("todo_store_read_bytes_total", "Bytes read from the task files."),
+    "saves": ("todo_store_saves_total", "Writes of stored tasks."),
+    "save_seconds": ("todo_store_save_seconds_total", "Time spent writing stored tasks."),
+    "bytes_written": ("todo_store_written_bytes_total", "Bytes written to the task files."),
+}
+
+
+def render_store(stats, store_name):
+    """Return the exposition lines for a storage.StoreStats snapshot.
+
+    Args:
+        stats: StoreStats.snapshot() of the store
+        store_name: Value of the "store" label, e.g. the store's class name
+    """
+    lines = []
+    for field, (name, help_text) in STORE_METRICS.items():
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} counter",
+            f"{name}{_labels(store=store_name)} {_number(stats[field])}",
+        ]
+    return lines
+
+
+def render_tasks(active_counts, version):
+    """Return the exposition lines for task counts and the data version.
+
+    Args:
+        active_counts: (week_start, category) -> active tasks, as returned
+            by the stores' get_active_counts()
+        version: The store's data version
+    """
+    lines = [
+        "# HELP todo_active_tasks Active (not completed) tasks by week and category.",
+        "# TYPE todo_active_tasks gauge",
+    ]
+    for (week_start, category), count in sorted(active_counts.items()):
+        lines.append(f"todo_active_tasks{_labels(week_start=week_start, category=category)} {count}")
+    lines += [
+        "# HELP todo_data_version Data version of the task store.",
+        "# TYPE todo_data_version gauge",
+        f"todo_data_version {version}",
+    ]
+    return lines
@@ -0,0 +1,97 @@
+"""Sampling profiler for a running process.
+
+A background thread looks at the stack of every other thread at a fixed
+interval (sys._current_frames) and counts how often each stack is seen.
+Nothing is installed in the profiled threads, so it is safe to run against
+a live server, and the cost is limited to the sampling thread itself.
+
+The result is in the collapsed-stack format used by flame graph tools
+(flamegraph.pl, speedscope, inferno): one line per distinct stack, frames
+from the outermost call inward separated by semicolons, then the number of
+samples.
+
+    thread task-writer;threading.py:_bootstrap;...;storage.py:_save 42
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Seconds between samples
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(frame):
+    """Return 'file.py:function' for a frame."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL):
+    """Sample the stacks of all other threads for a while.
+
+    Blocks the calling thread for the given time.
+
+    Args:
+        seconds: How long to sample
+        interval: Seconds between samples
+
+    Returns:
+        tuple: (Counter of collapsed stack -> samples, number of sampling rounds)
+    """
+    own_id = threading.get_ident()
+    stacks = Counter()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(f"thread {names.get(thread_id, thread_id)}")
+            stacks[";".join(reversed(labels))] += 1
+        rounds += 1
+        time.sleep(interval)
+    return stacks, rounds
+
+
+def format_collapsed(stacks):
+    """Format sampled stacks as collapsed-stack text, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def format_top(stacks, rounds, limit=30):
+    """Summarize sampled stacks as the functions seen most often.
+
+    For each function, "self" counts samples where it was running and
+    "total" samples where it was anywhere on the stack.
+
+    Args:
+        stacks: Counter returned by sample_stacks
+        rounds: Number of sampling rounds
+        limit: Number of functions to list
+
+    Returns:
+        str: Plain-text table
+    """
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for label in set(frames):
+            total[label] += count
+
+    lines = [f"{rounds} sampling rounds, {sum(stacks.values())} thread samples",
+             f"{'self':>7} {'total':>7}  function"]
+    for label, count in total.most_common(limit):
+        lines.append(f"{own[label]:>7} {count:>7}  {label}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,499 @@
+"""Per-week sharded JSON storage.
+
+Each week's tasks live in their own file inside a directory, next to a
+small manifest holding the global ID counter and data version:
+
+    tasks/
+        manifest.json            {"version": 7, "next_id": 42}
+        week-2025-01-27.json     {"tasks": [...]}
+        week-2025-02-03.json     {"tasks": [...]}
+
+Current-week views, limit checks and bulk week operations only read and
+write one week's file, however long the history is.
+
+Split an existing monolithic file with:
+    python sharded_storage.py tasks.json tasks
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import tracing
+from storage import TaskStore, write_json_atomic
+from task import Task, VALID_CATEGORIES
+from week_utils import get_week_start
+
+MANIFEST_NAME = 'manifest.json'
+SHARD_PREFIX = 'week-'
+SHARD_SUFFIX = '.json'
+
+
+def _file_key(path):
+    """Return (mtime_ns, size, inode) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ShardedTaskStore(TaskStore):
+    """TaskStore that keeps one JSON file per week_start.
+
+    Each shard is cached in memory and only re-read when its file changes.
+    Lookups by ID check the current week first and then older weeks, since
+    almost all edits target the current week.
+    """
+
+    def __init__(self, dirpath='tasks'):
+        """Initialize sharded storage.
+
+        Args:
+            dirpath: Directory holding the manifest and week files
+        """
+        super().__init__(os.path.join(dirpath, MANIFEST_NAME), cache=True)
+        self.dirpath = dirpath
+        # week_start -> (stat key, tasks) for shards read from disk
+        self._shards = {}
+        # (stat key, contents) of the manifest as last read
+        self._manifest = None
+        # (manifest stat key, next ID checked against newer shards)
+        self._checked_next_id = None
+        # Open batch state: working copies of touched shards and the counter
+        self._working = None
+        self._next_id = None
+        self._manifest_dirty = False
+
+    def _shard_path(self, week_start):
+        """Return the file path for a week's shard."""
+        return os.path.join(self.dirpath, f"{SHARD_PREFIX}{week_start}{SHARD_SUFFIX}")
+
+    def _weeks(self):
+        """Return the week_start of every shard on disk, newest first."""
+        try:
+            names = os.listdir(self.dirpath)
+        except FileNotFoundError:
+            names = []
+        weeks = {name[len(SHARD_PREFIX):-len(SHARD_SUFFIX)] for name in names
+                 if name.startswith(SHARD_PREFIX) and name.endswith(SHARD_SUFFIX)}
+        if self._in_batch():
+            weeks.update(self._working)
+        return sorted(weeks, reverse=True)
+
+    def _in_batch(self):
+        """Return True if the calling thread has a batch() open."""
+        return self._working is not None and self._batch_owner == threading.get_ident()
+
+    def _read_shard(self, week_start):
+        """Return a week's tasks from the cache, re-reading the file if it changed.
+
+        The returned list is shared with the cache and must not be modified.
+        """
+        path = self._shard_path(week_start)
+        key = _file_key(path)
+        if key is None:
+            self._shards.pop(week_start, None)
+            return []
+
+        cached = self._shards.get(week_start)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        start = time.perf_counter()
+        try:
+            with tracing.span("ShardedTaskStore.read", path=path):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                tasks = [Task.from_storage(task_data) for task_data in data.get('tasks', [])]
+            self.stats.record_load(time.perf_counter() - start, key[1])
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            print(f"Error: {path} is corrupted")
+            tasks = []
+        self._shards[week_start] = (key, tasks)
+        return tasks
+
+    def _shard(self, week_start):
+        """Return a week's current tasks without copying (read-only)."""
+        if self._in_batch() and week_start in self._working:
+            return self._working[week_start]
+        return self._read_shard(week_start)
+
+    def _edit_shard(self, week_start):
+        """Return a modifiable working copy of a week's tasks (batch only)."""
+        if week_start not in self._working:
+            self._working[week_start] = [task.copy() for task in self._read_shard(week_start)]
+        return self._working[week_start]
+
+    def _read_manifest(self):
+        """Return the manifest contents, re-reading the file only if it changed."""
+        key = self._stat_key()
+        if self._manifest is None or self._manifest[0] != key:
+            try:
+                with open(self.filepath, 'r') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = {}
+            self._manifest = (key, data)
+        return self._manifest[1]
+
+    def _read_next_id(self):
+        """Read the ID counter from the manifest.
+
+        Falls back to scanning the shards if the manifest is missing, e.g.
+        for a directory that was populated by hand. Shards at least as new
+        as the manifest are checked too: a crash after writing a shard but
+        before the manifest leaves IDs in it that the counter doesn't cover.
+        The result is remembered until the manifest changes.
+        """
+        manifest = self._read_manifest()
+        key = self._manifest[0]
+        if self._checked_next_id is not None and self._checked_next_id[0] == key:
+            return self._checked_next_id[1]
+        next_id = manifest.get('next_id')
+        if next_id is None:
+            ids = [t.id for week in self._weeks() for t in self._read_shard(week)]
+            next_id = max(ids, default=0) + 1
+        else:
+            for week in self._weeks():
+                shard_key = _file_key(self._shard_path(week))
+                if shard_key is not None and (key is None or shard_key[0] >= key[0]):
+                    next_id = max([next_id] + [t.id + 1 for t in self._read_shard(week)])
+        self._checked_next_id = (key, next_id)
+        return next_id
+
+    def _current_tasks(self):
+        """Return all tasks from every shard, oldest week first."""
+        tasks = []
+        for week in reversed(self._weeks()):
+            tasks.extend(self._shard(week))
+        return tasks
+
+    def _find(self, task_id):
+        """Locate a task by ID.
+
+        Returns:
+            tuple: (week_start, task) or (None, None) if not found
+        """
+        current_week = get_week_start()
+        weeks = self._weeks()
+        if current_week in weeks:
+            weeks.remove(current_week)
+            weeks.insert(0, current_week)
+        for week in weeks:
+            for task in self._shard(week):
+                if task.id == task_id:
+                    return week, task
+        return None, None
+
+    def invalidate_cache(self):
+        """Drop cached shards so the next call re-reads the files."""
+        self._shards = {}
+        self._manifest = None
+        self._checked_next_id = None
+
+    def get_version(self):
+        """Return the data version from the manifest.
+
+        Costs one stat() of the manifest unless it changed. Every batch that
+        writes a shard bumps the version after the shard is written.
+
+        Returns:
+            int: Data version (0 for a new store)
+        """
+        return self._read_manifest().get('version', 0)
+
+    def warm(self):
+        """Pre-load the current week's shard."""
+        self._read_shard(get_week_start())
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into one write per touched week.
+
+        Only shards changed inside the block are written, when the outermost
+        block exits, followed by one manifest write with the new counter and
+        version. The version is bumped last, so it never announces shards
+        that are not on disk yet; a crash in between leaves shards newer than
+        the manifest, whose IDs _read_next_id takes into account. If the
+        block raises, nothing is written.
+
+        Yields:
+            ShardedTaskStore: This store
+        """
+        with self._lock:
+            if self._in_batch():
+                yield self
+                return
+
+            self._working = {}
+            self._batch_owner = threading.get_ident()
+            version = self.get_version()
+            self._next_id = self._read_next_id()
+            self._manifest_dirty = False
+            try:
+                yield self
+                working, next_id, manifest_dirty = self._working, self._next_id, self._manifest_dirty
+            finally:
+                self._working = None
+                self._batch_owner = None
+            if working or manifest_dirty:
+                self._write(working, next_id, version)
+
+    @tracing.traced("ShardedTaskStore.write")
+    def _write(self, working, next_id, version):
+        """Write the changed shards and a manifest with the next version.
+
+        The written shards and manifest stay cached under their new stat
+        keys, so the next read doesn't parse them again.
+        """
+        start = time.perf_counter()
+        size = 0
+        try:
+            os.makedirs(self.dirpath, exist_ok=True)
+            for week, tasks in working.items():
+                path = self._shard_path(week)
+                if tasks:
+                    size += write_json_atomic(path, {'tasks': [task.to_dict() for task in tasks]})
+                    # The batch's working copies aren't used after it ends
+                    self._shards[week] = (_file_key(path), tasks)
+                else:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    self._shards.pop(week, None)
+            manifest = {'version': version + 1, 'next_id': next_id}
+            size += write_json_atomic(self.filepath, manifest)
+        except IOError:
+            print(f"Error: Cannot write to {self.dirpath} - check permissions")
+            self.invalidate_cache()
+            raise
+        key = self._stat_key()
+        self._manifest = (key, manifest)
+        self._checked_next_id = (key, next_id)
+        self.stats.record_save(time.perf_counter() - start, size)
+
+    @tracing.traced("ShardedTaskStore.load_tasks")
+    def load_tasks(self):
+        """Load tasks from every week's file.
+
+        Returns:
+            list: List of Task objects, oldest week first
+        """
+        return [task.copy() for task in self._current_tasks()]
+
+    @tracing.traced("ShardedTaskStore.save_tasks")
+    def save_tasks(self, tasks):
+        """Replace all stored tasks, rewriting every week's file.
+
+        Args:
+            tasks: List of Task objects to save
+        """
+        with self.batch():
+            by_week = {week: [] for week in self._weeks()}
+            for task in tasks:
+                by_week.setdefault(task.week_start, []).append(task.copy())
+            self._working.update(by_week)
+            max_id = max((task.id for task in tasks), default=0)
+            if max_id >= self._next_id:
+                self._next_id = max_id + 1
+                self._manifest_dirty = True
+
+    def add_task(self, task):
+        """Add a new task to its week's file.
+
+        Takes the next ID from the manifest counter.
+
+        Args:
+            task: Task object to add
+        """
+        self.add_tasks([task])
+
+    def add_tasks(self, new_tasks):
+        """Add several tasks, writing the manifest and each touched week once.
+
+        Reserves a block of IDs from the manifest counter in one step.
+
+        Args:
+            new_tasks: List of Task objects to add
+        """
+        with self.batch():
+            first_id = self._next_id
+            self._next_id += len(new_tasks)
+            self._manifest_dirty = True
+            for offset, task in enumerate(new_tasks):
+                task.id = first_id + offset
+                self._edit_shard(task.week_start).append(task.copy())
+
+    def get_task(self, task_id):
+        """Look up a single task by ID.
+
+        Returns:
+            Task: The task, or None if no task has that ID
+        """
+        week, task = self._find(task_id)
+        return task.copy() if task is not None else None
+
+    def update_task(self, task_id, text=None, category=None, completed=None):
+        """Change fields of an existing task, rewriting only its week's file.
+
+        Only arguments that are not None are applied.
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+
+        Raises:
+            ValueError: If category is not valid
+        """
+        if category is not None and category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}")
+
+        with self.batch():
+            week, task = self._find(task_id)
+            if task is None:
+                return None
+
+            task = next(t for t in self._edit_shard(week) if t.id == task_id)
+            if text is not None:
+                task.text = text
+            if category is not None:
+                task.category = category
+            if completed is not None:
+                task.completed = completed
+            return task.copy()
+
+    def delete_task(self, task_id):
+        """Remove a task, rewriting only its week's file.
+
+        Returns:
+            Task: The deleted task, or None if no task has that ID
+        """
+        with self.batch():
+            week, task = self._find(task_id)
+            if task is None:
+                return None
+
+            shard = self._edit_shard(week)
+            shard[:] = [t for t in shard if t.id != task_id]
+            return task.copy()
+
+    def complete_week(self, week_start):
+        """Mark all active tasks in a week as completed.
+
+        Returns:
+            int: Number of tasks that were completed
+        """
+        with self.batch():
+            if not any(not t.completed for t in self._shard(week_start)):
+                return 0
+            count = 0
+            for task in self._edit_shard(week_start):
+                if not task.completed:
+                    task.completed = True
+                    count += 1
+            return count
+
+    def delete_week(self, week_start):
+        """Delete all tasks in a week by removing its file.
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        with self.batch():
+            count = len(self._shard(week_start))
+            if count > 0:
+                self._working[week_start] = []
+            return count
+
+    def _scan(self, week_start=None):
+        """Only look at one week's file when the query is for a single week."""
+        if week_start is not None:
+            return self._shard(week_start)
+        return self._current_tasks()
+
+    def query_tasks(self, week_from=None, week_to=None, category=None, completed=None,
+                    after=None, limit=None):
+        """Return tasks from a range of weeks, ordered by (week_start, id).
+
+        Week files are read oldest first, only for weeks in the range and
+        not before the after key, and reading stops once the page is full.
+
+        Args:
+            week_from: First week to include (ISO date of its Monday)
+            week_to: Last week to include (ISO date of its Monday)
+            category: Only tasks in this category
+            completed: Only completed (True) or active (False) tasks
+            after: Only tasks whose (week_start, id) sorts after this
+            limit: Return at most this many tasks
+
+        Returns:
+            list: Matching Task objects
+        """
+        page = []
+        for week in reversed(self._weeks()):
+            if limit is not None and len(page) >= limit:
+                break
+            if week_to is not None and week > week_to:
+                break
+            if (week_from is not None and week < week_from) or (after is not None and week < after[0]):
+                continue
+            tasks = sorted((task for task in self._shard(week)
+                            if (category is None or task.category == category)
+                            and (completed is None or task.completed == completed)
+                            and (after is None or (week, task.id) > after)),
+                           key=lambda task: task.id)
+            page.extend(task.copy() for task in tasks)
+        return page if limit is None else page[:limit]
+
+    def get_task_count_by_category(self, week_start, category):
+        """Count active tasks in a category by scanning only that week's file.
+
+        A shard holds a single week, so this never grows with the history.
+        """
+        return self.count_tasks(week_start, category, completed=False)
+
+    def import_json(self, json_path):
+        """Split a monolithic tasks.json into week files, keeping IDs.
+
+        Existing week files for the same weeks are replaced.
+
+        Args:
+            json_path: Path to a tasks.json file
+
+        Returns:
+            int: Number of tasks imported
+        """
+        tasks = TaskStore(json_path).load_tasks()
+        with self.batch():
+            by_week = {}
+            for task in tasks:
+                by_week.setdefault(task.week_start, []).append(task)
+            self._working.update(by_week)
+            max_id = max((task.id for task in tasks), default=0)
+            if max_id >= self._next_id:
+                self._next_id = max_id + 1
+            self._manifest_dirty = True
+        return len(tasks)
+
+
+def main():
+    """Split a tasks.json file into a sharded week directory."""
+    parser = argparse.ArgumentParser(description="Split tasks.json into one file per week")
+    parser.add_argument('source', nargs='?', default='tasks.json', help='JSON task file (default: tasks.json)')
+    parser.add_argument('target', nargs='?', default='tasks', help='Shard directory (default: tasks)')
+    args = parser.parse_args()
+
+    try:
+        count = ShardedTaskStore(args.target).import_json(args.source)
+    except IOError:
+        sys.exit(1)
+    print(f"Split {count} tasks from {args.source} into {args.target}/")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+"""SQLite storage backend with week/category indexes.
+
+Drop-in alternative to storage.TaskStore: week and category lookups become
+indexed queries and single-task changes become single-row statements
+instead of rewriting the whole history.
+
+Import an existing JSON file once with:
+    python sqlite_storage.py tasks.json tasks.db
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import tracing
+from storage import StoreStats, TaskStore
+from task import Task, VALID_CATEGORIES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    category TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    week_start TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_week_category
+    ON tasks (week_start, category, completed);
+-- Entries end in the rowid (id), so range queries come out in
+-- (week_start, id) order without sorting
+CREATE INDEX IF NOT EXISTS idx_tasks_week
+    ON tasks (week_start);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COLUMNS = "id, text, category, completed, week_start, created_at"
+
+
+class SQLiteTaskStore:
+    """Manages persistent storage of tasks in an SQLite database.
+
+    Provides the same methods as storage.TaskStore. The id column is the
+    table's primary key, and (week_start, category, completed) is indexed
+    for the current-week views and limit checks. The next ID is kept in
+    the meta table so IDs are never reused after deletes, next to a data
+    version that every committed change increments.
+    """
+
+    def __init__(self, filepath='tasks.db'):
+        """Open (and create if needed) the task database.
+
+        Args:
+            filepath: Path to the SQLite database file
+        """
+        self.filepath = filepath
+        # Writes share one connection; the lock serializes them and is held
+        # for a whole batch. Reads use connections of their own (see
+        # _reading), so with WAL they never wait for a write transaction.
+        self._lock = threading.RLock()
+        # Thread running the open batch, or None
+        self._batch_owner = None
+        # Reader connections not in use right now
+        self._idle_readers = []
+        # Query and commit counts and durations; SQLite doesn't report bytes
+        self.stats = StoreStats()
+        try:
+            self._conn = sqlite3.connect(filepath, check_same_thread=False)
+            # WAL lets the CLI and the web app read while the other writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            print(f"Error: Cannot open {filepath} - {e}")
+            raise IOError(str(e)) from e
+
+    @staticmethod
+    def _row_to_task(row):
+        """Build a Task from a (id, text, category, completed, week_start, created_at) row."""
+        return Task.from_storage({
+            'id': row[0],
+            'text': row[1],
+            'category': row[2],
+            'completed': bool(row[3]),
+            'week_start': row[4],
+            'created_at': row[5],
+        })
+
+    @contextmanager
+    def _reading(self):
+        """Yield a connection for read-only queries.
+
+        Inside a batch its own thread keeps using the write connection, the
+        only one that sees the uncommitted changes. Every other read borrows
+        an idle reader connection, or opens one if all are busy; the pool
+        grows to the number of concurrent readers. Readers see the last
+        committed state.
+
+        Yields:
+            sqlite3.Connection: Connection to run the query on
+        """
+        if self._batch_owner == threading.get_ident():
+            yield self._conn
+            return
+        try:
+            conn = self._idle_readers.pop()
+        except IndexError:
+            try:
+                # Handed between threads, but only ever used by one at a time
+                conn = sqlite3.connect(self.filepath, check_same_thread=False)
+            except sqlite3.Error as e:
+                print(f"Error: Cannot open {self.filepath} - {e}")
+                raise IOError(str(e)) from e
+        try:
+            yield conn
+        finally:
+            self._idle_readers.append(conn)
+
+    def _query(self, sql, params=()):
+        """Run a SELECT and return the rows as Task objects."""
+        start = time.perf_counter()
+        with tracing.span("SQLiteTaskStore.read"):
+            with self._reading() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            tasks = [self._row_to_task(row) for row in rows]
+        self.stats.record_load(time.perf_counter() - start, 0)
+        return tasks
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single transaction.
+
+        Everything inside the block is committed together when the outermost
+        block exits, or rolled back if it raises. A transaction that changed
+        any row also bumps the data version.
+
+        Yields:
+            SQLiteTaskStore: This store
+        """
+        with self._lock:
+            if self._batch_owner is not None:
+                yield self
+                return
+
+            self._batch_owner = threading.get_ident()
+            changes = self._conn.total_changes
+            start = time.perf_counter()
+            committing = None
+            try:
+                with self._conn:
+                    yield self
+                    if self._conn.total_changes != changes:
+                        self._conn.execute(
+                            "INSERT INTO meta (key, value) VALUES ('version', 1) "
+                            "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+                        committing = time.perf_counter()
+                if committing is not None:
+                    now = time.perf_counter()
+                    self.stats.record_save(now - committing, 0)
+                    # One span per committed transaction, however many statements
+                    tracing.emit("SQLiteTaskStore.write", now - start)
+            except sqlite3.Error as e:
+                print(f"Error: Cannot write to {self.filepath} - {e}")
+                raise IOError(str(e)) from e
+            finally:
+                self._batch_owner = None
+
+    def _write(self, sql, params=()):
+        """Run a single write statement, inside the current batch if any.
+
+        Returns:
+            sqlite3.Cursor: Cursor of the executed statement
+        """
+        with self.batch():
+            return self._conn.execute(sql, params)
+
+    def warm(self):
+        """No-op; SQLite keeps its own page cache."""
+
+    def invalidate_cache(self):
+        """No-op; every call reads the database."""
+
+    @tracing.traced("SQLiteTaskStore.load_tasks")
+    def load_tasks(self):
+        """Load all tasks ordered by ID.
+
+        Returns:
+            list: List of Task objects
+        """
+        return self._query(f"SELECT {COLUMNS} FROM tasks ORDER BY id")
+
+    @tracing.traced("SQLiteTaskStore.save_tasks")
+    def save_tasks(self, tasks):
+        """Replace all stored tasks with the given list.
+
+        Args:
+            tasks: List of Task objects to save
+        """
+        rows = [(t.id, t.text, t.category, int(t.completed), t.week_start, t.created_at)
+                for t in tasks]
+        with self.batch():
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.executemany(
+                f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._set_next_id(max((t.id for t in tasks), default=0) + 1)
+
+    def get_version(self):
+        """Return the data version (one indexed lookup).
+
+        Returns:
+            int: Data version (0 for a new database)
+        """
+        with self._reading() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row is not None else 0
+
+    def _reserve_ids(self, count):
+        """Take a block of IDs from the persisted sequence (inside a batch).
+
+        Returns:
+            int: First ID of the block
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        if row is None:
+            # Databases created before the sequence existed
+            row = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()
+        first_id = row[0]
+        self._set_next_id(first_id + count)
+        return first_id
+
+    def _set_next_id(self, next_id):
+        """Store the ID sequence, never moving it backwards (inside a batch)."""
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (next_id,))
+
+    def add_task(self, task):
+        """Add a new task to storage.
+
+        Auto-assigns the next integer ID from the persisted sequence.
+
+        Args:
+            task: Task object to add
+        """
+        self.add_tasks([task])
+
+    def add_tasks(self, new_tasks):
+        """Add several tasks in one transaction.
+
+        Reserves a block of IDs from the sequence in one step.
+
+        Args:
+            new_tasks: List of Task objects to add
+        """
+        with self.batch():
+            first_id = self._reserve_ids(len(new_tasks))
+            for offset, task in enumerate(new_tasks):
+                task.id = first_id + offset
+            self._conn.executemany(
+                f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                [(t.id, t.text, t.category, int(t.completed), t.week_start, t.created_at)
+                 for t in new_tasks])
+
+    def get_task(self, task_id):
+        """Look up a single task by ID.
+
+        Returns:
+            Task: The task, or None if no task has that ID
+        """
+        tasks = self._query(f"SELECT {COLUMNS} FROM tasks WHERE id = ?", (task_id,))
+        return tasks[0] if tasks else None
+
+    def update_task(self, task_id, text=None, category=None, completed=None):
+        """Change fields of an existing task with a single UPDATE.
+
+        Only arguments that are not None are applied.
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+
+        Raises:
+            ValueError: If category is not valid
+        """
+        if category is not None and category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}")
+
+        assignments = []
+        params = []
+        for column, value in (('text', text), ('category', category), ('completed', completed)):
+            if value is not None:
+                assignments.append(f"{column} = ?")
+                params.append(int(value) if column == 'completed' else value)
+
+        if assignments:
+            with self.batch():
+                cur = self._write(f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?",
+                                  (*params, task_id))
+                if cur.rowcount == 0:
+                    return None
+        return self.get_task(task_id)
+
+    def toggle_task(self, task_id):
+        """Flip the completion status of a task with a single UPDATE.
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+        """
+        with self.batch():
+            cur = self._write("UPDATE tasks SET completed = NOT completed WHERE id = ?", (task_id,))
+            if cur.rowcount == 0:
+                return None
+            return self.get_task(task_id)
+
+    def delete_task(self, task_id):
+        """Remove a task from storage.
+
+        Returns:
+            Task: The deleted task, or None if no task has that ID
+        """
+        with self.batch():
+            task = self.get_task(task_id)
+            if task is not None:
+                self._write("DELETE FROM tasks WHERE id = ?", (task_id,))
+            return task
+
+    def complete_week(self, week_start):
+        """Mark all active tasks in a week as completed with one UPDATE.
+
+        Returns:
+            int: Number of tasks that were completed
+        """
+        cur = self._write("UPDATE tasks SET completed = 1 WHERE week_start = ? AND completed = 0",
+                          (week_start,))
+        return cur.rowcount
+
+    def delete_week(self, week_start):
+        """Delete all tasks in a week with one DELETE.
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        cur = self._write("DELETE FROM tasks WHERE week_start = ?", (week_start,))
+        return cur.rowcount
+
+    @staticmethod
+    def _conditions(week_start, category, completed):
+        """Build the SQL conditions and parameters for the optional filters."""
+        conditions = []
+        params = []
+        for column, value in (('week_start', week_start), ('category', category),
+                              ('completed', completed)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(int(value) if column == 'completed' else value)
+        return conditions, params
+
+    @classmethod
+    def _where(cls, week_start, category, completed):
+        """Build a WHERE clause and parameters for the optional filters."""
+        conditions, params = cls._conditions(week_start, category, completed)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def iter_tasks(self, week_start=None, category=None, completed=None):
+        """Yield tasks matching all of the given filters (indexed lookup).
+
+        Only matching rows are read; Task objects are built as the caller
+        iterates, so stopping early skips building the rest.
+
+        Yields:
+            Task: Matching tasks ordered by ID
+        """
+        where, params = self._where(week_start, category, completed)
+        with self._reading() as conn:
+            rows = conn.execute(f"SELECT {COLUMNS} FROM tasks {where} ORDER BY id",
+                                params).fetchall()
+        for row in rows:
+            yield self._row_to_task(row)
+
+    def query_tasks(self, week_from=None, week_to=None, category=None, completed=None,
+                    after=None, limit=None):
+        """Return tasks from a range of weeks, ordered by (week_start, id).
+
+        One indexed range scan that stops after limit rows; see
+        TaskStore.query_tasks for the arguments.
+
+        Returns:
+            list: Matching Task objects
+        """
+        conditions, params = self._conditions(None, category, completed)
+        if week_from is not None:
+            conditions.append("week_start >= ?")
+            params.append(week_from)
+        if week_to is not None:
+            conditions.append("week_start <= ?")
+            params.append(week_to)
+        if after is not None:
+            conditions.append("(week_start > ? OR (week_start = ? AND id > ?))")
+            params += [after[0], after[0], after[1]]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query(f"SELECT {COLUMNS} FROM tasks {where} ORDER BY week_start, id LIMIT ?",
+                           (*params, -1 if limit is None else limit))
+
+    def count_tasks(self, week_start=None, category=None, completed=None, limit=None):
+        """Count tasks matching all of the given filters (indexed lookup).
+
+        Args:
+            limit: Stop counting once this many matches are found
+
+        Returns:
+            int: Number of matching tasks (at most limit)
+        """
+        where, params = self._where(week_start, category, completed)
+        with self._reading() as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM tasks {where} LIMIT ?)",
+                (*params, -1 if limit is None else limit)).fetchone()
+        return row[0]
+
+    def has_tasks(self, week_start=None, category=None, completed=None):
+        """Return True if any task matches the filters."""
+        return self.count_tasks(week_start, category, completed, limit=1) > 0
+
+    def get_tasks_for_week(self, week_start):
+        """Get all tasks for a specific week (indexed lookup).
+
+        Args:
+            week_start: ISO date string for Monday of the week
+
+        Returns:
+            list: Task objects assigned to the specified week
+        """
+        where, params = self._where(week_start, None, None)
+        return self._query(f"SELECT {COLUMNS} FROM tasks {where} ORDER BY id", params)
+
+    def get_task_count_by_category(self, week_start, category):
+        """Count active tasks in a category for a given week (indexed lookup).
+
+        Args:
+            week_start: ISO date string for Monday of the week
+            category: Category string to count
+
+        Returns:
+            int: Number of tasks
+        """
+        return self.count_tasks(week_start, category, completed=False)
+
+    def get_active_counts(self):
+        """Count active tasks for every week and category (one grouped query).
+
+        Returns:
+            dict: (week_start, category) -> number of active tasks (only non-zero)
+        """
+        with self._reading() as conn:
+            rows = conn.execute(
+                "SELECT week_start, category, COUNT(*) FROM tasks WHERE completed = 0 "
+                "GROUP BY week_start, category").fetchall()
+        return {(week_start, category): count for week_start, category, count in rows}
+
+    def import_json(self, json_path):
+        """Copy all tasks from a JSON task file, keeping their IDs.
+
+        Tasks whose ID already exists in the database are overwritten, so
+        running the import twice is harmless.
+
+        Args:
+            json_path: Path to a tasks.json file
+
+        Returns:
+            int: Number of tasks imported
+        """
+        tasks = TaskStore(json_path).load_tasks()
+        rows = [(t.id, t.text, t.category, int(t.completed), t.week_start, t.created_at)
+                for t in tasks]
+        with self.batch():
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._set_next_id(max((t.id for t in tasks), default=0) + 1)
+        return len(rows)
+
+    def close(self):
+        """Close the database connections."""
+        while self._idle_readers:
+            self._idle_readers.pop().close()
+        self._conn.close()
+
+
+def main():
+    """Import a tasks.json file into an SQLite database."""
+    parser = argparse.ArgumentParser(description="Import tasks.json into an SQLite task database")
+    parser.add_argument('source', nargs='?', default='tasks.json', help='JSON task file (default: tasks.json)')
+    parser.add_argument('target', nargs='?', default='tasks.db', help='SQLite database (default: tasks.db)')
+    args = parser.parse_args()
+
+    try:
+        store = SQLiteTaskStore(args.target)
+        count = store.import_json(args.source)
+        store.close()
+    except IOError:
+        sys.exit(1)
+    print(f"Imported {count} tasks from {args.source} into {args.target}")
+
+
+if __name__ == '__main__':
+    main()
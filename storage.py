@@ -1,25 +1,556 @@
 """JSON-based task storage with error handling."""
 
+import heapq
 import json
 import os
-from task import Task
+import re
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+import tracing
+from task import Task, VALID_CATEGORIES, CATEGORY_LIMITS, CAT_IMPORTANT, CategoryFullError
+
+# Storage backends selectable via the TODO_STORAGE environment variable
+BACKEND_JSON = 'json'
+BACKEND_JOURNAL = 'journal'
+BACKEND_SQLITE = 'sqlite'
+BACKEND_SHARDED = 'sharded'
+
+DEFAULT_BACKEND = BACKEND_JSON
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a file so readers never see a half-written file.
+
+    Data is written and fsynced to a temporary file which is then renamed
+    over the original.
+
+    Args:
+        path: Destination file path
+        data: JSON-serializable object
+
+    Returns:
+        int: Number of bytes written
+
+    Raises:
+        IOError: If the file is read-only or can't be written
+    """
+    # Renaming would silently bypass a read-only file, so check first
+    if os.path.exists(path) and not os.access(path, os.W_OK):
+        raise PermissionError(f"{path} is read-only")
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, path)
+    except IOError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class _JSONStream:
+    """Incremental reader for JSON values from a file, one value at a time.
+
+    Only the current chunk and the value being decoded are held in memory.
+    """
+
+    def __init__(self, f, chunk_size):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Append the next chunk to the unread buffer; False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def consume(self, char):
+        """Skip the next character if it is char; return whether it was."""
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        """Skip the next character, which must be char."""
+        if not self.consume(char):
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buf, self._pos)
+
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Probably cut off at the chunk boundary
+                if self._fill():
+                    continue
+                raise
+            if end == len(self._buf) and self._fill():
+                # A number at the end of the chunk may continue in the next one
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_tasks(filepath, chunk_size=65536):
+    """Yield task records from a {"tasks": [...]} file one at a time.
+
+    Other top-level keys (such as next_id) are skipped. Records are plain
+    dicts, so callers can filter before building Task objects.
+
+    Args:
+        filepath: Path to the JSON task file
+        chunk_size: Number of characters read per chunk
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is corrupted
+    """
+    with open(filepath, 'r') as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect('{')
+        if stream.consume('}'):
+            return
+        while True:
+            key = stream.value()
+            stream.expect(':')
+            if key == 'tasks':
+                stream.expect('[')
+                if not stream.consume(']'):
+                    while True:
+                        yield stream.value()
+                        if not stream.consume(','):
+                            stream.expect(']')
+                            break
+            else:
+                stream.value()
+            if not stream.consume(','):
+                stream.expect('}')
+                return
+
+
+def read_json_header(filepath, chunk_size=4096):
+    """Return the top-level keys that precede the task list in a task file.
+
+    Reading stops at "tasks", so metadata such as version and next_id is
+    available without parsing the history.
+
+    Args:
+        filepath: Path to the JSON task file
+        chunk_size: Number of characters read per chunk
+
+    Returns:
+        dict: Top-level keys before "tasks" and their values
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is corrupted
+    """
+    header = {}
+    with open(filepath, 'r') as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect('{')
+        if stream.consume('}'):
+            return header
+        while True:
+            key = stream.value()
+            stream.expect(':')
+            if key == 'tasks':
+                return header
+            header[key] = stream.value()
+            if not stream.consume(','):
+                stream.expect('}')
+                return header
+
+
+def _record_matches(record, week_start, category, completed):
+    """Check a raw task record against optional filters (None matches all)."""
+    return ((week_start is None or record['week_start'] == week_start)
+            and (category is None or record.get('category', CAT_IMPORTANT) == category)
+            and (completed is None or record['completed'] == completed))
+
+
+def _task_matches(task, week_start, category, completed):
+    """Check a Task against optional filters (None matches all)."""
+    return ((week_start is None or task.week_start == week_start)
+            and (category is None or task.category == category)
+            and (completed is None or task.completed == completed))
+
+
+def _in_range(week_start, task_id, week_from, week_to, after):
+    """Check a task's (week_start, id) against a query_tasks range."""
+    return ((week_from is None or week_start >= week_from)
+            and (week_to is None or week_start <= week_to)
+            and (after is None or (week_start, task_id) > after))
+
+
+def count_active_tasks(tasks):
+    """Count active tasks per (week_start, category).
+
+    Returns:
+        dict: (week_start, category) -> number of active tasks (only non-zero)
+    """
+    counts = {}
+    for task in tasks:
+        _count_task(counts, task, 1)
+    return counts
+
+
+def _count_task(counts, task, delta):
+    """Add delta to a task's (week_start, category) count if it's active."""
+    if not task.completed:
+        key = (task.week_start, task.category)
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+
+def check_category_limit(store, week_start, category):
+    """Make sure a category has room for one more active task.
+
+    Shared by the CLI, the TUI and the web app. Works with any store
+    backend.
+
+    Args:
+        store: Task store to check
+        week_start: ISO date string for Monday of the week
+        category: Category the task would be added to
+
+    Returns:
+        int: Number of active tasks in the category before adding
+
+    Raises:
+        ValueError: If category is not valid
+        CategoryFullError: If the category is already at its limit
+    """
+    if category not in VALID_CATEGORIES:
+        raise ValueError(f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}")
+    count = store.get_task_count_by_category(week_start, category)
+    limit = CATEGORY_LIMITS[category]
+    if count >= limit:
+        raise CategoryFullError(category, count, limit)
+    return count
+
+
+class StoreStats:
+    """Running totals of a store's reads and writes of its backing files.
+
+    Updated by the store from whichever thread does the I/O; snapshot()
+    returns a consistent copy for reporting (e.g. the web app's /metrics).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.bytes_read = 0
+        self.saves = 0
+        self.save_seconds = 0.0
+        self.bytes_written = 0
+
+    def record_load(self, seconds, nbytes, count=1):
+        """Record a read of stored tasks.
+
+        Args:
+            seconds: Time the read took
+            nbytes: Bytes read from disk (0 if unknown)
+            count: Loads to add; 0 to extend the load recorded last
+        """
+        with self._lock:
+            self.loads += count
+            self.load_seconds += seconds
+            self.bytes_read += nbytes
+        tracing.emit("store.read", seconds, bytes=nbytes)
+
+    def record_save(self, seconds, nbytes, count=1):
+        """Record a write of stored tasks.
+
+        Args:
+            seconds: Time the write took
+            nbytes: Bytes written to disk (0 if unknown)
+            count: Saves to add; 0 to extend the save recorded last
+        """
+        with self._lock:
+            self.saves += count
+            self.save_seconds += seconds
+            self.bytes_written += nbytes
+        tracing.emit("store.write", seconds, bytes=nbytes)
+
+    def snapshot(self):
+        """Return the current totals as a dict."""
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'load_seconds': self.load_seconds,
+                'bytes_read': self.bytes_read,
+                'saves': self.saves,
+                'save_seconds': self.save_seconds,
+                'bytes_written': self.bytes_written,
+            }
 
 
 class TaskStore:
     """Manages persistent storage of tasks in JSON format.
 
     Handles file read/write errors gracefully with clear error messages.
-    Tasks are stored in a JSON file with structure: {"tasks": [...]}
+    Tasks are stored in a JSON file with structure:
+    {"version": 7, "next_id": 42, "tasks": [...]}
+
+    next_id is a persisted, monotonic ID sequence: IDs are never reused,
+    even after the task with the highest ID is deleted. version goes up by
+    one with every save, so callers can tell cheaply whether anything changed
+    (see get_version).
+
+    With cache=True the parsed tasks are kept in memory and the file is only
+    re-read when its mtime, size or inode changes (e.g. after an edit from
+    another process such as the CLI while the web app is running). Active
+    task counts per (week_start, category) are kept next to the cache and
+    updated by each mutation, so limit checks don't rescan the history.
     """
 
-    def __init__(self, filepath='tasks.json'):
+    # Metadata of a store without a file (see _read_tasks)
+    _EMPTY_META = {'next_id': 1, 'version': 0}
+
+    def __init__(self, filepath='tasks.json', cache=False):
         """Initialize task storage.
 
         Args:
             filepath: Path to JSON file for task storage
+            cache: Keep parsed tasks in memory between calls
         """
         self.filepath = filepath
+        self.cache = cache
+        self._cache_key = None
+        self._cache_tasks = None
+        # (task list, active counts) for the cached list the counts belong to
+        self._cache_counts = None
+        # ID sequence as of the last read (kept in sync with the cache)
+        self._next_id = 1
+        # Data version as of the last read or write
+        self._version = 0
+        # Working task list while a batch() is open, visible only to its thread
+        self._lock = threading.RLock()
+        self._batch = None
+        self._batch_owner = None
+        self._batch_dirty = False
+        # (counts at batch start, changes since) or None until first needed
+        self._batch_counts = None
+        # Load/save counts, durations and bytes for monitoring
+        self.stats = StoreStats()
+
+    def _stat_key(self):
+        """Return a key identifying the current version of the file.
+
+        Returns:
+            tuple: (mtime_ns, size, inode), or None if the file doesn't exist
+        """
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _cached_tasks(self):
+        """Return the cached task list, re-reading the file if it changed.
+
+        The file is parsed without holding the lock, so readers don't wait
+        for each other. The result, ID sequence and version are then
+        published together under the lock, and only if the file is still the
+        one that was read: a parse that a concurrent save has overtaken is
+        returned to this caller but never cached.
+
+        The returned Task objects are shared with the cache and must not be
+        modified by the caller.
+        """
+        key = self._stat_key()
+        cached = self._cache_tasks
+        if cached is not None and key == self._cache_key:
+            return cached
+        if key is None:
+            tasks, meta = [], dict(self._EMPTY_META)
+        else:
+            tasks, meta = self._read_tasks()
+        # If another thread is saving right now, don't wait for it: what was
+        # just read is the last committed state, the save will update the
+        # cache itself.
+        if not self._lock.acquire(blocking=False):
+            return tasks
+        try:
+            if self._stat_key() != key:
+                # Changed while parsing; the next call reads the newer file
+                return tasks
+            if self._cache_tasks is None or self._cache_key != key:
+                previous_version = self._version
+                self._adopt(meta)
+                if self._cache_tasks is not None:
+                    # The file changed under us; move on even if whoever wrote
+                    # it (a hand edit, an older version of this app) kept the
+                    # version
+                    self._version = max(self._version, previous_version + 1)
+                self._cache_tasks = tasks
+                self._cache_key = key
+            return self._cache_tasks
+        finally:
+            self._lock.release()
+
+    def _adopt(self, meta):
+        """Take over the ID sequence and version of a read (lock held).
+
+        Args:
+            meta: The metadata dict returned by _read_tasks alongside the tasks
+        """
+        # Never move the sequence backwards, even if the file did
+        self._next_id = max(self._next_id, meta['next_id'])
+        self._version = meta['version']
+
+    def _load(self):
+        """Read the file and adopt its ID sequence and version.
+
+        Returns:
+            list: The parsed Task objects
+        """
+        tasks, meta = self._read_tasks()
+        with self._lock:
+            self._adopt(meta)
+        return tasks
+
+    def _update_cache(self, tasks, counts=None):
+        """Replace the cache with tasks that were just written to disk.
+
+        Args:
+            tasks: The tasks that were written
+            counts: Their active counts, if already known
+        """
+        if self.cache:
+            self._cache_tasks = [task.copy() for task in tasks]
+            self._cache_counts = (self._cache_tasks, counts) if counts is not None else None
+            self._cache_key = self._stat_key()
 
+    def invalidate_cache(self):
+        """Drop cached tasks so the next call re-reads the file."""
+        self._cache_key = None
+        self._cache_tasks = None
+        self._cache_counts = None
+
+    def _active_counts(self, tasks):
+        """Return the active counts for a cached task list, counting it once."""
+        cached = self._cache_counts
+        if cached is None or cached[0] is not tasks:
+            cached = self._cache_counts = (tasks, count_active_tasks(tasks))
+        return cached[1]
+
+    def _batch_count(self, task, delta):
+        """Track a change to the active counts of the open batch."""
+        if self._batch_counts is not None:
+            _count_task(self._batch_counts[1], task, delta)
+
+    def _batch_changed(self, tasks):
+        """Make tasks the batch's working list; counts are already tracked."""
+        self._batch = tasks
+        self._batch_dirty = True
+
+    def _in_batch(self):
+        """Return True if the calling thread has a batch() open."""
+        return self._batch is not None and self._batch_owner == threading.get_ident()
+
+    def _current_tasks(self):
+        """Return the current task list without copying.
+
+        Inside a batch this is the working list; otherwise the cache or a
+        fresh read. The caller must not modify the returned tasks.
+        """
+        if self._in_batch():
+            return self._batch
+        if self.cache:
+            return self._cached_tasks()
+        return self._read_tasks()[0]
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single atomic save.
+
+        Inside the block, mutation methods called from the same thread work
+        on an in-memory list; it is written once when the block exits. If
+        the block raises, nothing is written. Batches may be nested; only
+        the outermost one saves.
+
+        Yields:
+            TaskStore: This store
+        """
+        with self._lock:
+            if self._in_batch():
+                yield self
+                return
+
+            if self.cache:
+                current = self._cached_tasks()
+                self._batch = [task.copy() for task in current]
+                # Mutations record their changes on top of the cached counts
+                self._batch_counts = (self._active_counts(current), {})
+            else:
+                self._batch = self._load()
+                self._batch_counts = None
+            self._batch_owner = threading.get_ident()
+            self._batch_dirty = False
+            try:
+                yield self
+                tasks, dirty, counts = self._batch, self._batch_dirty, self._batch_counts
+            finally:
+                self._batch = None
+                self._batch_owner = None
+                self._batch_counts = None
+            if dirty:
+                if counts is not None:
+                    base, changes = counts
+                    counts = dict(base)
+                    for key, delta in changes.items():
+                        count = counts.get(key, 0) + delta
+                        if count:
+                            counts[key] = count
+                        else:
+                            counts.pop(key, None)
+                self._save(tasks, counts)
+
+    def warm(self):
+        """Pre-load the cache so the first request doesn't pay for parsing."""
+        if self.cache:
+            self._cached_tasks()
+
+    @tracing.traced("TaskStore.load_tasks")
     def load_tasks(self):
         """Load tasks from JSON file.
 
@@ -30,59 +561,411 @@ class TaskStore:
             - FileNotFoundError: Returns empty list
             - JSONDecodeError: Prints error message and returns empty list
         """
+        if self._in_batch():
+            # Working list of the open batch; changes are saved on exit
+            return self._batch
+        if self.cache:
+            # Hand out copies so callers can modify tasks freely
+            return [task.copy() for task in self._current_tasks()]
+        return self._load()
+
+    def _read_tasks(self):
+        """Read and parse all tasks, reported as one "<Store>.read" span.
+
+        Every load goes through here, whether it comes from load_tasks, the
+        cache or the read-only helpers the web app uses. Nothing on the store
+        is changed; callers publish the result (see _adopt).
+
+        Returns:
+            tuple: (list of Task objects, metadata dict with next_id and version)
+        """
+        with tracing.span(f"{type(self).__name__}.read", path=self.filepath):
+            return self._read_file()
+
+    def _read_file(self):
+        """Read and parse all tasks from the JSON file.
+
+        Returns:
+            tuple: (list of Task objects, {'next_id': the file's ID sequence,
+                'version': its data version})
+        """
+        start = time.perf_counter()
         try:
             with open(self.filepath, 'r') as f:
                 data = json.load(f)
-                tasks = [Task.from_dict(task_data) for task_data in data.get('tasks', [])]
-                return tasks
+                tasks = [Task.from_storage(task_data) for task_data in data.get('tasks', [])]
+                # Files written before the sequence existed fall back to max ID + 1
+                next_id = data.get('next_id') or max((t.id for t in tasks), default=0) + 1
+                self.stats.record_load(time.perf_counter() - start, os.fstat(f.fileno()).st_size)
+                return tasks, {'next_id': next_id, 'version': data.get('version', 0)}
         except FileNotFoundError:
             # File doesn't exist yet - this is normal on first run
-            return []
+            return [], dict(self._EMPTY_META)
         except json.JSONDecodeError:
             print(f"Error: {self.filepath} is corrupted")
-            return []
+            return [], dict(self._EMPTY_META)
 
+    @tracing.traced("TaskStore.save_tasks")
     def save_tasks(self, tasks):
         """Save tasks to JSON file.
 
+        The file is replaced atomically: data is written and fsynced to a
+        temporary file which is then renamed over the original, so readers
+        never see a half-written file. Inside a batch() the save is deferred
+        until the batch exits.
+
         Args:
             tasks: List of Task objects to save
 
         Handles:
             - IOError: Prints error message about write permissions
         """
-        try:
-            data = {
-                'tasks': [task.to_dict() for task in tasks]
-            }
-            with open(self.filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-        except IOError as e:
-            print(f"Error: Cannot write to {self.filepath} - check permissions")
-            raise
+        if self._in_batch():
+            self._batch = tasks
+            self._batch_dirty = True
+            # Arbitrary changes: recount from the list when next needed
+            self._batch_counts = None
+            return
+        self._save(tasks)
+
+    def _save(self, tasks, counts=None):
+        """Write tasks to the file and update the cache.
+
+        Reported as one "<Store>.write" span per save.
+
+        Args:
+            tasks: List of Task objects to save
+            counts: Their active counts, if already known
+        """
+        with self._lock, tracing.span(f"{type(self).__name__}.write", path=self.filepath):
+            # Never move the sequence backwards, but cover IDs set by the caller
+            max_id = max((task.id for task in tasks), default=0)
+            self._next_id = max(self._next_id, max_id + 1)
+            version = self._version + 1
+            start = time.perf_counter()
+            try:
+                # Metadata goes before the task list so read_json_header can
+                # stop early
+                data = {
+                    'version': version,
+                    'next_id': self._next_id,
+                    'tasks': [task.to_dict() for task in tasks]
+                }
+                size = write_json_atomic(self.filepath, data)
+            except IOError as e:
+                print(f"Error: Cannot write to {self.filepath} - check permissions")
+                self.invalidate_cache()
+                raise
+            self.stats.record_save(time.perf_counter() - start, size)
+            self._update_cache(tasks, counts)
+            # Only after the cache holds the new tasks, so a reader never
+            # pairs the new version with old data
+            self._version = version
 
+    def get_version(self):
+        """Return the current data version.
+
+        The version increases with every committed change, so an unchanged
+        version means unchanged tasks. With cache=True this costs one stat()
+        of the file; otherwise only the start of the file is read.
+
+        Returns:
+            int: Data version (0 for a new store)
+        """
+        if self.cache or self._in_batch():
+            self._current_tasks()
+            return self._version
+        try:
+            return read_json_header(self.filepath).get('version', 0)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
 
     def add_task(self, task):
         """Add a new task to storage.
 
-        Auto-assigns the next integer ID.
+        Auto-assigns the next integer ID from the persisted sequence.
 
         Args:
             task: Task object to add
         """
-        tasks = self.load_tasks()
-        
-        # Auto-increment ID
-        if not tasks:
-            next_id = 1
+        self.add_tasks([task])
+
+    def add_tasks(self, new_tasks):
+        """Add several tasks with a single save.
+
+        Reserves a block of IDs from the sequence in one step and assigns
+        them in order.
+
+        Args:
+            new_tasks: List of Task objects to add
+        """
+        with self.batch():
+            tasks = self.load_tasks()
+
+            first_id = self._next_id
+            self._next_id += len(new_tasks)
+            for offset, task in enumerate(new_tasks):
+                task.id = first_id + offset
+                tasks.append(task.copy())
+                self._batch_count(task, 1)
+            self._batch_changed(tasks)
+
+    def get_task(self, task_id):
+        """Look up a single task by ID.
+
+        Args:
+            task_id: Integer task ID
+
+        Returns:
+            Task: The task, or None if no task has that ID
+        """
+        if self._streaming():
+            # Stop reading as soon as the task is found
+            record = next((r for r in self._iter_records() if r['id'] == task_id), None)
+            return Task.from_storage(record) if record is not None else None
+        task = next((t for t in self._current_tasks() if t.id == task_id), None)
+        return task.copy() if task is not None else None
+
+    def update_task(self, task_id, text=None, category=None, completed=None):
+        """Change fields of an existing task.
+
+        Only arguments that are not None are applied.
+
+        Args:
+            task_id: Integer task ID
+            text: New task description
+            category: New category (must be in VALID_CATEGORIES)
+            completed: New completion status
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+
+        Raises:
+            ValueError: If category is not valid
+        """
+        if category is not None and category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}")
+
+        with self.batch():
+            tasks = self.load_tasks()
+            task = next((t for t in tasks if t.id == task_id), None)
+            if task is None:
+                return None
+
+            self._batch_count(task, -1)
+            if text is not None:
+                task.text = text
+            if category is not None:
+                task.category = category
+            if completed is not None:
+                task.completed = completed
+            self._batch_count(task, 1)
+            self._batch_changed(tasks)
+            return task.copy()
+
+    def toggle_task(self, task_id):
+        """Flip the completion status of a task.
+
+        Args:
+            task_id: Integer task ID
+
+        Returns:
+            Task: The updated task, or None if no task has that ID
+        """
+        with self.batch():
+            task = self.get_task(task_id)
+            if task is None:
+                return None
+            return self.update_task(task_id, completed=not task.completed)
+
+    def delete_task(self, task_id):
+        """Remove a task from storage.
+
+        Args:
+            task_id: Integer task ID
+
+        Returns:
+            Task: The deleted task, or None if no task has that ID
+        """
+        with self.batch():
+            tasks = self.load_tasks()
+            task = next((t for t in tasks if t.id == task_id), None)
+            if task is None:
+                return None
+
+            tasks.remove(task)
+            self._batch_count(task, -1)
+            self._batch_changed(tasks)
+            return task
+
+    def complete_week(self, week_start):
+        """Mark all active tasks in a week as completed.
+
+        Args:
+            week_start: ISO date string for Monday of the week
+
+        Returns:
+            int: Number of tasks that were completed
+        """
+        with self.batch():
+            tasks = self.load_tasks()
+            count = 0
+            for task in tasks:
+                if task.week_start == week_start and not task.completed:
+                    self._batch_count(task, -1)
+                    task.completed = True
+                    count += 1
+            if count > 0:
+                self._batch_changed(tasks)
+            return count
+
+    def delete_week(self, week_start):
+        """Delete all tasks in a week.
+
+        Args:
+            week_start: ISO date string for Monday of the week
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        with self.batch():
+            tasks = self.load_tasks()
+            # Keep tasks that are NOT in this week
+            remaining_tasks = []
+            for task in tasks:
+                if task.week_start != week_start:
+                    remaining_tasks.append(task)
+                else:
+                    self._batch_count(task, -1)
+            deleted_count = len(tasks) - len(remaining_tasks)
+            if deleted_count > 0:
+                self._batch_changed(remaining_tasks)
+            return deleted_count
+
+    def _scan(self, week_start=None):
+        """Return the in-memory tasks a query for week_start has to look at.
+
+        Read-only; subclasses can narrow this down (e.g. to one week's file).
+        """
+        return self._current_tasks()
+
+    def _streaming(self):
+        """Return True if queries should stream from the file.
+
+        Without the cache there's no parsed copy to filter, so records are
+        read one at a time instead of loading the whole history.
+        """
+        return not self.cache and not self._in_batch()
+
+    def _iter_records(self):
+        """Yield raw task records from the file, tolerating a missing or corrupted file.
+
+        The "<Store>.read" span covers the whole scan, including the
+        caller's work between records.
+        """
+        try:
+            with tracing.span(f"{type(self).__name__}.read", path=self.filepath, streaming=True):
+                yield from iter_json_tasks(self.filepath)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            print(f"Error: {self.filepath} is corrupted")
+
+    def iter_tasks(self, week_start=None, category=None, completed=None):
+        """Yield tasks matching all of the given filters.
+
+        Without the cache, the file is parsed one record at a time and only
+        matching records become Task objects, so memory stays proportional
+        to the result rather than the history. Stop iterating early to
+        avoid reading the rest of the file.
+
+        Args:
+            week_start: Only tasks of this week (ISO date string)
+            category: Only tasks in this category
+            completed: Only completed (True) or active (False) tasks
+
+        Yields:
+            Task: Matching tasks, in storage order
+        """
+        if self._streaming():
+            for record in self._iter_records():
+                if _record_matches(record, week_start, category, completed):
+                    yield Task.from_storage(record)
         else:
-            # Find max existing ID (handles potentially unsorted lists)
-            max_id = max(t.id for t in tasks)
-            next_id = max_id + 1
-        
-        task.id = next_id
-        tasks.append(task)
-        self.save_tasks(tasks)
+            for task in self._scan(week_start):
+                if _task_matches(task, week_start, category, completed):
+                    yield task.copy()
+
+    def count_tasks(self, week_start=None, category=None, completed=None, limit=None):
+        """Count tasks matching all of the given filters.
+
+        Args:
+            week_start: Only tasks of this week (ISO date string)
+            category: Only tasks in this category
+            completed: Only completed (True) or active (False) tasks
+            limit: Stop counting once this many matches are found
+
+        Returns:
+            int: Number of matching tasks (at most limit)
+        """
+        if self._streaming():
+            matches = (1 for record in self._iter_records()
+                       if _record_matches(record, week_start, category, completed))
+        else:
+            matches = (1 for task in self._scan(week_start)
+                       if _task_matches(task, week_start, category, completed))
+        return sum(islice(matches, limit))
+
+    def has_tasks(self, week_start=None, category=None, completed=None):
+        """Return True if any task matches the filters, stopping at the first.
+
+        Args:
+            week_start: Only tasks of this week (ISO date string)
+            category: Only tasks in this category
+            completed: Only completed (True) or active (False) tasks
+        """
+        return self.count_tasks(week_start, category, completed, limit=1) > 0
+
+    def query_tasks(self, week_from=None, week_to=None, category=None, completed=None,
+                    after=None, limit=None):
+        """Return tasks from a range of weeks, ordered by (week_start, id).
+
+        For paging through history, pass the (week_start, id) of the last
+        task of a page as after to get the next one. Both fields never
+        change, so adding or deleting tasks doesn't shift later pages.
+
+        Only the page is kept in memory: without the cache records are
+        streamed from the file, and only matching ones become Task objects.
+
+        Args:
+            week_from: First week to include (ISO date of its Monday)
+            week_to: Last week to include (ISO date of its Monday)
+            category: Only tasks in this category
+            completed: Only completed (True) or active (False) tasks
+            after: Only tasks whose (week_start, id) sorts after this
+            limit: Return at most this many tasks
+
+        Returns:
+            list: Matching Task objects
+        """
+        streaming = self._streaming()
+        if streaming:
+            matches = (Task.from_storage(record) for record in self._iter_records()
+                       if _record_matches(record, None, category, completed)
+                       and _in_range(record['week_start'], record['id'], week_from, week_to, after))
+        else:
+            matches = (task for task in self._current_tasks()
+                       if _task_matches(task, None, category, completed)
+                       and _in_range(task.week_start, task.id, week_from, week_to, after))
+
+        def key(task):
+            return (task.week_start, task.id)
+
+        if limit is None:
+            page = sorted(matches, key=key)
+        else:
+            page = heapq.nsmallest(limit, matches, key=key)
+        return page if streaming else [task.copy() for task in page]
 
     def get_tasks_for_week(self, week_start):
         """Get all tasks for a specific week.
@@ -93,12 +976,14 @@ class TaskStore:
         Returns:
             list: Task objects assigned to the specified week
         """
-        tasks = self.load_tasks()
-        return [task for task in tasks if task.week_start == week_start]
+        return list(self.iter_tasks(week_start=week_start))
 
     def get_task_count_by_category(self, week_start, category):
-        """Count tasks in a specific category for a given week.
-        
+        """Count active tasks in a specific category for a given week.
+
+        With the cache (or inside a batch) this is a lookup in the
+        maintained counts rather than a scan.
+
         Args:
             week_start: ISO date string for Monday of the week
             category: Category string to count
@@ -106,5 +991,174 @@ class TaskStore:
         Returns:
             int: Number of tasks
         """
-        tasks = self.get_tasks_for_week(week_start)
-        return sum(1 for t in tasks if t.category == category and not t.completed)
+        if self._streaming():
+            return self.count_tasks(week_start, category, completed=False)
+        key = (week_start, category)
+        if self._in_batch():
+            if self._batch_counts is None:
+                self._batch_counts = (count_active_tasks(self._batch), {})
+            base, changes = self._batch_counts
+            return base.get(key, 0) + changes.get(key, 0)
+        return self._active_counts(self._current_tasks()).get(key, 0)
+
+    def get_active_counts(self):
+        """Count active tasks for every week and category.
+
+        With the cache this copies the maintained counts instead of scanning.
+
+        Returns:
+            dict: (week_start, category) -> number of active tasks (only non-zero)
+        """
+        if self._streaming():
+            return count_active_tasks(self.iter_tasks(completed=False))
+        return dict(self._active_counts(self._current_tasks()))
+
+
+class WriteQueue:
+    """Single writer thread that group-commits store mutations.
+
+    Mutations submitted from many request handlers are queued; the writer
+    takes everything that arrives within `window` seconds of the first one
+    and applies it inside one store.batch(), so a burst of N changes costs
+    one save (and one fsync) instead of N. Each submitter still gets its
+    own result or exception through a Future.
+
+    An optional listener is told about every batch on the writer thread:
+    listener.begin(store) once the batch is open, then listener.commit(store)
+    after it was saved or listener.abort(store) if saving failed.
+    """
+
+    def __init__(self, store, window=0.005, max_batch=100, listener=None):
+        """Start the writer thread.
+
+        Args:
+            store: Store to write to (must provide batch())
+            window: Seconds to wait for more mutations after the first
+            max_batch: Maximum number of mutations per save
+            listener: Object with begin/commit/abort methods, or None
+        """
+        self.store = store
+        self.window = window
+        self.max_batch = max_batch
+        self.listener = listener
+        # queue and concurrent.futures are imported where used: only the web
+        # app runs a writer, and the CLI starts faster without them
+        import queue
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, op):
+        """Queue a mutation.
+
+        Args:
+            op: Callable taking the store; its return value becomes the
+                Future's result. It should validate before changing anything,
+                since a raising op does not undo the rest of its batch.
+
+        Returns:
+            Future: Resolves once the batch containing op is saved
+        """
+        from concurrent.futures import Future
+        future = Future()
+        self._queue.put((op, future))
+        return future
+
+    def close(self):
+        """Flush queued mutations and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        """Writer loop: collect a batch, then commit it."""
+        import queue
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            items = [item]
+            deadline = time.monotonic() + self.window
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Commit what we have, then stop
+                    self._commit(items)
+                    return
+                items.append(item)
+            self._commit(items)
+
+    def _commit(self, items):
+        """Apply a batch of mutations with a single save and resolve futures."""
+        outcomes = []
+        try:
+            with self.store.batch():
+                if self.listener is not None:
+                    self.listener.begin(self.store)
+                for op, future in items:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        outcomes.append((future, op(self.store), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The save itself failed, so none of the batch was committed
+            if self.listener is not None:
+                self.listener.abort(self.store)
+            for op, future in items:
+                if not future.done():
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    future.set_exception(e)
+            return
+
+        if self.listener is not None:
+            self.listener.commit(self.store)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def create_store(backend=None, filepath=None, cache=False):
+    """Create the task store selected by configuration.
+
+    The backend defaults to the TODO_STORAGE environment variable and the
+    file location to TODO_STORAGE_PATH, falling back to the JSON store in
+    tasks.json (tasks.db for SQLite, the tasks/ directory when sharded).
+
+    Args:
+        backend: 'json', 'journal', 'sqlite' or 'sharded'
+        filepath: Path to the storage file
+        cache: Keep parsed tasks in memory (JSON backend only)
+
+    Returns:
+        TaskStore: Store instance for the chosen backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = backend or os.environ.get('TODO_STORAGE', DEFAULT_BACKEND)
+    default_path = {BACKEND_SQLITE: 'tasks.db', BACKEND_SHARDED: 'tasks'}.get(backend, 'tasks.json')
+    filepath = filepath or os.environ.get('TODO_STORAGE_PATH', default_path)
+
+    if backend == BACKEND_JSON:
+        return TaskStore(filepath, cache=cache)
+    if backend == BACKEND_JOURNAL:
+        # Imported lazily so the default backend doesn't pay for it
+        from journal_storage import JournalTaskStore
+        return JournalTaskStore(filepath)
+    if backend == BACKEND_SQLITE:
+        from sqlite_storage import SQLiteTaskStore
+        return SQLiteTaskStore(filepath)
+    if backend == BACKEND_SHARDED:
+        from sharded_storage import ShardedTaskStore
+        return ShardedTaskStore(filepath)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -1,7 +1,10 @@
 """Task model for weekly task management system."""
 
 
+import sys
 from datetime import datetime
+
+import tracing
 from week_utils import get_week_start
 
 
@@ -14,12 +17,43 @@ CAT_PARKING_LOT = 'parking_lot'
 
 VALID_CATEGORIES = [CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT, CAT_PARKING_LOT]
 
+# Maximum number of active tasks per week in each category
+CATEGORY_LIMITS = {
+    CAT_IMPORTANT_URGENT: 3,
+    CAT_URGENT: 3,
+    CAT_IMPORTANT: 3,
+    CAT_PARKING_LOT: 5,
+}
+
+
+class CategoryFullError(ValueError):
+    """Raised when a category already holds its maximum of active tasks."""
+
+    def __init__(self, category, count, limit):
+        """Create the error.
+
+        Args:
+            category: The full category
+            count: Number of active tasks in it
+            limit: Maximum number of active tasks allowed
+        """
+        super().__init__(f"Category is full ({count}/{limit} tasks)")
+        self.category = category
+        self.count = count
+        self.limit = limit
+
+
 class Task:
     """Represents a single task with integer ID and Eisenhover category.
 
     Tasks are assigned to a category and current week. ID is a unique integer.
+
+    Uses __slots__ and interns category and week_start (which repeat across
+    thousands of tasks) to keep large histories small in memory.
     """
 
+    __slots__ = ('id', 'text', 'category', 'completed', 'week_start', 'created_at')
+
     def __init__(self, text, category, task_id=None, completed=False, week_start=None, created_at=None):
         """Create a new task.
 
@@ -36,9 +70,9 @@ class Task:
 
         self.id = task_id  # Will be assigned by store if None
         self.text = text
-        self.category = category
+        self.category = sys.intern(category)
         self.completed = completed
-        self.week_start = week_start if week_start else get_week_start()
+        self.week_start = sys.intern(week_start if week_start else get_week_start())
         self.created_at = created_at if created_at else datetime.now().isoformat()
 
     def to_dict(self):
@@ -56,7 +90,23 @@ class Task:
             'created_at': self.created_at
         }
 
+    def copy(self):
+        """Return an independent copy of this task.
+
+        Returns:
+            Task: New task with the same field values
+        """
+        clone = self.__class__.__new__(self.__class__)
+        clone.id = self.id
+        clone.text = self.text
+        clone.category = self.category
+        clone.completed = self.completed
+        clone.week_start = self.week_start
+        clone.created_at = self.created_at
+        return clone
+
     @classmethod
+    @tracing.traced("Task.from_dict")
     def from_dict(cls, data):
         """Create task from dictionary loaded from JSON.
 
@@ -74,3 +124,26 @@ class Task:
             week_start=data['week_start'],
             created_at=data['created_at']
         )
+
+    @classmethod
+    def from_storage(cls, data):
+        """Create task from a record read back from storage, without validation.
+
+        Records in storage were validated when they were first created, so
+        this trusted path skips the category check and default generation in
+        __init__. Use from_dict for data from any other source.
+
+        Args:
+            data: Dictionary with all task fields
+
+        Returns:
+            Task: Reconstructed task object
+        """
+        task = cls.__new__(cls)
+        task.id = data['id']
+        task.text = data['text']
+        task.category = sys.intern(data.get('category', CAT_IMPORTANT))
+        task.completed = data['completed']
+        task.week_start = sys.intern(data['week_start'])
+        task.created_at = data['created_at']
+        return task
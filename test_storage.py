@@ -10,9 +10,13 @@ Tests verify:
 import os
 import json
 from datetime import date
-from task import Task
+import tempfile
+from task import Task, CAT_IMPORTANT, CAT_URGENT, CategoryFullError
 from week_utils import get_week_start, get_week_end
-from storage import TaskStore
+from storage import TaskStore, WriteQueue
+from journal_storage import JournalTaskStore
+from sqlite_storage import SQLiteTaskStore
+from sharded_storage import ShardedTaskStore
 
 
 def test_task_creation_and_serialization():
@@ -218,6 +222,932 @@ def test_python_standard_library_only():
     print("[OK] Test 5 PASSED")
 
 
+def test_cache_invalidation():
+    """Cached store re-reads the file only when it changes on disk."""
+    print("\n=== Test 6: Cache Invalidation ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = TaskStore(test_file, cache=True)
+        store.add_task(Task("Cached task", CAT_IMPORTANT))
+
+        # Mutating returned tasks must not leak into the cache
+        tasks = store.load_tasks()
+        tasks[0].text = "Changed in memory only"
+        assert store.load_tasks()[0].text == "Cached task", "Cache was modified by caller"
+        print("[OK] Returned tasks are independent copies")
+
+        # A write from another process is picked up
+        other = TaskStore(test_file)
+        other.add_task(Task("Written elsewhere", CAT_URGENT))
+        texts = [t.text for t in store.load_tasks()]
+        assert texts == ["Cached task", "Written elsewhere"], f"Stale cache: {texts}"
+        assert store.get_task_count_by_category(tasks[0].week_start, CAT_URGENT) == 1
+        print("[OK] External change detected via file stat")
+
+    print("[OK] Test 6 PASSED")
+
+
+def test_journal_storage():
+    """Journal backend appends mutations and compacts into the snapshot."""
+    print("\n=== Test 7: Journal Storage ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = JournalTaskStore(test_file, compact_every=5)
+
+        for i in range(3):
+            store.add_task(Task(f"Task {i}", CAT_IMPORTANT))
+        store.toggle_task(1)
+        assert not os.path.exists(test_file), "Snapshot should not be written before compaction"
+        print("[OK] Mutations appended to journal only")
+
+        # A fresh store replays the journal
+        replayed = JournalTaskStore(test_file).load_tasks()
+        assert [t.id for t in replayed] == [1, 2, 3]
+        assert replayed[0].completed, "Toggle was not replayed"
+        print("[OK] Journal replay restores state")
+
+        store.delete_task(2)  # 5th record triggers compaction
+        assert not os.path.exists(store.journal_path), "Journal should be truncated"
+        with open(test_file) as f:
+            ids = [t['id'] for t in json.load(f)['tasks']]
+        assert ids == [1, 3], f"Unexpected snapshot contents: {ids}"
+        print("[OK] Compaction folds journal into snapshot")
+
+        # A torn trailing record is ignored
+        store.update_task(3, text="Renamed")
+        with open(store.journal_path, 'a') as f:
+            f.write('{"op": "delete", "id"')
+        reloaded = JournalTaskStore(test_file).load_tasks()
+        assert [t.text for t in reloaded] == ["Task 0", "Renamed"]
+        print("[OK] Incomplete journal record ignored")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        import threading
+
+        store = JournalTaskStore(os.path.join(tmp, "tasks.json"))
+        store.add_tasks([Task("One", CAT_URGENT), Task("Two", CAT_URGENT)])
+        cached_one = store._current_tasks()[0]
+        seen = []
+        with store.batch():
+            store.toggle_task(1)
+            store.update_task(2, text="Renamed")
+            assert store.get_task(1).completed, "The batch should see its own changes"
+            reader = threading.Thread(target=lambda: seen.extend(
+                (t.completed, t.text) for t in store.get_tasks_for_week(get_week_start())))
+            reader.start()
+            reader.join()
+        assert seen == [(False, "One"), (False, "Two")], seen
+        assert not cached_one.completed, "Cached task was changed in place"
+        assert store.get_task(1).completed and store.get_task(2).text == "Renamed"
+        print("[OK] Other threads only see a batch's records once they are written")
+
+        # A failed append leaves the cache as it was
+        from unittest.mock import patch
+        with patch("journal_storage.open", create=True, side_effect=PermissionError("read-only")):
+            try:
+                store.toggle_task(2)
+                assert False, "Failed append should raise"
+            except IOError:
+                pass
+        assert [t.completed for t in store.load_tasks()] == [True, False]
+        print("[OK] Failed append is never visible")
+
+    print("[OK] Test 7 PASSED")
+
+
+def test_sqlite_storage():
+    """SQLite backend matches the TaskStore interface and imports JSON."""
+    print("\n=== Test 8: SQLite Storage ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, "tasks.json")
+        json_store = TaskStore(json_file)
+        json_store.add_task(Task("Imported", CAT_URGENT))
+        json_store.add_task(Task("Other week", CAT_URGENT, week_start="2020-01-06"))
+
+        store = SQLiteTaskStore(os.path.join(tmp, "tasks.db"))
+        assert store.import_json(json_file) == 2
+        assert store.import_json(json_file) == 2, "Re-import should be idempotent"
+        assert [t.id for t in store.load_tasks()] == [1, 2]
+        print("[OK] JSON import preserves IDs")
+
+        task = Task("Added", CAT_URGENT)
+        store.add_task(task)
+        assert task.id == 3, f"Expected ID 3, got {task.id}"
+        week = task.week_start
+        assert store.get_task_count_by_category(week, CAT_URGENT) == 2
+        assert store.toggle_task(3).completed
+        assert store.get_task_count_by_category(week, CAT_URGENT) == 1
+        assert store.update_task(1, category=CAT_IMPORTANT).category == CAT_IMPORTANT
+        assert store.delete_task(99) is None
+        assert [t.text for t in store.get_tasks_for_week("2020-01-06")] == ["Other week"]
+        print("[OK] Indexed queries and single-row updates work")
+
+        import threading
+        in_batch = threading.Event()
+        release = threading.Event()
+
+        def slow_batch():
+            with store.batch():
+                store.add_task(Task("Uncommitted", CAT_URGENT))
+                assert len(store.get_tasks_for_week(week)) == 3, "A batch should see its own rows"
+                in_batch.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=slow_batch)
+        writer.start()
+        in_batch.wait(5)
+        seen = []
+        reader = threading.Thread(target=lambda: seen.append(
+            ([t.text for t in store.get_tasks_for_week(week)], store.get_version())))
+        reader.start()
+        reader.join(2)
+        finished = not reader.is_alive()
+        release.set()
+        writer.join()
+        reader.join()
+        assert finished, "Read waited for the open write transaction"
+        assert "Uncommitted" not in seen[0][0] and seen[0][1] < store.get_version()
+        assert "Uncommitted" in [t.text for t in store.get_tasks_for_week(week)]
+        print("[OK] Reads don't wait for a write transaction and see committed rows only")
+        store.close()
+
+    print("[OK] Test 8 PASSED")
+
+
+def test_write_queue_group_commit():
+    """Mutations queued together are committed with one save."""
+    print("\n=== Test 9: Group Commit ===")
+
+    class CountingStore(TaskStore):
+        writes = 0
+
+        def _update_cache(self, tasks, counts=None):
+            CountingStore.writes += 1
+            super()._update_cache(tasks, counts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CountingStore(os.path.join(tmp, "tasks.json"), cache=True)
+        for i in range(3):
+            store.add_task(Task(f"Task {i}", CAT_IMPORTANT))
+        CountingStore.writes = 0
+
+        writer = WriteQueue(store, window=0.2)
+        futures = [writer.submit(lambda s, i=i: s.toggle_task(i % 3 + 1)) for i in range(7)]
+        futures.append(writer.submit(lambda s: s.delete_task(99)))
+        futures.append(writer.submit(lambda s: s.update_task(1, category="bogus")))
+        writer.close()
+
+        assert CountingStore.writes == 1, f"Expected 1 save, got {CountingStore.writes}"
+        assert [f.result().completed for f in futures[:3]] == [True, True, True]
+        assert futures[7].result() is None, "Missing task should resolve to None"
+        assert isinstance(futures[8].exception(), ValueError), "Per-op errors go to their own future"
+        completed = [t.completed for t in TaskStore(store.filepath).load_tasks()]
+        assert completed == [True, False, False], f"Unexpected final state: {completed}"
+        print("[OK] 9 mutations committed with a single save")
+
+    print("[OK] Test 9 PASSED")
+
+
+def test_sharded_storage():
+    """Sharded backend keeps one file per week and splits tasks.json."""
+    print("\n=== Test 10: Sharded Storage ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, "tasks.json")
+        json_store = TaskStore(json_file)
+        json_store.add_task(Task("Old", CAT_URGENT, week_start="2020-01-06"))
+        json_store.add_task(Task("Current", CAT_URGENT))
+
+        shard_dir = os.path.join(tmp, "tasks")
+        store = ShardedTaskStore(shard_dir)
+        assert store.import_json(json_file) == 2
+        week = get_week_start()
+        assert sorted(os.listdir(shard_dir)) == sorted(["manifest.json", f"week-{week}.json", "week-2020-01-06.json"])
+        print("[OK] Migration splits history into week files")
+
+        old_shard = os.path.join(shard_dir, "week-2020-01-06.json")
+        old_mtime = os.stat(old_shard).st_mtime_ns
+        task = Task("Added", CAT_URGENT)
+        store.add_task(task)
+        assert task.id == 3, f"Expected ID 3, got {task.id}"
+        assert store.toggle_task(2).completed
+        assert store.complete_week(week) == 1
+        assert store.get_task_count_by_category(week, CAT_URGENT) == 0
+        assert os.stat(old_shard).st_mtime_ns == old_mtime, "Old week's file should be untouched"
+        print("[OK] Current-week operations only touch the current week's file")
+
+        assert store.delete_week(week) == 2
+        assert not os.path.exists(os.path.join(shard_dir, f"week-{week}.json"))
+        store.add_task(Task("After delete", CAT_URGENT))
+        assert [t.id for t in store.load_tasks()] == [1, 4], "IDs must come from the manifest counter"
+        print("[OK] delete_week removes the shard; ID counter persists")
+
+        from unittest.mock import patch
+        import sharded_storage
+        loads = store.stats.loads
+        with patch("sharded_storage.write_json_atomic", wraps=sharded_storage.write_json_atomic) as write:
+            store.add_task(Task("One write each", CAT_URGENT))
+        assert [call.args[0] for call in write.call_args_list] == [
+            os.path.join(shard_dir, f"week-{week}.json"), os.path.join(shard_dir, "manifest.json")]
+        assert [t.text for t in store.get_tasks_for_week(week)] == ["After delete", "One write each"]
+        assert store.stats.loads == loads, "Written shard was parsed again"
+        print("[OK] One shard and one manifest write per add, shard kept in memory")
+
+        # A crash between the shard and the manifest write leaves IDs in a
+        # shard that the manifest counter doesn't cover yet
+        orphan = Task("Orphan", CAT_URGENT, task_id=9, week_start="2020-01-06")
+        with open(old_shard, 'w') as f:
+            json.dump({'tasks': [orphan.to_dict()]}, f)
+        task = Task("After crash", CAT_URGENT)
+        ShardedTaskStore(shard_dir).add_task(task)
+        assert task.id == 10, f"Expected ID 10 after the orphaned shard, got {task.id}"
+        print("[OK] IDs in shards newer than the manifest are never reused")
+
+    print("[OK] Test 10 PASSED")
+
+
+def test_id_sequence_never_reuses():
+    """IDs come from a persisted sequence and survive deletes and restarts."""
+    print("\n=== Test 11: Persistent ID Sequence ===")
+
+    backends = [
+        ("json", lambda tmp: TaskStore(os.path.join(tmp, "tasks.json"))),
+        ("journal", lambda tmp: JournalTaskStore(os.path.join(tmp, "tasks.json"), compact_every=4)),
+        ("sqlite", lambda tmp: SQLiteTaskStore(os.path.join(tmp, "tasks.db"))),
+        ("sharded", lambda tmp: ShardedTaskStore(os.path.join(tmp, "tasks"))),
+    ]
+    for name, make_store in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            batch = [Task(f"Bulk {i}", CAT_IMPORTANT) for i in range(3)]
+            store.add_tasks(batch)
+            assert [t.id for t in batch] == [1, 2, 3], f"{name}: bulk IDs {[t.id for t in batch]}"
+
+            store.delete_task(3)
+            task = Task("After delete", CAT_IMPORTANT)
+            store.add_task(task)
+            assert task.id == 4, f"{name}: ID 3 was reused"
+
+            store.delete_task(4)
+            task = Task("After restart", CAT_IMPORTANT)
+            make_store(tmp).add_task(task)
+            assert task.id == 5, f"{name}: sequence not persisted, got {task.id}"
+            print(f"[OK] {name}: IDs never reused")
+
+    print("[OK] Test 11 PASSED")
+
+
+def test_compact_task_representation():
+    """Tasks use __slots__, intern repeated strings and load without validation."""
+    print("\n=== Test 12: Compact Task Representation ===")
+
+    record = {'id': 1, 'text': "Stored", 'category': ''.join(['imp', 'ortant']),
+              'completed': False, 'week_start': ''.join(['2025-', '01-27']),
+              'created_at': "2025-01-27T09:00:00"}
+    task = Task.from_storage(record)
+    assert not hasattr(task, '__dict__'), "Task should not carry a __dict__"
+    assert task.category is Task.from_storage(dict(record)).category, "category not interned"
+    assert task.week_start is Task("Other", CAT_IMPORTANT, week_start="2025-01-27").week_start
+    assert task.to_dict() == record
+    print("[OK] Slots and interned category/week_start")
+
+    # The trusted path doesn't re-validate; from_dict still does
+    legacy = dict(record, category="retired_category")
+    assert Task.from_storage(legacy).category == "retired_category"
+    try:
+        Task.from_dict(legacy)
+        assert False, "from_dict should validate the category"
+    except ValueError:
+        pass
+    print("[OK] from_storage skips validation, from_dict keeps it")
+
+    print("[OK] Test 12 PASSED")
+
+
+def test_streaming_queries():
+    """Uncached queries stream the file record by record."""
+    print("\n=== Test 13: Streaming Queries ===")
+
+    import storage
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = TaskStore(test_file)
+        store.add_tasks([Task(f"Task {i} \"quoted\" [x], {{y}}", CAT_URGENT if i % 2 else CAT_IMPORTANT,
+                              week_start="2025-01-27" if i < 50 else "2025-02-03")
+                         for i in range(100)])
+        store.toggle_task(2)
+
+        # Tiny chunks force records to span chunk boundaries
+        records = list(storage.iter_json_tasks(test_file, chunk_size=7))
+        with open(test_file) as f:
+            assert records == json.load(f)['tasks'], "Streamed records differ from json.load"
+        print("[OK] Streaming parser matches json.load")
+
+        week = store.get_tasks_for_week("2025-02-03")
+        assert [t.id for t in week] == list(range(51, 101))
+        assert store.count_tasks("2025-01-27", CAT_URGENT, completed=False) == 24
+        assert store.count_tasks(completed=True) == 1
+        assert store.count_tasks(limit=3) == 3
+        assert store.has_tasks(week_start="2025-02-03") and not store.has_tasks(week_start="2020-01-06")
+        assert store.get_task(60).text.startswith("Task 59")
+        print("[OK] Filters, counts and early termination work")
+
+        # The cached store gives the same answers
+        cached = TaskStore(test_file, cache=True)
+        assert [t.id for t in cached.get_tasks_for_week("2025-02-03")] == list(range(51, 101))
+        assert cached.count_tasks("2025-01-27", CAT_URGENT, completed=False) == 24
+
+    print("[OK] Test 13 PASSED")
+
+
+def test_async_store_adapter():
+    """Async adapter runs reads on the pool and writes on the writer thread."""
+    print("\n=== Test 14: Async Store Adapter ===")
+
+    import asyncio
+    from async_storage import AsyncTaskStore
+
+    async def exercise(async_store):
+        tasks = [Task(f"Task {i}", CAT_URGENT) for i in range(3)]
+        await asyncio.gather(*(async_store.write(lambda s, t=t: s.add_task(t)) for t in tasks))
+        toggled = await async_store.write(lambda s: s.toggle_task(2))
+        week = await async_store.get_tasks_for_week(tasks[0].week_start)
+        count = await async_store.get_task_count_by_category(tasks[0].week_start, CAT_URGENT)
+        return toggled, week, count
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async_store = AsyncTaskStore(TaskStore(os.path.join(tmp, "tasks.json"), cache=True))
+        toggled, week, count = asyncio.run(exercise(async_store))
+        async_store.close()
+        assert toggled.completed and sorted(t.id for t in week) == [1, 2, 3] and count == 2
+        print("[OK] Awaited reads and writes return store results")
+
+    print("[OK] Test 14 PASSED")
+
+
+def test_data_version():
+    """Every committed change bumps the store's data version, reads don't."""
+    print("\n=== Test 15: Data Version ===")
+
+    backends = [
+        ("json", lambda tmp: TaskStore(os.path.join(tmp, "tasks.json"))),
+        ("json-cached", lambda tmp: TaskStore(os.path.join(tmp, "tasks.json"), cache=True)),
+        ("journal", lambda tmp: JournalTaskStore(os.path.join(tmp, "tasks.json"), compact_every=3)),
+        ("sqlite", lambda tmp: SQLiteTaskStore(os.path.join(tmp, "tasks.db"))),
+        ("sharded", lambda tmp: ShardedTaskStore(os.path.join(tmp, "tasks"))),
+    ]
+    for name, make_store in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            versions = [store.get_version()]
+            store.add_tasks([Task(f"Task {i}", CAT_IMPORTANT) for i in range(2)])
+            versions.append(store.get_version())
+            store.load_tasks()
+            store.toggle_task(1)
+            versions.append(store.get_version())
+            store.update_task(2, text="Renamed")
+            store.delete_task(1)
+            versions.append(store.get_version())
+            assert versions == sorted(set(versions)), f"{name}: versions {versions} not increasing"
+            assert store.get_version() == versions[-1], f"{name}: a read changed the version"
+            assert make_store(tmp).get_version() == versions[-1], f"{name}: version not persisted"
+            print(f"[OK] {name}: versions {versions}")
+
+    # A cached store notices changes written by another process
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        cached = TaskStore(test_file, cache=True)
+        cached.add_task(Task("Web", CAT_IMPORTANT))
+        before = cached.get_version()
+        TaskStore(test_file).add_task(Task("CLI", CAT_IMPORTANT))
+        assert cached.get_version() > before, "External write not reflected in version"
+        print("[OK] Cached store picks up external writes")
+
+    print("[OK] Test 15 PASSED")
+
+
+def test_change_feed():
+    """Committed write batches become versioned change events."""
+    print("\n=== Test 16: Change Feed ===")
+
+    from change_feed import ChangeFeed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = TaskStore(test_file, cache=True)
+        feed = ChangeFeed(maxlen=3)
+        feed.start(None, store.get_version())
+        start = feed.version
+        writer = WriteQueue(store, listener=feed)
+
+        def add(s):
+            task = Task("Live", CAT_URGENT)
+            s.add_task(task)
+            feed.task_changed(task)
+            return task
+
+        def delete(s):
+            task = s.delete_task(1)
+            feed.task_deleted(task)
+            return task
+
+        writer.submit(add).result()
+        writer.submit(delete).result()
+        events = feed.since(start)
+        assert [e['version'] for e in events] == [start + 1, start + 2]
+        assert events[0]['changes'][0]['task']['text'] == "Live"
+        week = events[0]['changes'][0]['task']['week_start']
+        assert events[1]['changes'] == [{'op': 'delete', 'id': 1, 'week_start': week}]
+        assert feed.since(start + 2) == []
+        assert feed.week_version(week) == start + 2 and feed.week_version("2020-01-06") == start
+        print("[OK] One event per committed batch, tagged with the store version")
+
+        # Failed mutations record nothing and don't produce events
+        def rejected(s):
+            raise ValueError("Category is full")
+        try:
+            writer.submit(rejected).result()
+        except ValueError:
+            pass
+        assert feed.version == start + 2
+        print("[OK] Rejected mutations publish nothing")
+
+        # Changes from another process show up as a resync
+        TaskStore(test_file).add_task(Task("From CLI", CAT_URGENT))
+        feed.check_version(store.get_version())
+        assert feed.since(start + 2)[-1].get('resync'), "External change not announced"
+        print("[OK] External change announced as resync")
+
+        # Clients further behind than the log reaches must resync
+        writer.submit(add).result()
+        writer.submit(add).result()
+        writer.close()
+        assert feed.since(start) is None
+        assert feed.since(feed.version + 1) is None
+        print("[OK] Resume beyond the log's reach asks for a resync")
+
+    print("[OK] Test 16 PASSED")
+
+
+def test_active_counts():
+    """Limit checks use maintained per-(week, category) counts."""
+    print("\n=== Test 17: Active Task Counts ===")
+
+    import storage
+
+    week = "2025-01-27"
+    backends = [
+        ("json", lambda tmp: TaskStore(os.path.join(tmp, "tasks.json"))),
+        ("json-cached", lambda tmp: TaskStore(os.path.join(tmp, "tasks.json"), cache=True)),
+        ("journal", lambda tmp: JournalTaskStore(os.path.join(tmp, "tasks.json"))),
+        ("sqlite", lambda tmp: SQLiteTaskStore(os.path.join(tmp, "tasks.db"))),
+        ("sharded", lambda tmp: ShardedTaskStore(os.path.join(tmp, "tasks"))),
+    ]
+    for name, make_store in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            store.add_tasks([Task(f"Task {i}", CAT_URGENT, week_start=week) for i in range(3)]
+                            + [Task("Old", CAT_URGENT, week_start="2025-01-20")])
+            try:
+                storage.check_category_limit(store, week, CAT_URGENT)
+                assert False, f"{name}: full category not detected"
+            except CategoryFullError as e:
+                assert (e.count, e.limit) == (3, 3)
+            try:
+                storage.check_category_limit(store, week, "someday")
+                assert False, f"{name}: unknown category accepted"
+            except ValueError:
+                pass
+
+            store.toggle_task(1)
+            store.update_task(2, category=CAT_IMPORTANT)
+            assert storage.check_category_limit(store, week, CAT_URGENT) == 1
+            assert store.get_task_count_by_category(week, CAT_IMPORTANT) == 1
+            store.toggle_task(1)
+            store.delete_task(3)
+            store.complete_week("2025-01-20")
+            assert store.get_task_count_by_category(week, CAT_URGENT) == 1
+            assert store.get_task_count_by_category("2025-01-20", CAT_URGENT) == 0
+
+            # Counts seen inside a batch include the batch's own changes
+            with store.batch():
+                store.add_task(Task("In batch", CAT_URGENT, week_start=week))
+                assert store.get_task_count_by_category(week, CAT_URGENT) == 2
+                store.delete_week(week)
+                assert store.get_task_count_by_category(week, CAT_URGENT) == 0
+
+            expected = storage.count_active_tasks(make_store(tmp).load_tasks())
+            for (task_week, category) in [(week, CAT_URGENT), (week, CAT_IMPORTANT)]:
+                assert store.get_task_count_by_category(task_week, category) == \
+                    expected.get((task_week, category), 0), f"{name}: counts drifted"
+            print(f"[OK] {name}: counts follow adds, toggles, moves and deletes")
+
+    # A cached store recounts after a change from another process
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        cached = TaskStore(test_file, cache=True)
+        cached.add_task(Task("Web", CAT_URGENT, week_start=week))
+        assert cached.get_task_count_by_category(week, CAT_URGENT) == 1
+        TaskStore(test_file).add_task(Task("CLI", CAT_URGENT, week_start=week))
+        assert cached.get_task_count_by_category(week, CAT_URGENT) == 2
+        print("[OK] External changes are counted")
+
+    print("[OK] Test 17 PASSED")
+
+
+def test_store_stats_and_metrics():
+    """Stores count loads and saves; metrics render in Prometheus format."""
+    print("\n=== Test 18: Store Statistics and Metrics ===")
+
+    import metrics
+
+    week = "2025-01-27"
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = TaskStore(test_file)
+        store.add_task(Task("One", CAT_URGENT, week_start=week))
+        first_size = os.path.getsize(test_file)
+        store.add_task(Task("Two", CAT_IMPORTANT, week_start=week))
+        stats = store.stats.snapshot()
+        assert stats['saves'] == 2
+        assert stats['bytes_written'] == first_size + os.path.getsize(test_file)
+        print("[OK] Saves and bytes written are counted")
+
+        store.load_tasks()
+        stats = store.stats.snapshot()
+        assert stats['loads'] >= 1 and stats['bytes_read'] >= os.path.getsize(test_file)
+        print("[OK] Loads and bytes read are counted")
+
+        store.toggle_task(2)
+        assert store.get_active_counts() == {(week, CAT_URGENT): 1}
+        sqlite_store = SQLiteTaskStore(os.path.join(tmp, "tasks.db"))
+        sqlite_store.import_json(test_file)
+        assert sqlite_store.get_active_counts() == {(week, CAT_URGENT): 1}
+        sqlite_store.close()
+        print("[OK] Active counts per week and category")
+
+    requests = metrics.RequestMetrics()
+    requests.observe("GET", "/api/tasks", 200, 0.003)
+    requests.observe("GET", "/api/tasks", 200, 0.2)
+    lines = metrics.render_requests(requests)
+    assert 'todo_http_requests_total{method="GET",route="/api/tasks",status="200"} 2' in lines
+    assert 'todo_http_request_duration_seconds_bucket{method="GET",route="/api/tasks",le="0.005"} 1' in lines
+    assert 'todo_http_request_duration_seconds_bucket{method="GET",route="/api/tasks",le="+Inf"} 2' in lines
+    lines = metrics.render_tasks({(week, 'say "hi"'): 1}, 7)
+    assert 'todo_active_tasks{week_start="2025-01-27",category="say \\"hi\\""} 1' in lines
+    assert "todo_data_version 7" in lines
+    print("[OK] Prometheus text format with cumulative buckets and escaped labels")
+
+    timing = metrics.ServerTiming()
+    timing.add("storage-load", 0.001)
+    timing.add("storage-load", 0.0005)
+    assert timing.header(0.002) == "storage-load;dur=1.500, total;dur=2.000"
+    print("[OK] Server-Timing header")
+
+    print("[OK] Test 18 PASSED")
+
+
+def test_tracing_hooks_and_profiler():
+    """Tracing hooks see storage spans; the sampler sees busy threads."""
+    print("\n=== Test 19: Tracing Hooks and Profiler ===")
+
+    import threading
+    import time
+    import profiling
+    import tracing
+
+    spans = []
+
+    def hook(name, seconds, attrs):
+        spans.append((name, attrs))
+
+    tracing.add_hook(hook)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TaskStore(os.path.join(tmp, "tasks.json"))
+            store.save_tasks([Task.from_dict(Task("One", CAT_URGENT, task_id=1).to_dict())])
+            store.load_tasks()
+            names = [name for name, _ in spans]
+            for expected in ("Task.from_dict", "TaskStore.save_tasks", "TaskStore.write", "store.write",
+                             "TaskStore.load_tasks", "TaskStore.read", "store.read"):
+                assert expected in names, f"missing span {expected}"
+            assert dict(spans)["store.write"]["bytes"] > 0
+            print("[OK] Hooks receive spans for load/save, file I/O and Task.from_dict")
+
+            # The web app reads through the cache, never calling load_tasks
+            spans.clear()
+            cached = TaskStore(os.path.join(tmp, "tasks.json"), cache=True)
+            cached.get_tasks_for_week(get_week_start())
+            cached.get_tasks_for_week(get_week_start())
+            assert [name for name, _ in spans].count("TaskStore.read") == 1, spans
+
+            spans.clear()
+            journal = JournalTaskStore(os.path.join(tmp, "journal.json"))
+            journal.add_task(Task("Two", CAT_URGENT))
+            journal.invalidate_cache()
+            journal.get_tasks_for_week(get_week_start())
+            names = [name for name, _ in spans]
+            assert names.count("JournalTaskStore.write") == 1, names
+            assert names.count("JournalTaskStore.read") == 1, names
+            print("[OK] One read span per load on the cached and journal paths")
+    finally:
+        tracing.remove_hook(hook)
+    assert not tracing.active
+
+    tracing.set_slow_threshold(0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            TaskStore(os.path.join(tmp, "tasks.json")).save_tasks([Task("Three", CAT_URGENT, task_id=1)])
+        assert tracing.recent_slow_ops()[-1]["name"] == "TaskStore.save_tasks"
+    finally:
+        tracing.set_slow_threshold(None)
+    print("[OK] Slow operations above the threshold are logged")
+
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy")
+    worker.start()
+    try:
+        stacks, rounds = profiling.sample_stacks(0.2, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+    assert rounds > 0
+    assert any(stack.startswith("thread busy;") and "busy_loop" in stack for stack in stacks)
+    assert "busy_loop" in profiling.format_top(stacks, rounds)
+    print("[OK] Sampling profiler collects collapsed stacks")
+
+    print("[OK] Test 19 PASSED")
+
+
+def _imported_modules(args, env=None):
+    """Run Python with -X importtime and return (stdout, {module: cumulative us})."""
+    import subprocess
+    import sys
+
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return result.stdout, modules
+
+
+def test_cli_startup_and_daemon():
+    """The CLI imports only what it needs and can run through the daemon."""
+    print("\n=== Test 20: CLI Startup and Daemon ===")
+
+    import threading
+    import time
+    import todo_daemon
+
+    # Modules only the web app, the writer thread or the other backends need
+    heavy = {"logging", "concurrent.futures", "queue", "asyncio", "sqlite3", "socketserver",
+             "journal_storage", "sqlite_storage", "sharded_storage"}
+    _, modules = _imported_modules(["-c", "import todo"])
+    assert "todo" in modules
+    unexpected = heavy & modules.keys()
+    assert not unexpected, f"CLI imports {sorted(unexpected)}"
+    print(f"[OK] import todo: {modules['todo'] / 1000:.1f} ms, none of the heavy modules")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TODO_STORAGE="json", TODO_STORAGE_PATH=os.path.join(tmp, "tasks.json"),
+                   TODO_SOCKET=os.path.join(tmp, "todo.sock"))
+        env.pop("TODO_NO_DAEMON", None)
+        saved = {key: os.environ.get(key) for key in ("TODO_STORAGE", "TODO_STORAGE_PATH", "TODO_SOCKET")}
+        os.environ.update({key: env[key] for key in saved})
+        try:
+            daemon = todo_daemon.TodoDaemon()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(env["TODO_SOCKET"]):
+                    break
+                time.sleep(0.01)
+
+            output, modules = _imported_modules(["todo.py", "add", "Via daemon", "-c", CAT_URGENT], env)
+            assert "Added task: Via daemon" in output
+            assert "storage" not in modules and "argparse" not in modules
+            print("[OK] Commands run in the daemon without importing storage or argparse")
+
+            output, _ = _imported_modules(["todo.py", "complete", "999"], env)
+            assert "Task not found: 999" in output
+            print("[OK] Output of failing commands comes back from the daemon")
+        finally:
+            daemon.stop()
+            thread.join()
+        assert not os.path.exists(env["TODO_SOCKET"])
+
+        output, modules = _imported_modules(["todo.py", "list"], env)
+        assert "Via daemon" in output and "storage" in modules
+        print("[OK] Without a daemon the CLI reads the file directly")
+
+    print("[OK] Test 20 PASSED")
+
+
+def test_change_log_delta():
+    """changes_since condenses the change log into one change per task."""
+    print("\n=== Test 21: Delta Sync From the Change Log ===")
+
+    from change_feed import ChangeFeed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "tasks.json")
+        store = TaskStore(test_file, cache=True)
+        feed = ChangeFeed(maxlen=5)
+        feed.start(None, store.get_version())
+        start = feed.version
+        writer = WriteQueue(store, listener=feed)
+
+        def add(text):
+            def run(s):
+                task = Task(text, CAT_URGENT)
+                s.add_task(task)
+                feed.task_changed(task)
+                return task.id
+            return writer.submit(run).result()
+
+        def toggle(task_id):
+            def run(s):
+                feed.task_changed(s.toggle_task(task_id))
+            writer.submit(run).result()
+
+        def delete(task_id):
+            def run(s):
+                feed.task_deleted(s.delete_task(task_id))
+            writer.submit(run).result()
+
+        first, second = add("First"), add("Second")
+        toggle(first)
+        toggle(first)
+        delete(second)
+        version, changes = feed.changes_since(start)
+        assert version == feed.version == start + 5
+        assert [(c['op'], c['task']['id'] if c['op'] == 'upsert' else c['id']) for c in changes] == \
+            [('upsert', first), ('delete', second)]
+        assert changes[0]['task']['completed'] is False
+        print("[OK] Five writes to two tasks come back as two changes")
+
+        assert feed.changes_since(start + 4) == (start + 5, [changes[1]])
+        assert feed.changes_since(feed.version) == (feed.version, [])
+        print("[OK] Later versions only get what changed after them")
+
+        # Older than the log reaches, newer than the feed, or an
+        # undescribed external change in between: resync
+        add("Third")
+        assert feed.changes_since(start) is None
+        assert feed.changes_since(feed.version + 1) is None
+        seen = feed.version
+        TaskStore(test_file).add_task(Task("From CLI", CAT_URGENT))
+        feed.check_version(store.get_version())
+        add("Fourth")
+        assert feed.changes_since(seen) is None
+        assert len(feed.changes_since(feed.version - 1)[1]) == 1
+        writer.close()
+        print("[OK] Gaps the log can't describe ask for a resync")
+
+    print("[OK] Test 21 PASSED")
+
+
+def test_week_range_queries():
+    """query_tasks pages through a range of weeks the same on every backend."""
+    print("\n=== Test 22: Week Range Queries ===")
+
+    weeks = ["2025-01-06", "2025-01-13", "2025-01-20", "2025-02-03"]
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, "tasks.json")
+        source = TaskStore(json_file)
+        # Added out of week order, so ID order alone isn't week order
+        source.add_tasks([Task(f"{week} #{i}", CAT_URGENT if i % 2 else CAT_IMPORTANT, week_start=week)
+                          for i in range(5) for week in reversed(weeks)])
+        source.toggle_task(1)
+
+        sqlite_store = SQLiteTaskStore(os.path.join(tmp, "tasks.db"))
+        sqlite_store.import_json(json_file)
+        sharded_store = ShardedTaskStore(os.path.join(tmp, "shards"))
+        sharded_store.import_json(json_file)
+        stores = {
+            "json": TaskStore(json_file),
+            "json+cache": TaskStore(json_file, cache=True),
+            "sqlite": sqlite_store,
+            "sharded": sharded_store,
+        }
+
+        def keys(tasks):
+            return [(task.week_start, task.id) for task in tasks]
+
+        def paged(store, **filters):
+            pages, after = [], None
+            while True:
+                page = store.query_tasks(after=after, limit=3, **filters)
+                pages.append(keys(page))
+                if len(page) < 3:
+                    return pages
+                after = (page[-1].week_start, page[-1].id)
+
+        expected = sorted((t.week_start, t.id) for t in source.load_tasks()
+                          if "2025-01-13" <= t.week_start <= "2025-01-20")
+        for name, store in stores.items():
+            tasks = store.query_tasks("2025-01-13", "2025-01-20")
+            assert keys(tasks) == expected, name
+            pages = paged(store, week_from="2025-01-13", week_to="2025-01-20")
+            assert [key for page in pages for key in page] == expected, name
+            assert all(len(page) == 3 for page in pages[:-1]), name
+            active = store.query_tasks(week_from="2025-01-20", category=CAT_URGENT, completed=False)
+            assert {t.week_start for t in active} == {"2025-01-20", "2025-02-03"}, name
+            assert all(t.category == CAT_URGENT and not t.completed for t in active), name
+            assert store.query_tasks(week_to="2025-01-06", completed=True) == [], name
+        print("[OK] Same pages from every backend, ordered by week and ID")
+
+        # Pages don't shift when tasks before the cursor are deleted
+        store = stores["json+cache"]
+        first = store.query_tasks(limit=3)
+        after = (first[-1].week_start, first[-1].id)
+        second = keys(store.query_tasks(after=after, limit=3))
+        store.delete_task(first[0].id)
+        assert keys(store.query_tasks(after=after, limit=3)) == second
+        sqlite_store.close()
+        print("[OK] Cursors stay valid while earlier tasks change")
+
+    print("[OK] Test 22 PASSED")
+
+
+def test_concurrent_cache_reads():
+    """Pool reads re-parsing after an outside write never undo the writer's state."""
+    print("\n=== Test 23: Concurrent Cache Reads ===")
+
+    import threading
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.json")
+        store = TaskStore(path, cache=True)
+        outside = TaskStore(path)
+        # The two writers stand for the web app and the CLI; they take turns,
+        # while the readers run freely against the shared cached store
+        write_turn = threading.Lock()
+        done = threading.Event()
+        seen_versions = []
+        errors = []
+
+        def read_loop():
+            versions = []
+            try:
+                while not done.is_set():
+                    store.get_tasks_for_week(get_week_start())
+                    versions.append(store.get_version())
+            except Exception as e:
+                errors.append(e)
+            seen_versions.append(versions)
+
+        def write_loop(writer):
+            try:
+                for i in range(40):
+                    with write_turn:
+                        writer.add_task(Task(f"Task {i}", CAT_URGENT))
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read_loop) for _ in range(4)]
+        writers = [threading.Thread(target=write_loop, args=(writer,)) for writer in (store, outside)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        assert not errors, errors
+        tasks = TaskStore(path).load_tasks()
+        ids = [task.id for task in tasks]
+        assert len(ids) == 80 and len(set(ids)) == 80, "IDs were reused or tasks lost"
+        assert TaskStore(path).get_version() == 80, "a save wrote a stale version"
+        assert store.get_version() == 80 and len(store.load_tasks()) == 80
+        for versions in seen_versions:
+            assert versions == sorted(versions), "a reader saw the version go backwards"
+        print("[OK] 80 adds from two writers under concurrent reads: unique IDs, version 80")
+
+    print("[OK] Test 23 PASSED")
+
+
 def run_all_tests():
     """Run all integration tests."""
     print("=" * 60)
@@ -230,6 +1160,24 @@ def run_all_tests():
         test_storage_operations()
         test_error_handling()
         test_python_standard_library_only()
+        test_cache_invalidation()
+        test_journal_storage()
+        test_sqlite_storage()
+        test_write_queue_group_commit()
+        test_sharded_storage()
+        test_id_sequence_never_reuses()
+        test_compact_task_representation()
+        test_streaming_queries()
+        test_async_store_adapter()
+        test_data_version()
+        test_change_feed()
+        test_active_counts()
+        test_store_stats_and_metrics()
+        test_tracing_hooks_and_profiler()
+        test_cli_startup_and_daemon()
+        test_change_log_delta()
+        test_week_range_queries()
+        test_concurrent_cache_reads()
 
         print("\n" + "=" * 60)
         print("ALL TESTS PASSED [OK]")
@@ -0,0 +1,288 @@
+"""HTTP tests for the web API (webapp.py).
+
+Each test runs the app with its own temporary tasks.json through
+FastAPI's TestClient. Run from the project directory, since the app
+serves static/ and templates/ from there.
+"""
+
+import importlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+from storage import TaskStore
+from task import Task, CAT_IMPORTANT, CAT_URGENT
+from week_utils import get_week_start
+
+
+@contextmanager
+def web_client(tmp):
+    """Yield (webapp module, started TestClient) using a tasks.json in tmp.
+
+    The app opens its store when imported, so the module is reloaded with
+    the storage environment pointing at tmp.
+    """
+    saved = {name: os.environ.get(name) for name in ('TODO_STORAGE', 'TODO_STORAGE_PATH')}
+    os.environ['TODO_STORAGE'] = 'json'
+    os.environ['TODO_STORAGE_PATH'] = os.path.join(tmp, 'tasks.json')
+    try:
+        import webapp
+        webapp = importlib.reload(webapp)
+        with TestClient(webapp.app) as client:
+            yield webapp, client
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def stored(tmp):
+    """Return (id, text, category, completed) of every task on disk."""
+    tasks = TaskStore(os.path.join(tmp, 'tasks.json')).load_tasks()
+    return sorted((t.id, t.text, t.category, t.completed) for t in tasks)
+
+
+def test_batch_rejects_as_a_whole():
+    """A batch with one bad operation writes nothing."""
+    print("\n=== Test 1: Batch Rejected as a Whole ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        TaskStore(os.path.join(tmp, 'tasks.json')).add_tasks(
+            [Task(f"Urgent {i}", CAT_URGENT) for i in range(2)])
+        with web_client(tmp) as (webapp, client):
+            before = stored(tmp)
+            version = webapp.change_feed.version
+
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'add', 'text': 'Third', 'category': CAT_URGENT},
+                {'op': 'add', 'text': 'Fourth', 'category': CAT_URGENT},
+            ]})
+            assert response.status_code == 400, response.text
+            assert CAT_URGENT in response.json()['detail']
+            assert stored(tmp) == before
+            print("[OK] Overfilling a category rejects every operation")
+
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'delete', 'id': 1},
+                {'op': 'update', 'id': 1, 'text': 'Edited after delete'},
+            ]})
+            assert response.status_code == 404, response.text
+            assert response.json()['detail'].startswith("Operation 1:")
+            assert stored(tmp) == before
+            print("[OK] Updating a task deleted earlier in the batch is a 404, nothing deleted")
+
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'add', 'text': '', 'category': CAT_URGENT},
+                {'op': 'add', 'category': CAT_URGENT},
+            ]})
+            assert response.status_code == 400, response.text
+            assert response.json()['detail'].startswith("Operation 1:")
+            assert stored(tmp) == before
+            print("[OK] Empty text is accepted as by POST /api/tasks, missing text is not")
+
+            assert webapp.change_feed.version == version
+            print("[OK] Rejected batches publish no change events")
+
+    print("[OK] Test 1 PASSED")
+
+
+def test_batch_limits_and_results():
+    """Limits apply to the batch's final state; results follow op order."""
+    print("\n=== Test 2: Batch Limits and Results ===")
+
+    week = get_week_start()
+    with tempfile.TemporaryDirectory() as tmp:
+        TaskStore(os.path.join(tmp, 'tasks.json')).add_tasks(
+            [Task(f"Urgent {i}", CAT_URGENT) for i in range(3)] + [Task("Important", CAT_IMPORTANT)])
+        with web_client(tmp) as (webapp, client):
+            version = webapp.change_feed.version
+
+            # Urgent is full, but completing one first leaves room at the end
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'add', 'text': 'Fits after all', 'category': CAT_URGENT},
+                {'op': 'toggle', 'id': 2},
+                {'op': 'delete', 'id': 4},
+                {'op': 'add', 'text': 'Second new', 'category': CAT_IMPORTANT},
+            ]})
+            assert response.status_code == 200, response.text
+            results = response.json()['results']
+            assert [r.get('text') for r in results] == ['Fits after all', 'Urgent 1', None, 'Second new']
+            assert results[0]['id'] == 5 and results[3]['id'] == 6
+            assert (results[1]['id'], results[1]['completed']) == (2, True)
+            assert results[2] == {'id': 4, 'deleted': True}
+            print("[OK] Full category accepted when the batch ends within the limit")
+            print("[OK] One result per operation, in order, with the created IDs")
+
+            assert stored(tmp) == [
+                (1, 'Urgent 0', CAT_URGENT, False),
+                (2, 'Urgent 1', CAT_URGENT, True),
+                (3, 'Urgent 2', CAT_URGENT, False),
+                (5, 'Fits after all', CAT_URGENT, False),
+                (6, 'Second new', CAT_IMPORTANT, False),
+            ]
+            print("[OK] Every operation was written")
+
+            events = webapp.change_feed.since(version)
+            assert [e['version'] for e in events] == [version + 1], events
+            assert len(events[0]['changes']) == 4
+            assert webapp.change_feed.week_version(week) == version + 1
+            print("[OK] One change event and one week version step per batch")
+
+    print("[OK] Test 2 PASSED")
+
+
+def test_batch_limits_in_other_weeks():
+    """Updates to another week's tasks are checked against that week's limits."""
+    print("\n=== Test 3: Batch Limits in Other Weeks ===")
+
+    other_week = "2020-01-06"
+    with tempfile.TemporaryDirectory() as tmp:
+        TaskStore(os.path.join(tmp, 'tasks.json')).add_tasks(
+            [Task(f"Urgent {i}", CAT_URGENT, week_start=other_week) for i in range(3)]
+            + [Task("Important", CAT_IMPORTANT, week_start=other_week),
+               Task("Done", CAT_URGENT, completed=True, week_start=other_week)])
+        with web_client(tmp) as (webapp, client):
+            before = stored(tmp)
+
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'update', 'id': 4, 'category': CAT_URGENT}]})
+            assert response.status_code == 400, response.text
+            assert CAT_URGENT in response.json()['detail'] and other_week in response.json()['detail']
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'toggle', 'id': 5}]})
+            assert response.status_code == 400, response.text
+            assert stored(tmp) == before
+            print("[OK] Recategorizing or reactivating past another week's limit is rejected")
+
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'delete', 'id': 1},
+                {'op': 'toggle', 'id': 5},
+            ]})
+            assert response.status_code == 200, response.text
+            print("[OK] Another week may end the batch within its limit")
+
+    print("[OK] Test 3 PASSED")
+
+
+def test_data_version_follows_every_week():
+    """Following the feed from a fetched week survives other weeks' changes."""
+    print("\n=== Test 4: Data Version Across Weeks ===")
+
+    week = get_week_start()
+    other_week = "2020-01-06"
+    with tempfile.TemporaryDirectory() as tmp:
+        TaskStore(os.path.join(tmp, 'tasks.json')).add_tasks(
+            [Task("This week", CAT_URGENT), Task("Old", CAT_URGENT, week_start=other_week)])
+        with web_client(tmp) as (webapp, client):
+            # Only another week changes, so this week's ETag stays behind
+            for i in range(3):
+                response = client.post('/api/tasks/batch', json={'operations': [
+                    {'op': 'update', 'id': 2, 'text': f'Old {i}'}]})
+                assert response.status_code == 200, response.text
+            response = client.get('/api/tasks')
+            etag = response.headers['etag']
+            data_version = int(response.headers['x-data-version'])
+            assert int(etag.strip('"').rpartition('.')[2]) < data_version
+            assert data_version == webapp.change_feed.version
+            page = client.get('/')
+            assert f'data-version="{data_version}"' in page.text
+            print("[OK] GET /api/tasks and the page carry the global data version")
+
+            # Starting from the week's version would replay the other week's
+            # edits, and resync for good once they fall out of the change log
+            response = client.post('/api/tasks/batch', json={'operations': [
+                {'op': 'toggle', 'id': 2}]})
+            assert response.status_code == 200, response.text
+            changes = client.get(f'/api/changes?since={data_version}').json()
+            assert not changes.get('resync'), changes
+            assert changes['version'] == data_version + 1
+            assert [(c['task']['id'], c['task']['completed']) for c in changes['changes']] == [(2, True)]
+            print("[OK] /api/changes from the data version doesn't resync after other weeks change")
+
+            response = client.get('/api/tasks', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert int(response.headers['x-data-version']) == data_version + 1
+            assert webapp.change_feed.week_version(week) < data_version
+            print("[OK] Other weeks' changes still revalidate with 304 and a newer data version")
+
+    print("[OK] Test 4 PASSED")
+
+
+def test_create_rejects_unknown_category():
+    """POST /api/tasks with an unknown category is a 400, not a server error."""
+    print("\n=== Test 5: Unknown Category ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with web_client(tmp) as (webapp, client):
+            response = client.post('/api/tasks', json={'text': 'Task', 'category': 'someday'})
+            assert response.status_code == 400, response.text
+            assert "Invalid category" in response.json()['detail']
+            assert stored(tmp) == []
+            print("[OK] Unknown category rejected with 400")
+
+    print("[OK] Test 5 PASSED")
+
+
+def test_debug_endpoints_gated_per_request():
+    """Debug endpoints answer local clients, and remote ones with the token."""
+    print("\n=== Test 6: Debug Endpoint Access ===")
+
+    saved = os.environ.pop('TODO_DEBUG_TOKEN', None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with web_client(tmp) as (webapp, client):
+                assert client.get('/debug/slow-ops').status_code == 404
+                local = TestClient(webapp.app, client=('127.0.0.1', 50000))
+                assert local.get('/debug/slow-ops').status_code == 200
+                print("[OK] Local clients only without a token")
+
+                os.environ['TODO_DEBUG_TOKEN'] = 'secret'
+                assert client.get('/debug/slow-ops', headers={'X-Debug-Token': 'wrong'}).status_code == 404
+                response = client.get('/debug/slow-ops', headers={'X-Debug-Token': 'secret'})
+                assert response.status_code == 200, response.text
+                print("[OK] Remote clients with the token, set while running")
+    finally:
+        if saved is None:
+            os.environ.pop('TODO_DEBUG_TOKEN', None)
+        else:
+            os.environ['TODO_DEBUG_TOKEN'] = saved
+
+    print("[OK] Test 6 PASSED")
+
+
+def run_all_tests():
+    """Run all web API tests."""
+    print("=" * 60)
+    print("WEB API TESTS")
+    print("=" * 60)
+
+    try:
+        test_batch_rejects_as_a_whole()
+        test_batch_limits_and_results()
+        test_batch_limits_in_other_weeks()
+        test_data_version_follows_every_week()
+        test_create_rejects_unknown_category()
+        test_debug_endpoints_gated_per_request()
+
+        print("\n" + "=" * 60)
+        print("ALL TESTS PASSED [OK]")
+        print("=" * 60)
+        return True
+
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n[FAIL] UNEXPECTED ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -1,9 +1,16 @@
-import argparse
 import sys
 
+if __name__ == '__main__':
+    # Shell prompts and scripts run todo constantly: when a daemon is serving
+    # this store, hand it the command before paying for the imports below
+    # (exits here if it ran the command)
+    import todo_daemon
+    todo_daemon.forward(sys.argv[1:])
+
+import argparse
 from datetime import datetime
-from task import Task, VALID_CATEGORIES, CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT
-from storage import TaskStore
+from task import Task, VALID_CATEGORIES, CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT, CategoryFullError
+from storage import create_store, check_category_limit
 from week_utils import get_week_start
 
 
@@ -21,6 +28,17 @@ DISPLAY_NAMES = {
     CAT_IMPORTANT: "Important (Priority 3)"
 }
 
+# Tasks read per query when listing a range of weeks
+LIST_PAGE_SIZE = 500
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD command-line date (argparse type)."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
+
 def add_task(args, store):
     """Add a new task to the current week with category checks.
 
@@ -33,28 +51,70 @@ def add_task(args, store):
     try:
         current_week = get_week_start()
         
-        # Check limit
-        count = store.get_task_count_by_category(current_week, args.category)
-        if count >= 3:
-            print(f"Error: Category '{DISPLAY_NAMES[args.category]}' is full (3/3 tasks).")
-            print("Complete or delete existing tasks in this category first.")
-            sys.exit(1)
+        # Check limit (active tasks only)
+        check_category_limit(store, current_week, args.category)
 
         task = Task(args.text, category=args.category)
         store.add_task(task)
         print(f"Added task: {task.text} (ID: {task.id}) -> {DISPLAY_NAMES[task.category]}")
     except IOError:
         sys.exit(1)
+    except CategoryFullError as e:
+        print(f"Error: Category '{DISPLAY_NAMES.get(e.category, e.category)}' is full ({e.count}/{e.limit} tasks).")
+        print("Complete or delete existing tasks in this category first.")
+        sys.exit(1)
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
+def print_week_tasks(tasks):
+    """Print one week's tasks under category headers, by priority.
+
+    Args:
+        tasks: List of Task objects from the same week
+    """
+    # Sort: Priority FIRST, then Completed status, then ID
+    # This keeps completed tasks under their respective Category headers
+    tasks.sort(key=lambda t: (PRIORITY_MAP.get(t.category, 99), t.completed, t.id))
+
+    current_cat = None
+    for task in tasks:
+        # Print header if category changes
+        if task.category != current_cat:
+            current_cat = task.category
+            print(f"\n--- {DISPLAY_NAMES.get(current_cat, current_cat)} ---")
+
+        status = "~~" if task.completed else ""
+        print(f"[{task.id}] {status}{task.text}{status}")
+
+
+def iter_task_range(store, week_from, week_to):
+    """Yield the tasks of a range of weeks, ordered by week and ID.
+
+    Reads LIST_PAGE_SIZE tasks at a time, so a long history is never
+    loaded at once.
+
+    Args:
+        store: TaskStore instance
+        week_from: First week (ISO date of its Monday), or None for the oldest
+        week_to: Last week (ISO date of its Monday), or None for the newest
+    """
+    after = None
+    while True:
+        page = store.query_tasks(week_from, week_to, after=after, limit=LIST_PAGE_SIZE)
+        yield from page
+        if len(page) < LIST_PAGE_SIZE:
+            return
+        after = (page[-1].week_start, page[-1].id)
+
+
 def list_tasks(args, store):
-    """List all tasks for the current week sorted by priority.
+    """List the current week's tasks, or those of a range of weeks, by priority.
 
     Args:
-        args: Parsed command arguments
+        args: Parsed command arguments with optional date_from and date_to
+            attributes (datetime.date)
         store: TaskStore instance
     """
     try:
@@ -63,28 +123,39 @@ def list_tasks(args, store):
         date_str = now.strftime("%m:%d:%Y %A")
         print(f"\n📅 {date_str}")
 
-        current_week = get_week_start()
-        tasks = store.get_tasks_for_week(current_week)
+        date_from = getattr(args, 'date_from', None)
+        date_to = getattr(args, 'date_to', None)
+        if date_from is None and date_to is None:
+            current_week = get_week_start()
+            tasks = store.get_tasks_for_week(current_week)
 
-        if not tasks:
-            print("No tasks for this week")
-            return
+            if not tasks:
+                print("No tasks for this week")
+                return
 
+            print_week_tasks(tasks)
+            return
 
-        # Sort: Priority FIRST, then Completed status, then ID
-        # This keeps completed tasks under their respective Category headers
-        tasks.sort(key=lambda t: (PRIORITY_MAP.get(t.category, 99), t.completed, t.id))
+        week_from = get_week_start(date_from) if date_from else None
+        week_to = get_week_start(date_to) if date_to else None
+        if week_from and week_to and week_from > week_to:
+            print("Error: --from must not be after --to")
+            sys.exit(1)
 
-        current_cat = None
-        for task in tasks:
-            # Print header if category changes
-            if task.category != current_cat:
-                current_cat = task.category
-                print(f"\n--- {DISPLAY_NAMES.get(current_cat, current_cat)} ---")
+        week_start, week_tasks = None, []
+        for task in iter_task_range(store, week_from, week_to):
+            if task.week_start != week_start:
+                if week_tasks:
+                    print_week_tasks(week_tasks)
+                week_start, week_tasks = task.week_start, []
+                print(f"\n=== Week of {week_start} ===")
+            week_tasks.append(task)
+
+        if week_start is None:
+            print("No tasks in this range")
+            return
+        print_week_tasks(week_tasks)
 
-            status = "~~" if task.completed else ""
-            print(f"[{task.id}] {status}{task.text}{status}")
-            
     except IOError:
         sys.exit(1)
 
@@ -97,19 +168,12 @@ def complete_task(args, store):
         store: TaskStore instance
     """
     try:
-        tasks = store.load_tasks()
-        task = None
-        for t in tasks:
-            if t.id == args.id:
-                task = t
-                break
+        task = store.update_task(args.id, completed=True)
 
         if task is None:
             print(f"Task not found: {args.id}")
             sys.exit(1)
 
-        task.completed = True
-        store.save_tasks(tasks)
         print(f"Marked complete: {task.text}")
     except IOError:
         sys.exit(1)
@@ -123,19 +187,12 @@ def delete_task(args, store):
         store: TaskStore instance
     """
     try:
-        tasks = store.load_tasks()
-        task = None
-        for t in tasks:
-            if t.id == args.id:
-                task = t
-                break
+        task = store.delete_task(args.id)
 
         if task is None:
             print(f"Task not found: {args.id}")
             sys.exit(1)
 
-        tasks.remove(task)
-        store.save_tasks(tasks)
         print(f"Deleted: {task.text}")
     except IOError:
         sys.exit(1)
@@ -151,16 +208,9 @@ def complete_all(args, store):
     """
     try:
         current_week = get_week_start()
-        tasks = store.load_tasks()
-        
-        count = 0
-        for task in tasks:
-            if task.week_start == current_week and not task.completed:
-                task.completed = True
-                count += 1
-        
+        count = store.complete_week(current_week)
+
         if count > 0:
-            store.save_tasks(tasks)
             print(f"Marked {count} tasks as complete.")
         else:
             print("No active tasks to complete for this week.")
@@ -178,14 +228,9 @@ def delete_all(args, store):
     """
     try:
         current_week = get_week_start()
-        tasks = store.load_tasks()
-        
-        # Keep tasks that are NOT in the current week
-        remaining_tasks = [t for t in tasks if t.week_start != current_week]
-        deleted_count = len(tasks) - len(remaining_tasks)
-        
+        deleted_count = store.delete_week(current_week)
+
         if deleted_count > 0:
-            store.save_tasks(remaining_tasks)
             print(f"Deleted {deleted_count} tasks from this week.")
         else:
             print("No tasks to delete for this week.")
@@ -194,8 +239,8 @@ def delete_all(args, store):
         sys.exit(1)
 
 
-def main():
-    """Main entry point for CLI."""
+def build_parser():
+    """Build the command-line parser for all subcommands."""
     parser = argparse.ArgumentParser(
         description="Eisenhower Matrix Weekly Manager",
         prog="todo"
@@ -212,6 +257,10 @@ def main():
 
     # List command
     list_parser = subparsers.add_parser('list', help='List current week tasks')
+    list_parser.add_argument('--from', dest='date_from', type=parse_date, metavar='YYYY-MM-DD',
+                             help='List the weeks from the one containing this date')
+    list_parser.add_argument('--to', dest='date_to', type=parse_date, metavar='YYYY-MM-DD',
+                             help='List the weeks up to the one containing this date')
 
     # Complete command
     complete_parser = subparsers.add_parser('complete', help='Mark task as complete')
@@ -225,14 +274,38 @@ def main():
     subparsers.add_parser('complete-all', help='Mark ALL current week tasks as complete')
     subparsers.add_parser('delete-all', help='Delete ALL tasks for the current week')
 
-    # Parse arguments
-    args = parser.parse_args()
+    # Background daemon that keeps the store loaded between commands
+    daemon_parser = subparsers.add_parser('daemon', help='Start, stop or check the background daemon')
+    daemon_parser.add_argument('action', choices=['start', 'stop', 'status'])
+
+    return parser
+
+
+def main(argv=None, store=None):
+    """Main entry point for CLI.
+
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+        store: Store to run against (default: the configured one); the
+            daemon passes the store it keeps loaded
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
 
     if args.command is None:
         parser.print_help()
         sys.exit(0)
 
-    store = TaskStore()
+    if args.command == 'daemon':
+        import todo_daemon
+        sys.exit(todo_daemon.control(args.action))
+
+    if store is None:
+        # An add checks the category limit and then saves: with the cache
+        # both use one parse and the maintained counts. Other commands
+        # stream the file instead, which keeps `list` over a long history
+        # from loading all of it.
+        store = create_store(cache=args.command == 'add')
 
     if args.command == 'add':
         add_task(args, store)
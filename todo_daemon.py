@@ -0,0 +1,280 @@
+"""Background daemon that keeps the task store loaded for todo.py.
+
+Every `todo` invocation otherwise pays for interpreter startup, imports and
+reading the task file. With the daemon running, todo.py connects to its
+Unix domain socket before importing anything else, hands over the command
+line and prints the reply; the daemon runs the command against a store it
+keeps in memory (cached, so edits from the web app or TUI are still seen).
+If no daemon is listening, todo.py quietly runs the command itself.
+
+    python todo.py daemon start     # start in the background
+    python todo.py daemon status
+    python todo.py daemon stop
+    python todo_daemon.py           # run in the foreground
+
+The socket lives next to the storage file (tasks.json.sock) unless
+TODO_SOCKET says otherwise; set TODO_NO_DAEMON=1 to always bypass it.
+
+Protocol: one JSON line per connection each way. Requests are
+{"argv": [...], "storage": [backend, path]} or {"control": "ping"|"stop"};
+replies to commands are {"stdout": ..., "stderr": ..., "code": n}, or
+{"fallback": true} if the daemon serves a different store.
+
+This module is imported on every CLI run, so the client half must only
+use modules Python loads anyway.
+"""
+
+import json
+import os
+import socket
+import sys
+
+# Seconds to wait for the daemon to accept a connection before running
+# the command directly
+CONNECT_TIMEOUT = 0.2
+# Seconds to wait for a command's reply
+REPLY_TIMEOUT = 30.0
+
+# Default storage locations per backend, as in storage.create_store
+# (repeated here so the client doesn't have to import storage)
+DEFAULT_PATHS = {'sqlite': 'tasks.db', 'sharded': 'tasks'}
+
+
+def storage_identity():
+    """Return [backend, absolute path] of the store the environment selects."""
+    backend = os.environ.get('TODO_STORAGE', 'json')
+    path = os.environ.get('TODO_STORAGE_PATH') or DEFAULT_PATHS.get(backend, 'tasks.json')
+    return [backend, os.path.abspath(path)]
+
+
+def socket_path():
+    """Return the daemon socket path for the selected store."""
+    return os.environ.get('TODO_SOCKET') or storage_identity()[1] + '.sock'
+
+
+def request(message, path=None, timeout=REPLY_TIMEOUT):
+    """Send one message to the daemon and return its reply.
+
+    Args:
+        message: JSON-serializable request
+        path: Socket path (default: socket_path())
+        timeout: Seconds to wait for the reply
+
+    Returns:
+        dict: The reply, or None if no daemon accepted the connection
+
+    Raises:
+        OSError: If the daemon accepted but then failed to answer
+        ValueError: If the reply was not valid JSON
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path or socket_path())
+        except OSError:
+            return None
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return json.loads(b''.join(chunks))
+
+
+def forward(argv):
+    """Run a todo.py command line through the daemon, if one is running.
+
+    Exits the process with the command's status when the daemon ran it;
+    returns None when the caller should run it directly.
+
+    Args:
+        argv: Command-line arguments without the program name
+    """
+    if os.environ.get('TODO_NO_DAEMON') or (argv and argv[0] == 'daemon'):
+        return None
+    try:
+        reply = request({'argv': argv, 'storage': storage_identity()})
+    except (OSError, ValueError) as e:
+        if argv and argv[0] == 'list':
+            # Read-only, so running it again directly is harmless
+            return None
+        print(f"Error: The todo daemon stopped answering ({e}) - check whether the command ran",
+              file=sys.stderr)
+        sys.exit(1)
+    if reply is None or reply.get('fallback'):
+        return None
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    sys.exit(reply['code'])
+
+
+class TodoDaemon:
+    """Serves todo.py commands over a Unix socket from one resident store."""
+
+    def __init__(self, path=None):
+        """Open the store selected by the environment.
+
+        Args:
+            path: Socket path (default: socket_path())
+        """
+        from storage import create_store
+
+        self.path = path or socket_path()
+        self.identity = storage_identity()
+        self.store = create_store(cache=True)
+        self.store.warm()
+        self._server = None
+
+    def handle(self, message):
+        """Answer one request (see the module docstring for the format)."""
+        import io
+        import threading
+        import traceback
+        from contextlib import redirect_stderr, redirect_stdout
+
+        import todo
+
+        control = message.get('control')
+        if control == 'ping':
+            return {'pid': os.getpid(), 'storage': self.identity}
+        if control == 'stop':
+            # shutdown() waits for serve_forever, so it can't run on this thread
+            threading.Thread(target=self._server.shutdown).start()
+            return {'pid': os.getpid()}
+        if message.get('storage') != self.identity:
+            return {'fallback': True}
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        code = 0
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                todo.main(message['argv'], store=self.store)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                # Keep serving; the client sees the error as the CLI would have shown it
+                traceback.print_exc()
+                code = 1
+        return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': code}
+
+    def serve_forever(self):
+        """Listen on the socket until stopped, then remove it.
+
+        Raises:
+            OSError: If another daemon is already listening on the socket
+        """
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                reply = daemon.handle(json.loads(line))
+                self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+        if os.path.exists(self.path):
+            if request({'control': 'ping'}, self.path, timeout=CONNECT_TIMEOUT) is not None:
+                raise OSError(f"A todo daemon is already listening on {self.path}")
+            # Left behind by a daemon that was killed
+            os.remove(self.path)
+
+        # Only the owner may connect: the daemon acts with the owner's files
+        old_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.UnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(old_umask)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            if hasattr(self.store, 'close'):
+                self.store.close()
+
+    def stop(self):
+        """Stop serve_forever from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def control(action):
+    """Start, stop or report on the daemon (`todo daemon <action>`).
+
+    Args:
+        action: 'start', 'stop' or 'status'
+
+    Returns:
+        int: Exit status
+    """
+    path = socket_path()
+    status = request({'control': 'ping'}, path, timeout=CONNECT_TIMEOUT)
+
+    if action == 'status':
+        if status is None:
+            print("Todo daemon is not running")
+            return 1
+        print(f"Todo daemon is running (pid {status['pid']}) on {path}")
+        return 0
+
+    if action == 'stop':
+        if status is None:
+            print("Todo daemon is not running")
+            return 1
+        request({'control': 'stop'}, path)
+        print(f"Stopped todo daemon (pid {status['pid']})")
+        return 0
+
+    if status is not None:
+        print(f"Todo daemon is already running (pid {status['pid']})")
+        return 0
+
+    import subprocess
+    import time
+
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), '--socket', path],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        status = request({'control': 'ping'}, path, timeout=CONNECT_TIMEOUT)
+        if status is not None:
+            print(f"Started todo daemon (pid {status['pid']}) on {path}")
+            return 0
+        time.sleep(0.05)
+    print(f"Error: Todo daemon did not start - try running python {os.path.basename(__file__)} to see why")
+    return 1
+
+
+def main():
+    """Run the daemon in the foreground."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve todo.py commands from a resident store")
+    parser.add_argument('--socket', help='Socket path (default: next to the storage file)')
+    args = parser.parse_args()
+
+    daemon = TodoDaemon(args.socket)
+    try:
+        daemon.serve_forever()
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
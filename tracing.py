@@ -0,0 +1,158 @@
+"""Span hooks and slow-operation log for the storage hot paths.
+
+Functions decorated with @traced (load_tasks/save_tasks in every backend,
+Task.from_dict for CLI and API input) report a span when tracing is active, as does every read and write a store
+makes ("TaskStore.read", "SQLiteTaskStore.write", ...; one span per load or
+save, whichever path it came from) and its raw file I/O ("store.read",
+"store.write"):
+
+    def print_span(name, seconds, attrs):
+        print(f"{name} took {seconds * 1000:.1f} ms {attrs}")
+
+    tracing.add_hook(print_span)
+
+Hooks are called on the thread that ran the operation and must be quick.
+Independently of hooks, spans slower than the slow-operation threshold are
+logged to the "todo.slow" logger and kept in a short list (recent_slow_ops).
+The threshold comes from the TODO_SLOW_OP_MS environment variable and can
+be changed while running with set_slow_threshold, e.g. from the web app's
+debug endpoints.
+
+While no hook is registered and no threshold is set, a traced call costs
+one extra function call and a flag check (about 0.4 µs for Task.from_dict).
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_hooks = []
+_slow_threshold = None
+_slow_ops = deque(maxlen=100)
+# True while there is a hook or a threshold, i.e. spans are worth timing
+active = False
+
+
+def _logger():
+    """Return the slow-operation logger.
+
+    logging is imported on first use: every CLI run imports this module
+    through task.py, and most never log anything.
+    """
+    import logging
+    return logging.getLogger("todo.slow")
+
+
+def _update_active():
+    """Recompute the fast-path flag (lock held)."""
+    global active
+    active = bool(_hooks) or _slow_threshold is not None
+
+
+def add_hook(hook):
+    """Register a callable hook(name, seconds, attrs) for every span."""
+    with _lock:
+        _hooks.append(hook)
+        _update_active()
+
+
+def remove_hook(hook):
+    """Unregister a hook added with add_hook."""
+    with _lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+        _update_active()
+
+
+def set_slow_threshold(seconds):
+    """Log spans slower than seconds, or stop logging with None."""
+    global _slow_threshold
+    with _lock:
+        _slow_threshold = seconds
+        _update_active()
+
+
+def get_slow_threshold():
+    """Return the slow-operation threshold in seconds, or None if off."""
+    return _slow_threshold
+
+
+def recent_slow_ops():
+    """Return the latest slow operations, oldest first.
+
+    Returns:
+        list: Dicts with name, seconds, attrs and time (epoch seconds)
+    """
+    with _lock:
+        return list(_slow_ops)
+
+
+def emit(name, seconds, **attrs):
+    """Report a finished span to the hooks and the slow-operation log.
+
+    Args:
+        name: Operation name, e.g. "TaskStore.load_tasks"
+        seconds: Duration of the operation
+        **attrs: Extra details such as a file path or byte count
+    """
+    if not active:
+        return
+    for hook in list(_hooks):
+        try:
+            hook(name, seconds, attrs)
+        except Exception:
+            # A broken hook must not break the operation it observes
+            _logger().exception("Tracing hook %r failed", hook)
+    threshold = _slow_threshold
+    if threshold is not None and seconds >= threshold:
+        with _lock:
+            _slow_ops.append({'name': name, 'seconds': seconds, 'attrs': attrs, 'time': time.time()})
+        _logger().warning("Slow operation: %s took %.1f ms %s", name, seconds * 1000, attrs or "")
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the block and emit it as a span (nothing is timed while inactive)."""
+    if not active:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit(name, time.perf_counter() - start, **attrs)
+
+
+def traced(name):
+    """Decorate a function so each call is emitted as a span called name."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not active:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                emit(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def _threshold_from_env():
+    """Read TODO_SLOW_OP_MS, ignoring values that aren't numbers."""
+    value = os.environ.get('TODO_SLOW_OP_MS')
+    if not value:
+        return None
+    try:
+        return float(value) / 1000
+    except ValueError:
+        print(f"Warning: ignoring TODO_SLOW_OP_MS={value!r}, expected milliseconds")
+        return None
+
+
+set_slow_threshold(_threshold_from_env())
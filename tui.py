@@ -3,13 +3,17 @@ from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Input, Static, Label, Checkbox, Button
 from textual.containers import Container, Vertical, Horizontal
 from textual.binding import Binding
-from textual import on
+from textual.message import Message
+from textual import on, work
+from textual.worker import get_current_worker
 
-from storage import TaskStore
-from task import Task, CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT
+from file_watch import StoreWatcher
+from storage import create_store, check_category_limit
+from task import Task, CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT, CategoryFullError
 from week_utils import get_week_start
 import argparse
 import shlex
+import threading
 
 # Mapping for display
 TITLE_MAP = {
@@ -31,6 +35,20 @@ class TaskWidget(Horizontal):
         cb.task_id = self.todo_task.id  # Attach ID to widget for easy access
         yield cb
 
+    def update_task(self, task):
+        """Show a newer version of the same task in place."""
+        old, self.todo_task = self.todo_task, task
+        if not self.is_mounted:
+            # compose() hasn't run yet and will use the new task
+            return
+        checkbox = self.query_one(Checkbox)
+        if task.text != old.text:
+            checkbox.label = str(task.text)
+        if task.completed != checkbox.value:
+            # Not a user toggle, so don't write it back to storage
+            with checkbox.prevent(Checkbox.Changed):
+                checkbox.value = task.completed
+
     def on_checkbox_changed(self, event: Checkbox.Changed) -> None:
         # We handle logic in the App, but we can verify here if needed
         pass
@@ -67,6 +85,9 @@ class TodoApp(App):
     }
     """
 
+    class StoreChanged(Message):
+        """Posted by the watcher thread when the stored tasks changed."""
+
     BINDINGS = [
         Binding("q", "quit", "Quit"),
         Binding("r", "refresh", "Refresh"),
@@ -74,7 +95,18 @@ class TodoApp(App):
 
     def __init__(self):
         super().__init__()
-        self.store = TaskStore()
+        # Cached: limit checks use the maintained counts, and reloads only
+        # re-read the file when the watcher saw it change
+        self.store = create_store(cache=True)
+        # Mounted task widgets by task ID, so refreshes only touch what changed
+        self.task_widgets = {}
+        # Data version of the tasks on screen (None until the first load)
+        self.shown_version = None
+        # Storage calls run in worker threads; writes take turns so the
+        # category limit check and the add can't interleave
+        self.write_lock = threading.Lock()
+        # Refreshes when the CLI or web app changes the store
+        self.watcher = StoreWatcher(self.store.filepath, self.on_store_files_changed)
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -94,28 +126,80 @@ class TodoApp(App):
 
     def on_mount(self) -> None:
         self.refresh_tasks()
+        self.watcher.start()
+
+    def on_unmount(self) -> None:
+        self.watcher.stop()
+
+    def action_refresh(self) -> None:
+        self.refresh_tasks()
+
+    def on_store_files_changed(self) -> None:
+        """Refresh if another program changed the tasks (watcher thread)."""
+        if self.store.get_version() != self.shown_version:
+            # post_message doesn't wait for the UI thread, which may be
+            # stopping the watcher right now
+            self.post_message(self.StoreChanged())
+
+    @on(StoreChanged)
+    def on_store_changed(self, event: StoreChanged) -> None:
+        self.refresh_tasks()
 
     def refresh_tasks(self) -> None:
-        """Reload tasks from storage and update UI."""
-        week_start = get_week_start()
-        tasks = self.store.get_tasks_for_week(week_start)
-        
+        """Reload tasks from storage in the background and update the UI."""
+        self.load_tasks()
+
+    @work(thread=True, exclusive=True, group="load")
+    def load_tasks(self) -> None:
+        """Read the week's tasks off the UI thread, then show them."""
+        # Read the version first: a change in between only causes one more refresh
+        version = self.store.get_version()
+        tasks = self.store.get_tasks_for_week(get_week_start())
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self.show_tasks, tasks, version)
+
+    def show_tasks(self, tasks, version) -> None:
+        """Update the UI to show tasks.
+
+        Widgets are matched to tasks by ID: only tasks that appeared,
+        disappeared, moved category or changed are mounted, removed or
+        updated, so the rest keep their focus and the scroll position stays.
+
+        Args:
+            tasks: The week's tasks
+            version: Data version they were read at
+        """
+        self.shown_version = version
+
         # Sort tasks by ID (preserving creation order mostly)
         tasks.sort(key=lambda t: t.id)
+        # Skip invalid categories if any
+        wanted = {task.id: task for task in tasks if task.category in TITLE_MAP}
+
+        for task_id in [task_id for task_id in self.task_widgets if task_id not in wanted]:
+            self.task_widgets.pop(task_id).remove()
 
-        # Clear existing lists
-        for cat in [CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT]:
-            container = self.query_one(f"#list_{cat}", Vertical)
-            container.remove_children()
+        for task in wanted.values():
+            widget = self.task_widgets.get(task.id)
+            if widget is not None and widget.todo_task.category != task.category:
+                # Moved to another list; widgets can't change parent
+                self.task_widgets.pop(task.id).remove()
+                widget = None
 
-        # Populate lists
-        for task in tasks:
-            # Skip invalid categories if any
-            if task.category not in TITLE_MAP:
+            if widget is not None:
+                widget.update_task(task)
                 continue
-            
+
+            # Keep each list in ID order: insert before the first later task
+            later = [w for w in self.task_widgets.values()
+                     if w.todo_task.category == task.category and w.todo_task.id > task.id]
             container = self.query_one(f"#list_{task.category}", Vertical)
-            container.mount(TaskWidget(task))
+            widget = TaskWidget(task)
+            if later:
+                container.mount(widget, before=min(later, key=lambda w: w.todo_task.id))
+            else:
+                container.mount(widget)
+            self.task_widgets[task.id] = widget
 
     @on(Input.Submitted)
     def add_task(self, event: Input.Submitted) -> None:
@@ -139,43 +223,57 @@ class TodoApp(App):
             elif cat_arg in ['important_urgent', 'iu']:
                 category = CAT_IMPORTANT_URGENT
 
-        # Check limits (active tasks only)
+        # Clear input right away so the next task can be typed while this
+        # one is saved; it's put back if the task is rejected
+        event.input.value = ""
+        self.save_new_task(task_text, category, event.value)
+
+    @work(thread=True, group="write")
+    def save_new_task(self, task_text, category, typed) -> None:
+        """Check the category limit and add the task (worker thread)."""
         week_start = get_week_start()
-        count = self.store.get_task_count_by_category(week_start, category)
-        
-        if count >= 3:
-            self.notify(f"Category Full! (3 active tasks limit)", severity="error")
-            return
+        with self.write_lock:
+            try:
+                # Check limits (active tasks only)
+                check_category_limit(self.store, week_start, category)
+                self.store.add_task(Task(task_text, category=category))
+            except CategoryFullError as e:
+                self.call_from_thread(self.restore_input, typed)
+                self.call_from_thread(self.notify, f"Category Full! ({e.limit} active tasks limit)",
+                                      severity="error")
+                return
+            except IOError:
+                self.call_from_thread(self.restore_input, typed)
+                self.call_from_thread(self.notify, "Cannot save tasks - check permissions",
+                                      severity="error")
+                return
 
-        # Add task
-        new_task = Task(task_text, category=category)
-        self.store.add_task(new_task)
-        
-        # Clear input and refresh
-        event.input.value = ""
-        self.refresh_tasks()
-        self.notify("Task Added!")
+        self.call_from_thread(self.refresh_tasks)
+        self.call_from_thread(self.notify, "Task Added!")
+
+    def restore_input(self, typed) -> None:
+        """Put a rejected task back in the input, unless something new was typed."""
+        input_widget = self.query_one("#input", Input)
+        if not input_widget.value:
+            input_widget.value = typed
 
     @on(Checkbox.Changed)
     def on_task_completion(self, event: Checkbox.Changed) -> None:
         """Handle task completion toggles."""
-        task_id = event.checkbox.task_id
-        is_complete = event.value
-        
-        # Update storage
-        tasks = self.store.load_tasks()
-        for t in tasks:
-            if t.id == task_id:
-                t.completed = is_complete
-                break
-        self.store.save_tasks(tasks)
-        
-        # We don't necessarily need a full refresh here as the UI is already updated by the checkbox,
-        # but a refresh ensures sort order or styling updates if we add them later.
-        # For now, let's keep it simple and NOT refresh to avoid flickering, 
-        # unless we move completed tasks to the bottom? 
-        # The prompt didn't ask for sorting in TUI, but consistency is good.
-        # Let's simple save.
+        # The checkbox already shows the new state; only storage needs updating
+        self.save_completion(event.checkbox.task_id, event.value)
+
+    @work(thread=True, group="write")
+    def save_completion(self, task_id, is_complete) -> None:
+        """Store a completion toggle (worker thread)."""
+        with self.write_lock:
+            try:
+                self.store.update_task(task_id, completed=is_complete)
+            except IOError:
+                self.call_from_thread(self.notify, "Cannot save tasks - check permissions",
+                                      severity="error")
+                # Show what is actually stored again
+                self.call_from_thread(self.refresh_tasks)
 
 if __name__ == "__main__":
     app = TodoApp()
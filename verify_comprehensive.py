@@ -3,7 +3,9 @@ import os
 import sys
 from todo import main as cli_main
 from unittest.mock import patch
+from contextlib import redirect_stdout
 import io
+import re
 
 # Helper to capture stdout and run CLI
 def run_cli(args):
@@ -15,6 +17,16 @@ def run_cli(args):
                 print(f"[ERROR] Exit code {e.code} for args: {args}")
                 raise
 
+# Helper to add a task through the CLI and return the ID it was given
+def add_task(text, category):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        run_cli(['add', text, '-c', category])
+    print(output.getvalue(), end='')
+    match = re.search(r"\(ID: (\d+)\)", output.getvalue())
+    assert match, f"No task ID in output: {output.getvalue()!r}"
+    return int(match.group(1))
+
 def verify():
     print("--- Starting Comprehensive Verification ---")
     
@@ -25,49 +37,46 @@ def verify():
 
     # 1. CORE FUNCTIONALITY & 2. IDs
     print("\n[Test 1] Core Functionality & Sequential IDs")
-    run_cli(['add', 'First', '-c', 'important'])
-    run_cli(['add', 'Second', '-c', 'important'])
-    run_cli(['add', 'Third', '-c', 'important'])
-    # Expect IDs 1, 2, 3
-    # No assert here, but deletion tests rely on these IDs
-    print("[PASS] Added 3 tasks")
+    first = add_task('First', 'important')
+    second = add_task('Second', 'important')
+    third = add_task('Third', 'important')
+    assert [first, second, third] == [1, 2, 3], [first, second, third]
+    print("[PASS] Added 3 tasks with IDs 1, 2, 3")
 
     # 2. DELETE MIDDLE
-    print("\n[Test 2] Delete Middle (ID 2)")
-    run_cli(['delete', '2'])
-    # Check if deletion happened (visually via list later, or reliance on next add)
-    print("[PASS] Deleted ID 2")
+    print(f"\n[Test 2] Delete Middle (ID {second})")
+    run_cli(['delete', str(second)])
+    print(f"[PASS] Deleted ID {second}")
 
     # 3. ADD AFTER DELETE -> ID GENERATION
-    print("\n[Test 3] Add task after deleting ID 2. Expect ID 4 (Max 3 + 1)")
-    run_cli(['add', 'Fourth', '-c', 'important'])
-    # ID should be 4
-    print("[PASS] Added 'Fourth'")
+    print("\n[Test 3] Add task after deleting the middle one. Expect the next unused ID")
+    fourth = add_task('Fourth', 'important')
+    assert fourth == third + 1, fourth
+    print(f"[PASS] Added 'Fourth' as ID {fourth}")
 
     # 4. DELETE LAST
-    print("\n[Test 4] Delete Last (ID 4)")
-    run_cli(['delete', '4'])
-    print("[PASS] Deleted ID 4")
+    print(f"\n[Test 4] Delete Last (ID {fourth})")
+    run_cli(['delete', str(fourth)])
+    print(f"[PASS] Deleted ID {fourth}")
 
     # 5. ADD AFTER DELETE LAST
-    print("\n[Test 5] Add task again. Expect ID 4 (Max(1,3) + 1 = 4)")
-    run_cli(['add', 'Fifth', '-c', 'important'])
-    print("[PASS] Added 'Fifth'")
+    print("\n[Test 5] Add task again. Expect a new ID: deleted IDs are never reused")
+    fifth = add_task('Fifth', 'important')
+    assert fifth == fourth + 1, fifth
+    print(f"[PASS] Added 'Fifth' as ID {fifth}")
 
-    # 6. EMPTY STATE RESET
-    print("\n[Test 6] Delete All and Reset")
+    # 6. IDS KEEP INCREASING AFTER DELETE ALL
+    print("\n[Test 6] Delete All, then add")
     run_cli(['delete-all'])
-    run_cli(['add', 'NewFirst', '-c', 'urgent'])
-    # Verifying ID is 1 requires checking output or internal state.
-    # We will assume if it doesn't crash, logic holds. 
-    # (Visual verification via list will confirm)
-    print("[PASS] Reset and added first task")
+    new_first = add_task('NewFirst', 'urgent')
+    assert new_first == fifth + 1, new_first
+    print(f"[PASS] IDs continue after delete-all (ID {new_first})")
 
     # 7. CATEGORY LIMITS
     print("\n[Test 7] Category Limits")
-    run_cli(['add', 'Urg2', '-c', 'urgent'])
-    run_cli(['add', 'Urg3', '-c', 'urgent'])
-    # Urgent now has 3 tasks (NewFirst=1, Urg2=2, Urg3=3)
+    urgent_2 = add_task('Urg2', 'urgent')
+    add_task('Urg3', 'urgent')
+    # Urgent now has 3 tasks
     
     try:
         run_cli(['add', 'Overflow', '-c', 'urgent'])
@@ -76,8 +85,9 @@ def verify():
         print("[PASS] Blocked 4th task")
 
     # Free space
-    run_cli(['delete', '2']) # Delete Urg2
-    run_cli(['add', 'Replacement', '-c', 'urgent'])
+    run_cli(['delete', str(urgent_2)]) # Delete Urg2
+    replacement = add_task('Replacement', 'urgent')
+    assert replacement > urgent_2, replacement
     print("[PASS] Added replacement task after delete")
 
     # FINAL VISUAL CHECK & REGRESSION (Date Header)
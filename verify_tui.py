@@ -1,8 +1,18 @@
 
 import asyncio
-from tui import TodoApp, CAT_IMPORTANT_URGENT
+from textual.widgets import Checkbox
+from tui import TodoApp, CAT_IMPORTANT_URGENT, CAT_URGENT
 from storage import TaskStore
+from task import Task
 import os
+import time
+
+async def settle(app, pilot):
+    """Wait until the app's storage workers (and the ones they start) are done."""
+    while any(not worker.is_finished for worker in app.workers):
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+    await pilot.pause()
 
 async def verify_tui_logic():
     print("--- Starting TUI Logic Verification ---")
@@ -17,6 +27,8 @@ async def verify_tui_logic():
         input_widget = app.query_one("#input")
         input_widget.value = "TUI Task 1"
         await pilot.press("enter")
+        # Saving happens in a worker thread
+        await settle(app, pilot)
         
         # 3. Check if it's currently stored
         store = TaskStore()
@@ -26,8 +38,6 @@ async def verify_tui_logic():
         print("[PASS] Added task via TUI Input")
         
         # 4. Check if widget exists
-        # Textual tests might need a pause for refresh?
-        # refresh_tasks is synchronous in our code, so it should be there.
         # We look for a Checkbox with the label
         checkboxes = app.query("Checkbox")
         found = False
@@ -43,5 +53,98 @@ async def verify_tui_logic():
 
     print("--- TUI Verification Complete ---")
 
+async def verify_keyed_refresh():
+    print("--- Starting TUI Refresh Verification ---")
+
+    if os.path.exists('tasks.json'):
+        os.remove('tasks.json')
+
+    other = TaskStore()  # Stands in for the CLI or web app
+    first, second, third = (Task(text, category=CAT_IMPORTANT_URGENT) for text in ("One", "Two", "Three"))
+    other.add_tasks([first, second, third])
+
+    app = TodoApp()
+    async with app.run_test() as pilot:
+        await settle(app, pilot)
+        widgets = dict(app.task_widgets)
+        assert sorted(widgets) == [first.id, second.id, third.id]
+        widgets[first.id].query_one(Checkbox).focus()
+        await pilot.pause()
+
+        other.update_task(second.id, text="Two (edited)")
+        other.toggle_task(third.id)
+        app.refresh_tasks()
+        await settle(app, pilot)
+        assert app.task_widgets == widgets, "Unchanged tasks were remounted"
+        assert str(widgets[second.id].query_one(Checkbox).label) == "Two (edited)"
+        assert widgets[third.id].query_one(Checkbox).value is True
+        assert app.focused is widgets[first.id].query_one(Checkbox)
+        assert other.get_task(third.id).completed, "Refresh wrote the toggle back"
+        print("[PASS] Edits update widgets in place and keep focus")
+
+        other.update_task(second.id, category=CAT_URGENT)
+        other.delete_task(third.id)
+        fourth = Task("Four", category=CAT_IMPORTANT_URGENT)
+        other.add_task(fourth)
+        app.refresh_tasks()
+        await settle(app, pilot)
+        assert sorted(app.task_widgets) == [first.id, second.id, fourth.id]
+        assert app.task_widgets[first.id] is widgets[first.id]
+        assert app.task_widgets[second.id].parent.id == f"list_{CAT_URGENT}"
+        assert not widgets[third.id].is_attached
+        labels = [str(cb.label) for cb in app.query_one(f"#list_{CAT_IMPORTANT_URGENT}").query(Checkbox)]
+        assert labels == ["One", "Four"], labels
+        print("[PASS] Moves, deletes and adds only touch the affected widgets")
+
+    print("--- TUI Refresh Verification Complete ---")
+
+async def wait_for(pilot, condition, timeout=5.0):
+    """Let the app run until condition() holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the TUI"
+        await pilot.pause(0.05)
+
+async def verify_store_watcher():
+    print("--- Starting TUI Watcher Verification ---")
+
+    if os.path.exists('tasks.json'):
+        os.remove('tasks.json')
+
+    other = TaskStore()  # Stands in for the CLI or web app
+    first = Task("Seen at start", category=CAT_IMPORTANT_URGENT)
+    other.add_task(first)
+
+    app = TodoApp()
+    async with app.run_test() as pilot:
+        await settle(app, pilot)
+        assert sorted(app.task_widgets) == [first.id]
+        loads = []
+        read = app.store.get_tasks_for_week
+        app.store.get_tasks_for_week = lambda week_start: loads.append(week_start) or read(week_start)
+
+        second = Task("Added elsewhere", category=CAT_URGENT)
+        other.add_task(second)
+        await wait_for(pilot, lambda: second.id in app.task_widgets)
+        assert app.task_widgets[second.id].parent.id == f"list_{CAT_URGENT}"
+        print(f"[PASS] External change appeared without pressing r ({app.watcher.method})")
+
+        loads.clear()
+        os.utime('tasks.json')  # Touched, but the tasks are the same
+        await pilot.pause(0.5)
+        await settle(app, pilot)
+        assert loads == [], "Refreshed although the data version didn't change"
+        print("[PASS] Unchanged data version doesn't reload")
+
+        await app.run_action("refresh")  # The r binding
+        await settle(app, pilot)
+        assert len(loads) == 1, loads
+        print("[PASS] r refreshes")
+
+    assert app.watcher._thread is None, "Watcher still running after exit"
+    print("--- TUI Watcher Verification Complete ---")
+
 if __name__ == "__main__":
     asyncio.run(verify_tui_logic())
+    asyncio.run(verify_keyed_refresh())
+    asyncio.run(verify_store_watcher())
@@ -1,24 +1,80 @@
-from fastapi import FastAPI, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Form
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
+import asyncio
+import json
+from datetime import date
+import os
+import secrets
+import time
 import uvicorn
-from typing import Optional
+from markupsafe import Markup
+from typing import List, Literal, Optional
 
-from storage import TaskStore
-from task import Task, VALID_CATEGORIES, CAT_IMPORTANT_URGENT, CAT_URGENT, CAT_IMPORTANT, CAT_PARKING_LOT
+from async_storage import AsyncTaskStore
+from change_feed import ChangeFeed
+from metrics import (MetricsMiddleware, RequestMetrics, ServerTiming, current_timing,
+                     render_requests, render_store, render_tasks)
+from profiling import format_collapsed, format_top, sample_stacks
+from storage import create_store, check_category_limit, count_active_tasks
+from task import (Task, VALID_CATEGORIES, CATEGORY_LIMITS, CAT_IMPORTANT_URGENT, CAT_URGENT,
+                  CAT_IMPORTANT, CAT_PARKING_LOT, CategoryFullError)
+import tracing
 from week_utils import get_week_start
 
 app = FastAPI(title="Eisenhower Matrix Todo")
 
+# Request counts and latencies for /metrics, plus a Server-Timing header on
+# every response
+request_metrics = RequestMetrics()
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-store = TaskStore()
+# Keep parsed tasks in memory; the file is only re-read when it changes on disk
+store = create_store(cache=True)
+
+# Committed changes, pushed to browsers over /api/events
+change_feed = ChangeFeed()
+
+# Handlers await storage instead of blocking the event loop: reads run on a
+# bounded thread pool, mutations on one writer thread that group-commits bursts
+async_store = AsyncTaskStore(store, listener=change_feed)
+
+# Seconds between checks for changes made by the CLI or TUI
+EXTERNAL_CHECK_INTERVAL = 1.0
+# Seconds of silence after which an event stream gets a keep-alive comment
+HEARTBEAT_INTERVAL = 15.0
+
+# The /debug endpoints (profiler, slow-operation log) answer requests from
+# this machine, and from elsewhere with an X-Debug-Token header matching
+# TODO_DEBUG_TOKEN; they are checked per request, so no restart is needed
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+MAX_PROFILE_SECONDS = 60
+profile_lock = asyncio.Lock()
+
+async def watch_external_changes():
+    while True:
+        await asyncio.sleep(EXTERNAL_CHECK_INTERVAL)
+        change_feed.check_version(await async_store.get_version())
+
+@app.on_event("startup")
+async def warm_store():
+    await async_store.warm()
+    change_feed.start(asyncio.get_running_loop(), await async_store.get_version())
+    app.state.watcher = asyncio.create_task(watch_external_changes())
+
+@app.on_event("shutdown")
+async def flush_writes():
+    app.state.watcher.cancel()
+    change_feed.close()
+    async_store.close()
 
 class TaskCreate(BaseModel):
     text: str
@@ -26,57 +82,338 @@ class TaskCreate(BaseModel):
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    # Embed the current week so the page can draw it without a second
+    # round trip to /api/tasks; the ETag lets its later fetches revalidate
+    # and the data version is where its change feed picks up
+    etag, data_version, body = await read_week(get_week_start())
+    # The body is JSON, where <, > and & only occur inside strings, so
+    # escaping them keeps it valid and stops it from closing the <script>
+    initial_tasks = (body.decode("utf-8").replace("<", "\\u003c")
+                     .replace(">", "\\u003e").replace("&", "\\u0026"))
+    return templates.TemplateResponse(
+        request, "index.html",
+        {"initial_etag": etag, "initial_version": data_version,
+         "initial_tasks": Markup(initial_tasks)},
+        headers={"Cache-Control": "no-cache"},
+    )
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header value against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+# Priority mapping (Lower is higher priority)
+PRIORITY_MAP = {
+    CAT_IMPORTANT_URGENT: 1,
+    CAT_URGENT: 2,
+    CAT_IMPORTANT: 3,
+    CAT_PARKING_LOT: 4
+}
+
+# Encoded GET /api/tasks bodies: week_start -> (week version, body bytes).
+# An entry stays valid until the change feed reports a change to its week.
+week_views = {}
+MAX_CACHED_WEEKS = 8
+
+def render_week(store, week_start, timing=None):
+    """Encode a week's tasks as the JSON body of GET /api/tasks."""
+    timing = timing or ServerTiming()
+    with timing.phase("storage-load"):
+        tasks = store.get_tasks_for_week(week_start)
+    with timing.phase("compute"):
+        # Sort: Category Priority, then Completed, then ID
+        # Pre-sorted to be consistent with TUI/CLI logic; the frontend just groups them
+        tasks.sort(key=lambda t: (PRIORITY_MAP.get(t.category, 99), t.completed, t.id))
+    with timing.phase("serialize"):
+        return json.dumps([t.to_dict() for t in tasks], ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+async def read_week(week_start, if_none_match=None):
+    """Return the ETag and encoded tasks of a week, using week_views.
+
+    The ETag only changes with the week's own version, so other weeks'
+    changes don't defeat revalidation. Clients following the change feed
+    (/api/events, /api/changes) must start from the returned data version
+    instead, which counts changes to every week.
+
+    Args:
+        week_start: Monday of the week (YYYY-MM-DD)
+        if_none_match: The request's If-None-Match header, if any
+
+    Returns:
+        tuple: (ETag, data version, JSON body bytes), with None as the
+            body if if_none_match already matches the ETag
+    """
+    timing = current_timing()
+
+    def read(store):
+        # A change from the CLI or TUI invalidates every week right away
+        # instead of at the next background check
+        with timing.phase("storage-load"):
+            change_feed.check_version(store.get_version())
+
+        # Read the versions before the tasks: if a write lands in between, the
+        # ETag and cache entry are older than the body and just get refreshed.
+        # The week's version can only lag the data version read first, so an
+        # unchanged ETag means the week is as of data_version too.
+        data_version = change_feed.version
+        version = change_feed.week_version(week_start)
+        etag = f'"{week_start}.{version}"'
+        if etag_matches(if_none_match, etag):
+            return etag, data_version, None
+
+        view = week_views.get(week_start)
+        if view is None or view[0] != version:
+            view = (version, render_week(store, week_start, timing))
+            if len(week_views) >= MAX_CACHED_WEEKS:
+                week_views.clear()
+            week_views[week_start] = view
+        return etag, data_version, view[1]
+
+    return await async_store.read(read)
+
+# Page sizes of GET /api/tasks range queries
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def parse_week(value, name):
+    """Return the week_start of a YYYY-MM-DD query parameter, or raise a 400."""
+    try:
+        return get_week_start(date.fromisoformat(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a date (YYYY-MM-DD)")
+
+def parse_cursor(cursor):
+    """Decode a next_cursor value into a (week_start, id) key, or raise a 400."""
+    week_start, _, task_id = cursor.rpartition(".")
+    try:
+        return date.fromisoformat(week_start).isoformat(), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def query_task_range(week_from, week_to, category, completed, cursor, limit):
+    """Answer a GET /api/tasks range query with one page of tasks."""
+    week_from = parse_week(week_from, "from") if week_from else None
+    week_to = parse_week(week_to, "to") if week_to else None
+    if week_from and week_to and week_from > week_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if category is not None and category not in VALID_CATEGORIES:
+        raise HTTPException(status_code=400, detail="Invalid category")
+    after = parse_cursor(cursor) if cursor else None
+    limit = limit or DEFAULT_PAGE_SIZE
+    timing = current_timing()
+
+    def read(store):
+        with timing.phase("storage-load"):
+            # One extra task tells whether there is another page
+            return store.query_tasks(week_from, week_to, category, completed, after, limit + 1)
+
+    tasks = await async_store.read(read)
+    with timing.phase("serialize"):
+        page = tasks[:limit]
+        next_cursor = f"{page[-1].week_start}.{page[-1].id}" if len(tasks) > limit else None
+        return {"tasks": [task.to_dict() for task in page], "next_cursor": next_cursor}
 
 @app.get("/api/tasks")
-async def get_tasks():
-    week_start = get_week_start()
-    tasks = store.get_tasks_for_week(week_start)
-    # Sort: Category Priority, then Completed, then ID
-    # We want to enable the frontend to easily group them
-    # For JSON, let's just return the flat list and let frontend handle or pre-sort?
-    # Let's pre-sort to be consistent with TUI/CLI logic
-    
-    # Priority mapping (Lower is higher priority)
-    PRIORITY_MAP = {
-        CAT_IMPORTANT_URGENT: 1,
-        CAT_URGENT: 2,
-        CAT_IMPORTANT: 3,
-        CAT_PARKING_LOT: 4
-    }
-    
-    tasks.sort(key=lambda t: (PRIORITY_MAP.get(t.category, 99), t.completed, t.id))
-    
-    return [t.to_dict() for t in tasks]
+async def get_tasks(request: Request,
+                    week_from: Optional[str] = Query(None, alias="from"),
+                    week_to: Optional[str] = Query(None, alias="to"),
+                    category: Optional[str] = None,
+                    completed: Optional[bool] = None,
+                    cursor: Optional[str] = None,
+                    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)):
+    # With any filter this is a history query: a page of tasks from the
+    # weeks in range, ordered by week and ID, plus the cursor of the next
+    # page (null on the last). Without one it is the current week's view.
+    if any(value is not None for value in (week_from, week_to, category, completed, cursor, limit)):
+        return await query_task_range(week_from, week_to, category, completed, cursor, limit)
+
+    etag, data_version, body = await read_week(get_week_start(), request.headers.get("if-none-match"))
+    # no-cache: the browser may keep the body but must revalidate every time.
+    # X-Data-Version is the change feed version to follow the week from.
+    headers = {"ETag": etag, "X-Data-Version": str(data_version), "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def timed_write(op):
+    """Run a mutation on the writer thread, recording its Server-Timing phases.
+
+    The op itself counts as "compute"; the rest of the wait (queueing
+    behind other requests and saving the batch) as "storage-save".
+    """
+    timing = current_timing()
+    ran = 0.0
+
+    def run(store):
+        nonlocal ran
+        start = time.perf_counter()
+        try:
+            return op(store)
+        finally:
+            ran = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        return await async_store.write(run)
+    finally:
+        timing.add("compute", ran)
+        timing.add("storage-save", time.perf_counter() - start - ran)
 
 @app.post("/api/tasks")
 async def create_task(task_data: TaskCreate):
     week_start = get_week_start()
     
-    # Check limit (only active tasks count)
-    # Check limit (only active tasks count)
-    count = store.get_task_count_by_category(week_start, task_data.category)
-    
-    limit = 5 if task_data.category == CAT_PARKING_LOT else 3
-    
-    if count >= limit:
-        raise HTTPException(status_code=400, detail=f"Category is full ({count}/{limit} tasks). Complete existing ones first.")
-        
-    new_task = Task(task_data.text, category=task_data.category)
-    store.add_task(new_task)
-    return new_task.to_dict()
+    def create(store):
+        # Check limit (only active tasks count)
+        try:
+            check_category_limit(store, week_start, task_data.category)
+        except CategoryFullError as e:
+            raise HTTPException(status_code=400, detail=f"Category is full ({e.count}/{e.limit} tasks). Complete existing ones first.")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        new_task = Task(task_data.text, category=task_data.category)
+        store.add_task(new_task)
+        change_feed.task_changed(new_task)
+        return new_task
+
+    new_task = await timed_write(create)
+    with current_timing().phase("serialize"):
+        return new_task.to_dict()
+
+class BatchOperation(BaseModel):
+    op: Literal["add", "update", "toggle", "delete"]
+    id: Optional[int] = None
+    text: Optional[str] = None
+    category: Optional[str] = None
+    completed: Optional[bool] = None
+
+class TaskBatch(BaseModel):
+    operations: List[BatchOperation]
+
+def plan_batch(store, operations, week_start):
+    """Check a list of batch operations against the current tasks.
+
+    The operations are played on copies, so nothing is written. Category
+    limits are checked on the result, for every week the batch touches: a
+    batch may pass through a full category as long as it doesn't end up
+    over the limit.
+
+    Raises:
+        HTTPException: For the first operation that can't be applied, or
+            a category the batch would leave over its limit
+    """
+    # Copies of every task in the weeks touched so far, so the simulation
+    # below can change them freely, and those weeks' counts before it
+    tasks = {}
+    before = {}
+    weeks = set()
+
+    def load_week(week):
+        if week not in weeks:
+            weeks.add(week)
+            week_tasks = store.get_tasks_for_week(week)
+            before.update(count_active_tasks(week_tasks))
+            tasks.update((t.id, t) for t in week_tasks)
+
+    load_week(week_start)
+    deleted = set()
+    added = []
+
+    for index, op in enumerate(operations):
+        if op.category is not None and op.category not in VALID_CATEGORIES:
+            raise HTTPException(status_code=400, detail=f"Operation {index}: Invalid category")
+
+        if op.op == "add":
+            # Same rule as POST /api/tasks: text may be empty but not missing
+            if op.text is None or op.category is None:
+                raise HTTPException(status_code=400, detail=f"Operation {index}: add needs text and category")
+            added.append(Task(op.text, category=op.category, week_start=week_start))
+            continue
+
+        if op.id is None:
+            raise HTTPException(status_code=400, detail=f"Operation {index}: {op.op} needs an id")
+        if op.id not in deleted and op.id not in tasks:
+            # A task from another week: its whole week counts for the limits
+            found = store.get_task(op.id)
+            if found is not None:
+                load_week(found.week_start)
+        task = None if op.id in deleted else tasks.get(op.id)
+        if task is None:
+            raise HTTPException(status_code=404, detail=f"Operation {index}: Task {op.id} not found")
+
+        if op.op == "delete":
+            deleted.add(op.id)
+            del tasks[op.id]
+        elif op.op == "toggle":
+            task.completed = not task.completed
+        else:
+            if op.text is not None:
+                task.text = op.text
+            if op.category is not None:
+                task.category = op.category
+            if op.completed is not None:
+                task.completed = op.completed
+
+    after = count_active_tasks(list(tasks.values()) + added)
+    for (week, category), count in after.items():
+        limit = CATEGORY_LIMITS[category]
+        # Categories that were already over the limit may stay that way
+        if count > limit and count > before.get((week, category), 0):
+            raise HTTPException(status_code=400,
+                                detail=f"Category {category} would have {count}/{limit} active tasks in the week of {week}.")
+
+@app.post("/api/tasks/batch")
+async def batch_tasks(batch: TaskBatch):
+    week_start = get_week_start()
+
+    def apply(store):
+        # Validate everything first: the writer commits other requests'
+        # changes alongside ours, so a failing batch must not touch the store
+        plan_batch(store, batch.operations, week_start)
+
+        results = []
+        with store.batch():
+            for op in batch.operations:
+                if op.op == "add":
+                    task = Task(op.text, category=op.category, week_start=week_start)
+                    store.add_task(task)
+                elif op.op == "toggle":
+                    task = store.toggle_task(op.id)
+                elif op.op == "update":
+                    task = store.update_task(op.id, text=op.text, category=op.category, completed=op.completed)
+                else:
+                    task = store.delete_task(op.id)
+                    change_feed.task_deleted(task)
+                    results.append({"id": op.id, "deleted": True})
+                    continue
+                change_feed.task_changed(task)
+                results.append(task.to_dict())
+        return results
+
+    results = await timed_write(apply)
+    return {"status": "success", "results": results}
 
 @app.post("/api/tasks/{task_id}/toggle")
 async def toggle_task(task_id: int):
-    tasks = store.load_tasks()
-    task = next((t for t in tasks if t.id == task_id), None)
-    
+    def toggle(store):
+        task = store.toggle_task(task_id)
+        if task:
+            change_feed.task_changed(task)
+        return task
+
+    task = await timed_write(toggle)
+
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-        
-    task.completed = not task.completed
-    store.save_tasks(tasks)
-    return task.to_dict()
+
+    with current_timing().phase("serialize"):
+        return task.to_dict()
 
 class TaskUpdate(BaseModel):
     text: Optional[str] = None
@@ -85,87 +422,195 @@ class TaskUpdate(BaseModel):
 @app.put("/api/tasks/{task_id}")
 async def update_task(task_id: int, task_data: TaskUpdate):
     week_start = get_week_start()
-    tasks = store.load_tasks()
-    task = next((t for t in tasks if t.id == task_id), None)
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-        
-    # Update text if provided
-    if task_data.text is not None:
-        task.text = task_data.text
-        
-    # Update category if provided
-    if task_data.category is not None and task_data.category != task.category:
-        if task_data.category not in VALID_CATEGORIES:
-             raise HTTPException(status_code=400, detail="Invalid category")
-
-        # Check limits if moving to a restricted category
-        # Count tasks in target category (excluding the current task if it was already there, which it isn't)
-        # We need to count tasks in the *target* category for the *current* week
-        # But `store.get_task_count_by_category` loads from file. 
-        # We should calculate from our loaded `tasks` list to be safe and atomic-ish?
-        # Actually `store` methods read the file.
-        # Let's count manually from our `tasks` list which is the current state + modification
-        
-        target_cat_count = sum(1 for t in tasks 
-                               if t.week_start == week_start 
-                               and t.category == task_data.category 
-                               and not t.completed)
-                               
-        limit = 5 if task_data.category == CAT_PARKING_LOT else 3
-        
-        # If the task is being moved *into* this category, checks apply
-        if target_cat_count >= limit:
-             raise HTTPException(status_code=400, detail=f"Target category is full ({target_cat_count}/{limit}).")
-             
-        task.category = task_data.category
-        
-    store.save_tasks(tasks)
-    return task.to_dict()
+
+    def update(store):
+        task = store.get_task(task_id)
+
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        # Update category if provided
+        category = None
+        if task_data.category is not None and task_data.category != task.category:
+            if task_data.category not in VALID_CATEGORIES:
+                raise HTTPException(status_code=400, detail="Invalid category")
+
+            # Check limits if moving to a restricted category
+            # Count active tasks in the *target* category for the *current* week.
+            # Validate before writing anything so a rejected move leaves the text untouched too.
+            try:
+                check_category_limit(store, week_start, task_data.category)
+            except CategoryFullError as e:
+                raise HTTPException(status_code=400, detail=f"Target category is full ({e.count}/{e.limit}).")
+
+            category = task_data.category
+
+        task = store.update_task(task_id, text=task_data.text, category=category)
+        change_feed.task_changed(task)
+        return task
+
+    task = await timed_write(update)
+    with current_timing().phase("serialize"):
+        return task.to_dict()
 
 @app.delete("/api/tasks/delete-all")
 async def delete_all_tasks():
     week_start = get_week_start()
-    tasks = store.load_tasks()
-    
-    # Keep tasks that are NOT in the current week
-    remaining_tasks = [t for t in tasks if t.week_start != week_start]
-    deleted_count = len(tasks) - len(remaining_tasks)
-    
-    if deleted_count > 0:
-        store.save_tasks(remaining_tasks)
-        
+
+    def delete_all(store):
+        tasks = list(store.iter_tasks(week_start=week_start))
+        count = store.delete_week(week_start)
+        for task in tasks:
+            change_feed.task_deleted(task)
+        return count
+
+    deleted_count = await timed_write(delete_all)
     return {"status": "success", "count": deleted_count}
 
 @app.delete("/api/tasks/{task_id}")
 async def delete_task(task_id: int):
-    tasks = store.load_tasks()
-    task = next((t for t in tasks if t.id == task_id), None)
+    def delete(store):
+        task = store.delete_task(task_id)
+        if task:
+            change_feed.task_deleted(task)
+        return task
+
+    task = await timed_write(delete)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
         
-    tasks.remove(task)
-    store.save_tasks(tasks)
     return {"status": "success"}
 
 @app.post("/api/tasks/complete-all")
 async def complete_all_tasks():
     week_start = get_week_start()
-    tasks = store.load_tasks()
-    
-    count = 0
-    for task in tasks:
-        if task.week_start == week_start and not task.completed:
-            task.completed = True
-            count += 1
-            
-    if count > 0:
-        store.save_tasks(tasks)
-        
+
+    def complete_all(store):
+        task_ids = {t.id for t in store.iter_tasks(week_start=week_start, completed=False)}
+        count = store.complete_week(week_start)
+        for task in store.iter_tasks(week_start=week_start):
+            if task.id in task_ids:
+                change_feed.task_changed(task)
+        return count
+
+    count = await timed_write(complete_all)
     return {"status": "success", "count": count}
 
+def format_event(event):
+    """Encode a change feed event as a server-sent event."""
+    kind = "resync" if event.get("resync") else "changes"
+    return f"id: {event['version']}\nevent: {kind}\ndata: {json.dumps(event)}\n\n"
+
+@app.get("/api/events")
+async def task_events(request: Request, since: Optional[int] = None):
+    # On reconnect the browser sends the id of the last event it received
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    # Subscribe before reading the backlog so nothing falls in between
+    queue = change_feed.subscribe()
+
+    async def stream():
+        try:
+            last_version = since
+            if since is not None:
+                backlog = change_feed.since(since)
+                if backlog is None:
+                    backlog = [{"version": change_feed.version, "resync": True}]
+                for event in backlog:
+                    yield format_event(event)
+                    last_version = event["version"]
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is None:
+                    return
+                if last_version is not None and event["version"] <= last_version:
+                    continue  # already sent from the backlog
+                yield format_event(event)
+                last_version = event["version"]
+        finally:
+            change_feed.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/changes")
+async def get_changes(since: int):
+    # Catch-up without a stream: the net change per task since a version in
+    # the /api/events format, or resync when the change log can't cover the
+    # gap. week_start lets clients notice when the week rolls over.
+    def read(store):
+        # Make changes from the CLI or TUI count right away
+        change_feed.check_version(store.get_version())
+        return change_feed.changes_since(since)
+
+    result = await async_store.read(read)
+    week_start = get_week_start()
+    if result is None:
+        return {"version": change_feed.version, "week_start": week_start, "resync": True}
+    version, changes = result
+    return {"version": version, "week_start": week_start, "changes": changes}
+
+@app.get("/metrics")
+async def read_metrics():
+    def collect(store):
+        return store.stats.snapshot(), store.get_active_counts(), store.get_version()
+
+    stats, active_counts, version = await async_store.read(collect)
+    lines = (render_requests(request_metrics)
+             + render_store(stats, type(store).__name__)
+             + render_tasks(active_counts, version))
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+def require_debug(request):
+    """Hide the debug endpoints from remote clients without the debug token."""
+    if request.client is not None and request.client.host in LOCAL_HOSTS:
+        return
+    token = os.environ.get("TODO_DEBUG_TOKEN")
+    given = request.headers.get("x-debug-token")
+    if not token or not given or not secrets.compare_digest(given, token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/debug/profile")
+async def profile(request: Request, seconds: float = 5.0,
+                  format: Literal["collapsed", "top"] = "collapsed"):
+    require_debug(request)
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {MAX_PROFILE_SECONDS}")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with profile_lock:
+        # Sampled from a worker thread while the event loop keeps serving
+        stacks, rounds = await asyncio.to_thread(sample_stacks, seconds)
+    if format == "top":
+        return PlainTextResponse(format_top(stacks, rounds))
+    return PlainTextResponse(format_collapsed(stacks))
+
+@app.get("/debug/slow-ops")
+async def slow_ops(request: Request):
+    require_debug(request)
+    threshold = tracing.get_slow_threshold()
+    return {
+        "threshold_ms": None if threshold is None else threshold * 1000,
+        "operations": [{**op, "ms": op["seconds"] * 1000} for op in tracing.recent_slow_ops()],
+    }
+
+@app.put("/debug/slow-ops")
+async def set_slow_ops_threshold(request: Request, threshold_ms: Optional[float] = None):
+    require_debug(request)
+    if threshold_ms is not None and threshold_ms < 0:
+        raise HTTPException(status_code=400, detail="threshold_ms must not be negative")
+    # Without a threshold the slow-operation log is switched off
+    tracing.set_slow_threshold(None if threshold_ms is None else threshold_ms / 1000)
+    return {"threshold_ms": threshold_ms}
+
 
 
 if __name__ == "__main__":